@@ -21,23 +21,112 @@ New in chunkana 0.1.2:
 - header_moved_from_id tracking with chunk_id (stable)
 """
 
+import dataclasses
 import json
+import logging
+import time
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
-from typing import Any
+from typing import IO, Any
 
+import chunkana
 from chunkana import (
     ChunkerConfig,
     chunk_hierarchical,
     chunk_markdown,
 )
 
+from batch_executor import BatchExecutor
+from chunk_cache import ChunkCache, make_cache_key
+from chunk_dedup import DedupConfig, deduplicate_documents
+from content_hash import CONTENT_HASH_KEY, content_hash
+from deadline import (
+    DEGRADE_FALLBACK_STRATEGY,
+    DEGRADE_SKIP_INVARIANTS,
+    DEGRADE_TRUNCATED,
+    Deadline,
+    throughput_estimator,
+)
+from hierarchy_index import (
+    CHUNK_ID_KEY,
+    PARENT_ID_KEY,
+    NavigationIndex,
+    NavigationIndexBuilder,
+)
+from hierarchy_spans import HierarchySpans
+from incremental import IncrementalResult, rechunk
 from input_validator import InputValidator
-from output_filter import FilterConfig, OutputFilter
+from metadata_projection import MetadataProjector
+from metadata_render import DEFAULT_RENDER_OPTIONS, RenderOptions, dumps_metadata
+from output_filter import (
+    SIGNIFICANT_CHARS_KEY,
+    FilterConfig,
+    OutputFilter,
+    significant_chars,
+)
+from size_guard import SizeGuard
+from stage_timing import StageTimings, timed
+from stream_input import (
+    DEFAULT_WINDOW_CHARS,
+    HeaderContext,
+    iter_text_lines,
+    iter_windows,
+    open_source,
+)
+from token_count import (
+    CHARS_PER_TOKEN,
+    TOKEN_COUNT_KEY,
+    TokenCounter,
+    default_token_counter,
+    token_counter_from_spec,
+)
+
+logger = logging.getLogger(__name__)
+
+# Strategy names accepted by ChunkerConfig.strategy_override
+STRATEGIES = ("code_aware", "list_aware", "structural", "fallback")
+
+# max_tokens mode: re-chunking passes with a smaller max_chunk_size, and
+# the share of the token budget the scaled size aims for
+TOKEN_FIT_PASSES = 3
+TOKEN_FIT_MARGIN = 0.9
 
 # Compatibility alias for legacy tests
 MarkdownChunker = None  # Will be set after MigrationAdapter is defined
 
 
+@dataclasses.dataclass(frozen=True)
+class AdapterSettings:
+    """Picklable constructor settings of a MigrationAdapter.
+
+    Batch worker processes rebuild their adapter from the parent's
+    settings, so parallel and sequential batches produce the same chunks.
+    The result cache is not included; the parent serves and stores
+    cached batch entries itself.
+    """
+
+    leaf_only: bool = False
+    span_hierarchy: bool = False
+    memory_limit: int | None = None  # SizeGuard limits, None: no guard
+    max_input_chars: int | None = None
+    tokenizer: str | None = None  # Tokenizer spec, None: process default
+
+    def build(self) -> "MigrationAdapter":
+        """New adapter with these settings (no result cache)."""
+        size_guard = None
+        if self.memory_limit is not None:
+            size_guard = SizeGuard(self.memory_limit, self.max_input_chars)
+        token_counter = None
+        if self.tokenizer is not None:
+            token_counter = token_counter_from_spec(self.tokenizer)
+        return MigrationAdapter(
+            leaf_only=self.leaf_only,
+            size_guard=size_guard,
+            token_counter=token_counter,
+            span_hierarchy=self.span_hierarchy,
+        )
+
+
 class MigrationAdapter:
     """Adapter to migrate from embedded markdown_chunker to chunkana 0.1.3.
 
@@ -50,16 +139,59 @@ class MigrationAdapter:
     - strict_mode=False: Auto-fixes issues instead of raising exceptions
     """
 
-    def __init__(self, leaf_only: bool = False) -> None:
+    def __init__(
+        self,
+        leaf_only: bool = False,
+        result_cache: ChunkCache | None = None,
+        size_guard: SizeGuard | None = None,
+        token_counter: TokenCounter | None = None,
+        span_hierarchy: bool = False,
+    ) -> None:
         """Initialize adapter with captured config defaults.
 
         Args:
             leaf_only: Return only leaf chunks in hierarchical mode
+            result_cache: Optional content-addressed cache for run_chunking
+            size_guard: Optional memory estimate check run before chunking;
+                large inputs drop debug, switch to the windowed path or
+                are rejected with ValueError
+            token_counter: Tokenizer for metadata["token_count"] and
+                max_tokens sizing (default: the process-wide counter from
+                MARKDOWN_CHUNKER_TOKENIZER)
+            span_hierarchy: In hierarchical mode, internal nodes carry
+                their own direct content plus a source span instead of
+                the full subtree text (see hierarchy_spans.py)
         """
         self._config_defaults = self._load_config_defaults()
         self._output_filter = OutputFilter(FilterConfig(leaf_only=leaf_only))
+        self._metadata_projector = MetadataProjector()
         self._input_validator = InputValidator()
         self._leaf_only = leaf_only
+        self._result_cache = result_cache
+        self._size_guard = size_guard
+        self._token_counter = token_counter or default_token_counter
+        self._span_hierarchy = span_hierarchy
+
+    @property
+    def settings(self) -> AdapterSettings | None:
+        """Settings rebuilding this adapter in another process.
+
+        None if the token counter wraps a custom tokenizer that cannot be
+        rebuilt from a spec.
+        """
+        tokenizer = None
+        if self._token_counter is not default_token_counter:
+            tokenizer = self._token_counter.spec
+            if tokenizer is None:
+                return None
+        guard = self._size_guard
+        return AdapterSettings(
+            leaf_only=self._leaf_only,
+            span_hierarchy=self._span_hierarchy,
+            memory_limit=guard.memory_limit if guard is not None else None,
+            max_input_chars=guard.max_input_chars if guard is not None else None,
+            tokenizer=tokenizer,
+        )
 
     def _load_config_defaults(self) -> dict[str, Any]:
         """Load actual config defaults from pre-migration snapshot."""
@@ -78,8 +210,23 @@ class MigrationAdapter:
         max_chunk_size: int = 4096,
         chunk_overlap: int = 200,
         strategy: str = "auto",
+        timings: StageTimings | None = None,
+        max_tokens: int | None = None,
+    ) -> ChunkerConfig:
+        """Build ChunkerConfig from tool parameters.
+
+        With max_tokens, max_chunk_size is derived from the token budget
+        (CHARS_PER_TOKEN per token); pass the same max_tokens to the
+        chunking call so chunks are fitted to it (see _fit_to_tokens).
+        """
+        if max_tokens:
+            max_chunk_size = max_tokens * CHARS_PER_TOKEN
+        with timed(timings, "config_build"):
+            return self._build_chunker_config(max_chunk_size, chunk_overlap, strategy)
+
+    def _build_chunker_config(
+        self, max_chunk_size: int, chunk_overlap: int, strategy: str
     ) -> ChunkerConfig:
-        """Build ChunkerConfig from tool parameters."""
         strategy_override = None if strategy == "auto" else strategy
 
         config_dict = self._config_defaults.copy()
@@ -117,6 +264,10 @@ class MigrationAdapter:
         include_metadata: bool = True,
         enable_hierarchy: bool = False,
         debug: bool = False,
+        render_options: RenderOptions | None = None,
+        timings: StageTimings | None = None,
+        deadline: Deadline | None = None,
+        max_tokens: int | None = None,
     ) -> list[str]:
         """Run chunking with guaranteed boundary invariance.
 
@@ -129,12 +280,869 @@ class MigrationAdapter:
         Stage 2: Rendering (_render_chunks)
             - Only formatting, does NOT modify boundaries
             - Depends on include_metadata
+
+        If a result cache is configured, identical requests (same text,
+        config and flags) are served from it without re-chunking. The raw
+        chunks are cached too, so a request differing only in
+        include_metadata skips Stage 1 and only re-renders.
+
+        render_options controls metadata serialization (pretty or compact
+        JSON, optional field whitelist); None means the historical pretty
+        format with all RAG fields.
+
+        If timings is given, wall and CPU time of every stage are recorded
+        into it (see stage_timing.StageTimings).
+
+        If deadline is given, the request degrades instead of running past
+        it: a cheaper config when the projected time does not fit, and
+        partial output once it has expired. Degraded chunks carry
+        metadata["degraded"] and are never cached (see deadline.py).
+
+        If max_tokens is given, chunks are fitted to that many tokens of
+        the adapter's tokenizer (see _fit_to_tokens).
+        """
+        render_options = render_options or DEFAULT_RENDER_OPTIONS
+        cache_key = None
+        if self._result_cache is not None:
+            cache_key = self._rendered_cache_key(
+                input_text,
+                config,
+                include_metadata,
+                enable_hierarchy,
+                debug,
+                render_options,
+                max_tokens,
+            )
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                if timings is not None:
+                    timings.cache_hit = "rendered"
+                    timings.chunk_count = len(cached)
+                return list(cached)
+
+        result = list(
+            self._iter_chunking(
+                input_text,
+                config,
+                include_metadata,
+                enable_hierarchy,
+                debug,
+                render_options,
+                timings,
+                deadline,
+                max_tokens,
+                lazy=False,
+            )
+        )
+
+        if cache_key is not None and not (deadline is not None and deadline.degraded):
+            self._result_cache.put(cache_key, list(result))
+
+        return result
+
+    def iter_chunking(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        include_metadata: bool = True,
+        enable_hierarchy: bool = False,
+        debug: bool = False,
+        render_options: RenderOptions | None = None,
+        timings: StageTimings | None = None,
+        deadline: Deadline | None = None,
+        max_tokens: int | None = None,
+    ) -> Iterator[str]:
+        """Lazy chunking pipeline yielding one rendered chunk at a time.
+
+        chunk -> dict -> validate -> filter -> render, each stage a
+        generator, so a consumer that does not keep the strings holds only
+        one rendered chunk at a time. Yields exactly what run_chunking()
+        returns. Cached raw chunks are served from the result cache, but a
+        cache miss is not stored, so the pipeline stays lazy.
+        """
+        yield from self._iter_chunking(
+            input_text,
+            config,
+            include_metadata,
+            enable_hierarchy,
+            debug,
+            render_options,
+            timings,
+            deadline,
+            max_tokens,
+            lazy=True,
+        )
+
+    def _iter_chunking(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        include_metadata: bool,
+        enable_hierarchy: bool,
+        debug: bool,
+        render_options: RenderOptions | None,
+        timings: StageTimings | None,
+        deadline: Deadline | None,
+        max_tokens: int | None,
+        lazy: bool,
+    ) -> Iterator[str]:
+        """iter_chunking() pipeline; lazy=False caches raw chunks on a miss."""
+        yield from self._iter_stage1(
+            input_text,
+            config,
+            enable_hierarchy,
+            debug,
+            timings,
+            deadline,
+            max_tokens,
+            lazy,
+            self._requests_token_count(render_options),
+            lambda raw_chunks, debug: self._iter_rendered(
+                raw_chunks, include_metadata, debug, render_options
+            ),
+        )
+
+    def _iter_stage1(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        enable_hierarchy: bool,
+        debug: bool,
+        timings: StageTimings | None,
+        deadline: Deadline | None,
+        max_tokens: int | None,
+        lazy: bool,
+        count_tokens: bool,
+        render: Callable[[Iterable[dict[str, Any]], bool], Iterator[Any]],
+    ) -> Iterator[Any]:
+        """Stage 1 shared by the text and structured pipelines, then render.
+
+        Plans for input size and deadline, then gets raw chunks from the
+        cache or chunk -> dict -> validate -> filter. render(raw_chunks,
+        debug) is stage 2; it gets the debug flag after the size plan.
+        count_tokens: metadata["token_count"] is rendered (see
+        _requests_token_count).
         """
         # STAGE 1: CHUNKING (does NOT depend on include_metadata)
-        raw_chunks = self._perform_chunking(input_text, config, enable_hierarchy, debug)
+        enable_hierarchy, debug, windowed, size_reasons = self._plan_for_size(
+            input_text, enable_hierarchy, debug
+        )
+        if deadline is not None:
+            config = self._plan_for_deadline(
+                input_text, config, enable_hierarchy, deadline
+            )
+        raw_chunks = self._get_raw_chunks(
+            input_text,
+            config,
+            enable_hierarchy,
+            debug,
+            timings,
+            windowed,
+            max_tokens,
+            lazy,
+            count_tokens,
+        )
+        if deadline is not None:
+            raw_chunks = self._iter_within_deadline(raw_chunks, deadline)
+        if size_reasons:
+            raw_chunks = self._iter_marked(raw_chunks, size_reasons)
+        if timings is not None:
+            raw_chunks = timings.count_chunks(raw_chunks)
 
         # STAGE 2: RENDERING (depends on include_metadata)
-        return self._render_chunks(raw_chunks, include_metadata, debug)
+        rendered = render(raw_chunks, debug)
+        if timings is not None:
+            rendered = timings.iter_stage("render", rendered)
+        yield from rendered
+
+    def iter_chunking_structured(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        enable_hierarchy: bool = False,
+        debug: bool = False,
+        timings: StageTimings | None = None,
+        deadline: Deadline | None = None,
+        max_tokens: int | None = None,
+        render_options: RenderOptions | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Lazy pipeline yielding structured chunks instead of strings.
+
+        Each item is {"content", "metadata", "start_line", "end_line"} with
+        metadata as a JSON object (RAG-filtered unless debug), built
+        straight from the raw chunk with no string formatting. Only
+        render_options.metadata_fields applies to structured output.
+        Like iter_chunking(), a raw cache miss is not stored.
+        """
+        yield from self._iter_chunking_structured(
+            input_text,
+            config,
+            enable_hierarchy,
+            debug,
+            timings,
+            deadline,
+            max_tokens,
+            render_options,
+            lazy=True,
+        )
+
+    def _iter_chunking_structured(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        enable_hierarchy: bool,
+        debug: bool,
+        timings: StageTimings | None,
+        deadline: Deadline | None,
+        max_tokens: int | None,
+        render_options: RenderOptions | None,
+        lazy: bool,
+    ) -> Iterator[dict[str, Any]]:
+        """iter_chunking_structured() pipeline; lazy=False caches raw chunks."""
+        metadata_fields = (render_options or DEFAULT_RENDER_OPTIONS).metadata_fields
+        yield from self._iter_stage1(
+            input_text,
+            config,
+            enable_hierarchy,
+            debug,
+            timings,
+            deadline,
+            max_tokens,
+            lazy,
+            self._requests_token_count(render_options),
+            lambda raw_chunks, debug: (
+                self._render_chunk_structured(c, debug, metadata_fields)
+                for c in raw_chunks
+            ),
+        )
+
+    def run_chunking_structured(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        enable_hierarchy: bool = False,
+        debug: bool = False,
+        timings: StageTimings | None = None,
+        deadline: Deadline | None = None,
+        max_tokens: int | None = None,
+        render_options: RenderOptions | None = None,
+    ) -> list[dict[str, Any]]:
+        """List wrapper over iter_chunking_structured() that caches raw chunks."""
+        return list(
+            self._iter_chunking_structured(
+                input_text,
+                config,
+                enable_hierarchy,
+                debug,
+                timings,
+                deadline,
+                max_tokens,
+                render_options,
+                lazy=False,
+            )
+        )
+
+    def run_chunking_indexed(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        debug: bool = False,
+        strip_id_lists: bool = True,
+        timings: StageTimings | None = None,
+        deadline: Deadline | None = None,
+        max_tokens: int | None = None,
+        render_options: RenderOptions | None = None,
+    ) -> tuple[list[dict[str, Any]], NavigationIndex]:
+        """Hierarchical structured chunks plus their navigation index.
+
+        The index is built in the same pass as the chunks (see
+        hierarchy_index.py). With strip_id_lists the per-chunk
+        children_ids/sibling_ids lists it replaces are left out of the
+        metadata. A metadata_fields whitelist always keeps chunk_id and
+        parent_id, which the index is built from. With a result cache
+        configured, chunks and index are cached together; callers always
+        get their own chunk dicts.
+        """
+        render_options = render_options or DEFAULT_RENDER_OPTIONS
+        if render_options.metadata_fields is not None:
+            render_options = dataclasses.replace(
+                render_options,
+                metadata_fields=(
+                    *render_options.metadata_fields,
+                    CHUNK_ID_KEY,
+                    PARENT_ID_KEY,
+                ),
+            )
+        cache_key = None
+        if self._result_cache is not None:
+            cache_key = self._cache_key(
+                "indexed",
+                input_text,
+                config,
+                True,
+                debug,
+                strip_id_lists=strip_id_lists,
+                metadata_fields=render_options.metadata_fields,
+                max_tokens=max_tokens,
+            )
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                if timings is not None:
+                    timings.cache_hit = "indexed"
+                    timings.chunk_count = len(cached["chunks"])
+                chunks = self._copy_structured(cached["chunks"])
+                return chunks, NavigationIndex.from_dict(cached["navigation"])
+
+        builder = NavigationIndexBuilder(strip_id_lists)
+        chunks = list(
+            builder.observe(
+                self._iter_chunking_structured(
+                    input_text,
+                    config,
+                    True,
+                    debug,
+                    timings,
+                    deadline,
+                    max_tokens,
+                    render_options,
+                    lazy=False,
+                )
+            )
+        )
+        index = builder.build()
+
+        if cache_key is not None and not (deadline is not None and deadline.degraded):
+            self._result_cache.put(
+                cache_key,
+                {
+                    "chunks": self._copy_structured(chunks),
+                    "navigation": index.to_dict(),
+                },
+            )
+        return chunks, index
+
+    @staticmethod
+    def _copy_structured(chunks: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Copy structured chunks down to their metadata dicts."""
+        return [{**chunk, "metadata": dict(chunk["metadata"])} for chunk in chunks]
+
+    def run_chunking_stream(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        include_metadata: bool = True,
+        enable_hierarchy: bool = False,
+        debug: bool = False,
+        group_size: int = 32,
+        render_options: RenderOptions | None = None,
+        structured: bool = False,
+        timings: StageTimings | None = None,
+        deadline: Deadline | None = None,
+        max_tokens: int | None = None,
+    ) -> Iterator[list[Any]]:
+        """Yield rendered chunks in groups of at most group_size.
+
+        Concatenating the groups gives exactly the run_chunking() output
+        (or run_chunking_structured() output when structured=True).
+        Chunks are rendered lazily, so only the current group of rendered
+        chunks is held in memory and the first group is available as
+        soon as it is rendered.
+        """
+        if group_size < 1:
+            raise ValueError(f"group_size must be >= 1, got {group_size}")
+
+        rendered: Iterator[Any]
+        if structured:
+            rendered = self.iter_chunking_structured(
+                input_text,
+                config,
+                enable_hierarchy,
+                debug,
+                timings,
+                deadline,
+                max_tokens,
+                render_options,
+            )
+        else:
+            rendered = self.iter_chunking(
+                input_text,
+                config,
+                include_metadata,
+                enable_hierarchy,
+                debug,
+                render_options,
+                timings,
+                deadline,
+                max_tokens,
+            )
+
+        group: list[Any] = []
+        for text in rendered:
+            group.append(text)
+            if len(group) >= group_size:
+                yield group
+                group = []
+        if group:
+            yield group
+
+    def iter_chunking_source(
+        self,
+        source: str | Path | IO[Any],
+        config: ChunkerConfig,
+        include_metadata: bool = True,
+        debug: bool = False,
+        window_chars: int = DEFAULT_WINDOW_CHARS,
+        render_options: RenderOptions | None = None,
+    ) -> Iterator[str]:
+        """Chunk a file path or text/binary stream with bounded memory.
+
+        The source is read line by line into fence-aware windows of about
+        window_chars (see stream_input.iter_windows) and each window is
+        chunked with chunk_markdown(). Only one window and its chunks are
+        held at a time. Line numbers are relative to the whole source and
+        every chunk carries stream_window_index / stream_chunk_index.
+
+        header_path includes the headers of earlier windows, and the
+        chunks on either side of a window boundary get each other's
+        overlap context (previous_content / next_content). Unlike
+        run_chunking(), hierarchical mode is not available.
+
+        Args:
+            source: File path (str or Path) or an open text/binary stream.
+                Streams are not closed.
+        """
+        stream, owned = open_source(source)
+        try:
+            raw_chunks = self._iter_source_raw_chunks(
+                stream,
+                config,
+                window_chars,
+                self._requests_token_count(render_options),
+            )
+            yield from self._iter_rendered(
+                raw_chunks, include_metadata, debug, render_options
+            )
+        finally:
+            if owned:
+                stream.close()
+
+    def _iter_source_raw_chunks(
+        self,
+        stream: Iterable[str],
+        config: ChunkerConfig,
+        window_chars: int,
+        count_tokens: bool = False,
+    ) -> Iterator[dict[str, Any]]:
+        """Stage 1 for windowed sources: window -> chunk -> dict -> validate.
+
+        header_path is completed with the header stack of earlier windows
+        (see stream_input.HeaderContext). The last chunk of a window is
+        held back until the first chunk of the next one, so both get the
+        overlap context the library could not see.
+        """
+        headers = HeaderContext()
+        overlap = getattr(config, "overlap_size", 0)
+        previous: dict[str, Any] | None = None
+        chunk_index = 0
+        for window in iter_windows(stream, window_chars):
+            if not window.text.strip():
+                continue
+
+            headers.enter(window.text)
+            line_offset = window.start_line - 1
+            first = True
+            for chunk in chunk_markdown(window.text, config):
+                chunk_dict = self._chunk_to_dict(
+                    chunk, count_tokens=count_tokens
+                )
+                metadata = chunk_dict["metadata"]
+                header_path = metadata.get("header_path")
+                completed = headers.header_path(header_path, chunk_dict["start_line"])
+                if completed != header_path:
+                    metadata["header_path"] = completed
+                    metadata[CONTENT_HASH_KEY] = content_hash(
+                        chunk_dict["content"], completed
+                    )
+                chunk_dict["start_line"] += line_offset
+                chunk_dict["end_line"] += line_offset
+                metadata["stream_window_index"] = window.index
+                metadata["stream_chunk_index"] = chunk_index
+
+                if previous is not None:
+                    if first and overlap > 0:
+                        self._link_overlap(previous, chunk_dict, overlap)
+                    yield self._input_validator.validate_chunk(
+                        previous, chunk_index - 1
+                    )
+                previous = chunk_dict
+                first = False
+                chunk_index += 1
+
+        if previous is not None:
+            yield self._input_validator.validate_chunk(previous, chunk_index - 1)
+
+    @staticmethod
+    def _link_overlap(
+        previous: dict[str, Any], chunk: dict[str, Any], overlap: int
+    ) -> None:
+        """Give chunks on either side of a window boundary overlap context."""
+        previous["metadata"].setdefault("next_content", chunk["content"][:overlap])
+        chunk["metadata"].setdefault("previous_content", previous["content"][-overlap:])
+
+    def rechunk_incremental(
+        self,
+        previous_text: str,
+        previous_chunks: list[dict[str, Any]],
+        new_text: str,
+        config: ChunkerConfig,
+        debug: bool = False,
+    ) -> IncrementalResult:
+        """Re-chunk an edited document, reusing chunks of untouched sections.
+
+        previous_chunks is the run_chunking_structured() output for
+        previous_text with the same config and debug flag (flat mode).
+        Only regions around changed lines, bounded by header lines, are
+        chunked again (see incremental.py); result.changed lists the chunk
+        indices whose vectors need re-embedding.
+
+        With the "auto" strategy, the strategy recorded in previous_chunks
+        is kept for re-chunked regions, so an edit cannot switch strategy
+        for part of the document.
+        """
+        strategy = next(
+            (c.get("metadata", {}).get("strategy") for c in previous_chunks), None
+        )
+        pinned = getattr(config, "strategy_override", None) is None
+        if pinned and strategy in STRATEGIES:
+            config = dataclasses.replace(config, strategy_override=strategy)
+
+        def chunk_text(text: str) -> list[dict[str, Any]]:
+            if not text.strip():
+                return []
+            raw_chunks = self._iter_raw_chunks(text, config, False, debug)
+            return [self._render_chunk_structured(c, debug) for c in raw_chunks]
+
+        result = rechunk(previous_text, previous_chunks, new_text, chunk_text)
+        # Re-chunked regions got their header_path prefix after hashing
+        for chunk in result.chunks:
+            chunk["metadata"][CONTENT_HASH_KEY] = content_hash(
+                chunk["content"], chunk["metadata"].get("header_path")
+            )
+        return result
+
+    def run_chunking_batch(
+        self,
+        input_texts: list[str],
+        config: ChunkerConfig,
+        include_metadata: bool = True,
+        enable_hierarchy: bool = False,
+        debug: bool = False,
+        executor: BatchExecutor | None = None,
+        render_options: RenderOptions | None = None,
+        dedup: DedupConfig | None = None,
+        max_tokens: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Run chunking for many documents with one shared config.
+
+        Errors are isolated per document: a failing document yields an
+        entry with empty chunks and an error message, the rest of the
+        batch is unaffected.
+
+        Args:
+            executor: Optional process pool; documents are then chunked
+                in parallel worker processes by adapters built from
+                self.settings. Rendered results are looked up in and
+                stored to the result cache by this process; raw (dedup)
+                results of the pool are not cached. Without settings
+                (custom tokenizer) the batch runs sequentially.
+            dedup: Optional duplicate detection across the batch; raw
+                chunks of all documents are compared before rendering and
+                duplicates annotated with metadata["duplicate_of"] or
+                dropped (see chunk_dedup.py)
+
+        Returns:
+            One dict per input, in input order:
+            {"index": int, "chunks": list[str], "error": str | None}
+        """
+        raw = dedup is not None and dedup.enabled
+        settings = self.settings if executor is not None else None
+        if settings is not None and len(input_texts) > 1:
+            entries = self._run_batch_in_pool(
+                executor,
+                settings,
+                input_texts,
+                config,
+                include_metadata,
+                enable_hierarchy,
+                debug,
+                render_options,
+                raw,
+                max_tokens,
+            )
+        else:
+            entries = [
+                self._run_batch_item(
+                    index,
+                    text,
+                    config,
+                    include_metadata,
+                    enable_hierarchy,
+                    debug,
+                    render_options,
+                    raw=raw,
+                    max_tokens=max_tokens,
+                )
+                for index, text in enumerate(input_texts)
+            ]
+        if not raw:
+            return entries
+
+        documents, duplicates = deduplicate_documents(
+            [None if entry["error"] else entry["chunks"] for entry in entries],
+            dedup,
+        )
+        for entry, chunks in zip(entries, documents):
+            if chunks is not None:
+                entry["chunks"] = self._render_chunks(
+                    chunks, include_metadata, debug, render_options
+                )
+        if duplicates:
+            logger.info(
+                f"[MigrationAdapter] Batch of {len(input_texts)} documents: "
+                f"{duplicates} duplicate chunks ({dedup.mode})"
+            )
+        return entries
+
+    def _run_batch_in_pool(
+        self,
+        executor: BatchExecutor,
+        settings: AdapterSettings,
+        input_texts: list[str],
+        config: ChunkerConfig,
+        include_metadata: bool,
+        enable_hierarchy: bool,
+        debug: bool,
+        render_options: RenderOptions | None,
+        raw: bool,
+        max_tokens: int | None,
+    ) -> list[dict[str, Any]]:
+        """Batch entries from the process pool, using the result cache here."""
+        entries: list[dict[str, Any] | None] = [None] * len(input_texts)
+        keys: dict[int, str] = {}
+        if self._result_cache is not None and not raw:
+            options = render_options or DEFAULT_RENDER_OPTIONS
+            for index, text in enumerate(input_texts):
+                if not isinstance(text, str) or not text.strip():
+                    continue
+                keys[index] = self._rendered_cache_key(
+                    text,
+                    config,
+                    include_metadata,
+                    enable_hierarchy,
+                    debug,
+                    options,
+                    max_tokens,
+                )
+                cached = self._result_cache.get(keys[index])
+                if cached is not None:
+                    entries[index] = {
+                        "index": index,
+                        "chunks": list(cached),
+                        "error": None,
+                    }
+
+        pending = [index for index, entry in enumerate(entries) if entry is None]
+        results = executor.run_batch(
+            [input_texts[index] for index in pending],
+            config,
+            settings,
+            include_metadata,
+            enable_hierarchy,
+            debug,
+            render_options,
+            raw=raw,
+            max_tokens=max_tokens,
+        )
+        for index, entry in zip(pending, results):
+            entry["index"] = index
+            entries[index] = entry
+            if index in keys and entry["error"] is None:
+                self._result_cache.put(keys[index], list(entry["chunks"]))
+        return entries
+
+    def _run_batch_item(
+        self,
+        index: int,
+        input_text: Any,
+        config: ChunkerConfig,
+        include_metadata: bool,
+        enable_hierarchy: bool,
+        debug: bool,
+        render_options: RenderOptions | None = None,
+        raw: bool = False,
+        max_tokens: int | None = None,
+    ) -> dict[str, Any]:
+        """Chunk one batch document, converting failures into an error entry.
+
+        With raw=True the entry holds the raw chunk dicts instead of
+        rendered strings (for batch-level processing before rendering).
+        """
+        try:
+            if not isinstance(input_text, str) or not input_text.strip():
+                raise ValueError("input_text is required and cannot be empty")
+
+            if raw:
+                enable_hierarchy, debug, windowed, size_reasons = (
+                    self._plan_for_size(input_text, enable_hierarchy, debug)
+                )
+                chunks = list(
+                    self._iter_marked(
+                        self._get_raw_chunks(
+                            input_text,
+                            config,
+                            enable_hierarchy,
+                            debug,
+                            None,
+                            windowed,
+                            max_tokens,
+                            count_tokens=self._requests_token_count(render_options),
+                        ),
+                        size_reasons,
+                    )
+                )
+            else:
+                chunks = self.run_chunking(
+                    input_text=input_text,
+                    config=config,
+                    include_metadata=include_metadata,
+                    enable_hierarchy=enable_hierarchy,
+                    debug=debug,
+                    render_options=render_options,
+                    max_tokens=max_tokens,
+                )
+            return {"index": index, "chunks": chunks, "error": None}
+
+        except ValueError as e:
+            error = f"Validation error: {str(e)}"
+        except Exception as e:
+            error = f"Error chunking document: {str(e)}"
+
+        logger.warning(f"[MigrationAdapter] Batch document {index} failed: {error}")
+        return {"index": index, "chunks": [], "error": error}
+
+    def _rendered_cache_key(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        include_metadata: bool,
+        enable_hierarchy: bool,
+        debug: bool,
+        render_options: RenderOptions,
+        max_tokens: int | None,
+    ) -> str:
+        """Result cache key of run_chunking() output."""
+        return self._cache_key(
+            "rendered",
+            input_text,
+            config,
+            enable_hierarchy,
+            debug,
+            include_metadata=include_metadata,
+            metadata_format=render_options.metadata_format,
+            metadata_fields=render_options.metadata_fields,
+            max_tokens=max_tokens,
+        )
+
+    def _cache_key(
+        self,
+        stage: str,
+        input_text: str,
+        config: ChunkerConfig,
+        enable_hierarchy: bool,
+        debug: bool,
+        **flags: Any,
+    ) -> str:
+        """Build result cache key for a pipeline stage ("raw" or "rendered")."""
+        return make_cache_key(
+            input_text,
+            config,
+            stage=stage,
+            enable_hierarchy=enable_hierarchy,
+            debug=debug,
+            leaf_only=self._leaf_only,
+            span_hierarchy=self._span_hierarchy,
+            library_version=getattr(chunkana, "__version__", ""),
+            tokenizer=self._token_counter.name,
+            **flags,
+        )
+
+    def _get_raw_chunks(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        enable_hierarchy: bool,
+        debug: bool,
+        timings: StageTimings | None = None,
+        windowed: bool = False,
+        max_tokens: int | None = None,
+        lazy: bool = False,
+        count_tokens: bool = False,
+    ) -> Iterable[dict[str, Any]]:
+        """Return raw chunks from the result cache or the chunking pipeline.
+
+        Without a cache this is the lazy _iter_raw_chunks() generator
+        (a list in max_tokens mode, which measures all chunks). Cached raw
+        chunks are shared between callers, so rendering must treat them
+        as read-only. With lazy, a cache miss returns the generator and
+        is not stored, since storing would materialize every chunk
+        before the first is yielded. Windowed input (see _plan_for_size)
+        is chunked window by window and never cached as raw chunks; it is
+        not fitted to max_tokens. count_tokens adds metadata["token_count"]
+        outside max_tokens mode, which always measures chunks.
+        """
+        if windowed:
+            return self._iter_source_raw_chunks(
+                iter_text_lines(input_text),
+                config,
+                DEFAULT_WINDOW_CHARS,
+                count_tokens or bool(max_tokens),
+            )
+        if self._result_cache is None:
+            if max_tokens:
+                return self._fit_to_tokens(
+                    input_text, config, enable_hierarchy, debug, timings, max_tokens
+                )
+            return self._iter_raw_chunks(
+                input_text, config, enable_hierarchy, debug, timings, count_tokens
+            )
+
+        raw_key = self._cache_key(
+            "raw",
+            input_text,
+            config,
+            enable_hierarchy,
+            debug,
+            max_tokens=max_tokens,
+            count_tokens=count_tokens,
+        )
+        raw_chunks = self._result_cache.get(raw_key)
+        if raw_chunks is None:
+            if lazy and not max_tokens:
+                return self._iter_raw_chunks(
+                    input_text, config, enable_hierarchy, debug, timings, count_tokens
+                )
+            if max_tokens:
+                raw_chunks = self._fit_to_tokens(
+                    input_text, config, enable_hierarchy, debug, timings, max_tokens
+                )
+            else:
+                raw_chunks = self._perform_chunking(
+                    input_text, config, enable_hierarchy, debug, timings, count_tokens
+                )
+            self._result_cache.put(raw_key, raw_chunks)
+        elif timings is not None:
+            timings.cache_hit = "raw"
+        return raw_chunks
 
     def _perform_chunking(
         self,
@@ -142,6 +1150,8 @@ class MigrationAdapter:
         config: ChunkerConfig,
         enable_hierarchy: bool,
         debug: bool,
+        timings: StageTimings | None = None,
+        count_tokens: bool = False,
     ) -> list[dict[str, Any]]:
         """Single chunking path - does NOT depend on include_metadata.
 
@@ -150,69 +1160,324 @@ class MigrationAdapter:
 
         Applies same normalization for hierarchical and non-hierarchical modes.
         """
-        if enable_hierarchy:
-            result = chunk_hierarchical(input_text, config)
+        return list(
+            self._iter_raw_chunks(
+                input_text, config, enable_hierarchy, debug, timings, count_tokens
+            )
+        )
 
-            if debug:
-                chunks = result.chunks
-            else:
-                chunks = result.get_flat_chunks()
+    def _fit_to_tokens(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        enable_hierarchy: bool,
+        debug: bool,
+        timings: StageTimings | None,
+        max_tokens: int,
+    ) -> list[dict[str, Any]]:
+        """Chunk so that chunks fit max_tokens, shrinking max_chunk_size.
+
+        The library sizes chunks in characters. After each pass chunks are
+        measured by metadata["token_count"]; while one is over the budget,
+        max_chunk_size is scaled down by the worst tokens/budget ratio and
+        the document chunked again, at most TOKEN_FIT_PASSES times. Token
+        counts are cached per text, so chunks that come out unchanged in
+        a later pass are not tokenized again. Chunks the library keeps
+        oversize on purpose (atomic code blocks, tables) and internal
+        hierarchy nodes do not drive the fitting.
+        """
+        for attempt in range(TOKEN_FIT_PASSES):
+            chunks = self._perform_chunking(
+                input_text, config, enable_hierarchy, debug, timings, count_tokens=True
+            )
+            worst = max(
+                (
+                    chunk["metadata"][TOKEN_COUNT_KEY] / max_tokens
+                    for chunk in chunks
+                    if not chunk["metadata"].get("allow_oversize")
+                    and chunk["metadata"].get("is_leaf", True)
+                ),
+                default=0.0,
+            )
+            if worst <= 1.0 or attempt == TOKEN_FIT_PASSES - 1:
+                break
+
+            size = int(config.max_chunk_size / worst * TOKEN_FIT_MARGIN)
+            if size < 1:
+                break
+            logger.debug(
+                f"[MigrationAdapter] Chunks up to {worst:.2f}x max_tokens="
+                f"{max_tokens}, re-chunking with max_chunk_size={size}"
+            )
+            config = dataclasses.replace(
+                config,
+                max_chunk_size=size,
+                min_chunk_size=min(config.min_chunk_size, size // 2),
+                overlap_size=min(config.overlap_size, size // 2),
+            )
+        return chunks
+
+    def _iter_raw_chunks(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        enable_hierarchy: bool,
+        debug: bool,
+        timings: StageTimings | None = None,
+        count_tokens: bool = False,
+    ) -> Iterator[dict[str, Any]]:
+        """Lazy stage 1: library chunks -> dict -> validate -> filter.
 
-            chunks_dict = [self._chunk_to_dict(c) for c in chunks]
+        In hierarchical non-debug mode the filter decisions run first, on
+        the library chunks (OutputFilter.iter_select), so dropped root and
+        internal nodes skip conversion and validation.
+
+        With span_hierarchy, internal nodes are converted to their own
+        content plus a source span, so subtree text is not kept.
+        """
+        started = time.perf_counter()
+        spans = None
+        if enable_hierarchy:
+            with timed(timings, "chunk_hierarchical"):
+                result = chunk_hierarchical(input_text, config)
+
+                if debug:
+                    chunks = ((c, None) for c in result.chunks)
+                else:
+                    # Pushdown: dropped nodes are never converted or
+                    # validated; significance measured here is reused
+                    chunks = self._output_filter.iter_select_measured(
+                        result.get_flat_chunks()
+                    )
+            if self._span_hierarchy:
+                spans = HierarchySpans(input_text, result.chunks)
         else:
-            chunks = chunk_markdown(input_text, config)
-            chunks_dict = [self._chunk_to_dict(c) for c in chunks]
+            with timed(timings, "chunk_markdown"):
+                chunks = ((c, None) for c in chunk_markdown(input_text, config))
+
+        # The library call cannot be interrupted, so deadline projections
+        # are learned from it (full-cost configs only)
+        if getattr(config, "validate_invariants", True):
+            throughput_estimator.observe(
+                "hierarchical" if enable_hierarchy else "flat",
+                len(input_text),
+                time.perf_counter() - started,
+            )
+
+        chunks_dict = (
+            self._chunk_to_dict(c, spans, measure, count_tokens)
+            for c, measure in chunks
+        )
+        if timings is not None:
+            chunks_dict = timings.iter_stage("chunk_to_dict", chunks_dict)
 
         # IMPORTANT: validate_and_fix applied for BOTH modes (hier and non-hier)
-        chunks_dict = self._input_validator.validate_and_fix(chunks_dict)
+        chunks_dict = self._input_validator.iter_validate_and_fix(chunks_dict)
+        if timings is not None:
+            chunks_dict = timings.iter_stage("validate", chunks_dict)
 
-        # Filtering for hierarchical mode
+        # Filtering for hierarchical mode (sets indexable on kept chunks)
         if enable_hierarchy:
-            chunks_dict = self._output_filter.filter(chunks_dict, debug=debug)
+            chunks_dict = self._output_filter.iter_filter(chunks_dict, debug=debug)
+            if timings is not None:
+                chunks_dict = timings.iter_stage("filter", chunks_dict)
+
+        yield from chunks_dict
+
+    def _plan_for_size(
+        self, input_text: str, enable_hierarchy: bool, debug: bool
+    ) -> tuple[bool, bool, bool, tuple[str, ...]]:
+        """Apply the size guard: (enable_hierarchy, debug, windowed, reasons).
+
+        The reasons (size_guard.REASON_*) are reported in the chunks'
+        metadata["degraded"] like deadline degradations, since the output
+        shape differs from what was requested.
+
+        Raises:
+            ValueError: If the input is too large to chunk
+        """
+        if self._size_guard is None:
+            return enable_hierarchy, debug, False, ()
+        plan = self._size_guard.plan(input_text, enable_hierarchy, debug)
+        return plan.enable_hierarchy, plan.debug, plan.windowed, plan.reasons
+
+    def _plan_for_deadline(
+        self,
+        input_text: str,
+        config: ChunkerConfig,
+        enable_hierarchy: bool,
+        deadline: Deadline,
+    ) -> ChunkerConfig:
+        """Return config, or a cheaper copy if the projected time does not fit."""
+        mode = "hierarchical" if enable_hierarchy else "flat"
+        projected = throughput_estimator.project(mode, len(input_text))
+        remaining = deadline.remaining()
+        if projected <= remaining:
+            return config
+
+        changes: dict[str, Any] = {}
+        if getattr(config, "strategy_override", None) != "fallback":
+            changes["strategy_override"] = "fallback"
+            deadline.degrade(DEGRADE_FALLBACK_STRATEGY)
+        if getattr(config, "validate_invariants", False):
+            changes["validate_invariants"] = False
+            deadline.degrade(DEGRADE_SKIP_INVARIANTS)
+        if not changes:
+            return config
+
+        logger.warning(
+            f"[MigrationAdapter] Projected {projected:.1f}s exceeds remaining "
+            f"{remaining:.1f}s for {len(input_text)} chars, degrading: "
+            f"{', '.join(deadline.reasons)}"
+        )
+        return dataclasses.replace(config, **changes)
+
+    def _iter_within_deadline(
+        self, raw_chunks: Iterable[dict[str, Any]], deadline: Deadline
+    ) -> Iterator[dict[str, Any]]:
+        """Stop emitting chunks once the deadline has passed.
+
+        Every chunk produced so far is complete and validated, so the
+        output is partial but valid. A chunk is held back until the next
+        one exists, so the last chunk of a truncated request can be tagged
+        "truncated". Chunks are copied before tagging (cached raw chunks
+        are shared).
+
+        The library call cannot be interrupted: for whole-document input
+        truncation only saves the conversion and rendering after it; for
+        windowed input it also skips the windows not yet chunked.
+        """
+        previous = None
+        for chunk in raw_chunks:
+            if previous is not None:
+                if deadline.expired():
+                    deadline.degrade(DEGRADE_TRUNCATED)
+                    logger.warning(
+                        f"[MigrationAdapter] Deadline of {deadline.seconds:.0f}s "
+                        f"passed, truncating after line {previous.get('end_line')}"
+                    )
+                    yield self._mark_degraded(previous, deadline.reasons)
+                    return
+                yield self._mark_degraded(previous, deadline.reasons)
+            previous = chunk
+        if previous is not None:
+            yield self._mark_degraded(previous, deadline.reasons)
+
+    def _iter_marked(
+        self, raw_chunks: Iterable[dict[str, Any]], reasons: Iterable[str]
+    ) -> Iterator[dict[str, Any]]:
+        """Lazily add degradation reasons to every chunk."""
+        reasons = list(reasons)
+        for chunk in raw_chunks:
+            yield self._mark_degraded(chunk, reasons)
 
-        return chunks_dict
+    def _mark_degraded(
+        self, chunk: dict[str, Any], reasons: list[str]
+    ) -> dict[str, Any]:
+        """Return chunk with reasons added to metadata["degraded"], if any.
+
+        Reasons already on the chunk are kept (size guard and deadline
+        degradations combine). The chunk is copied, never modified.
+        """
+        if not reasons:
+            return chunk
+        metadata = chunk.get("metadata", {})
+        degraded = list(metadata.get("degraded", ()))
+        degraded.extend(r for r in reasons if r not in degraded)
+        return {**chunk, "metadata": {**metadata, "degraded": degraded}}
 
     def _render_chunks(
         self,
         raw_chunks: list[dict[str, Any]],
         include_metadata: bool,
         debug: bool,
+        render_options: RenderOptions | None = None,
     ) -> list[str]:
         """Render chunks to output format.
 
         CRITICAL: This method does NOT modify boundaries or content,
         only formats output.
         """
-        if include_metadata:
-            return self._render_with_metadata(raw_chunks, debug)
-        else:
-            return self._render_without_metadata(raw_chunks)
+        return list(
+            self._iter_rendered(raw_chunks, include_metadata, debug, render_options)
+        )
+
+    def _iter_rendered(
+        self,
+        raw_chunks: Iterable[dict[str, Any]],
+        include_metadata: bool,
+        debug: bool,
+        render_options: RenderOptions | None = None,
+    ) -> Iterator[str]:
+        """Lazy stage 2: render chunks one at a time."""
+        render_options = render_options or DEFAULT_RENDER_OPTIONS
+        for chunk in raw_chunks:
+            if include_metadata:
+                yield self._render_chunk_with_metadata(
+                    chunk,
+                    debug,
+                    render_options.metadata_format,
+                    render_options.metadata_fields,
+                )
+            else:
+                yield self._embed_overlap(chunk)
 
     def _render_with_metadata(
-        self, raw_chunks: list[dict[str, Any]], debug: bool
+        self,
+        raw_chunks: list[dict[str, Any]],
+        debug: bool,
+        metadata_format: str = "pretty",
     ) -> list[str]:
         """Render with metadata (dify-style)."""
-        result = []
+        return [
+            self._render_chunk_with_metadata(chunk, debug, metadata_format)
+            for chunk in raw_chunks
+        ]
 
-        for chunk in raw_chunks:
-            content = chunk.get("content", "")
-            metadata = chunk.get("metadata", {})
-            start_line = chunk.get("start_line", 0)
-            end_line = chunk.get("end_line", 0)
+    def _render_chunk_with_metadata(
+        self,
+        chunk: dict[str, Any],
+        debug: bool,
+        metadata_format: str = "pretty",
+        metadata_fields: tuple[str, ...] | None = None,
+    ) -> str:
+        """Render a single chunk with its <metadata> header."""
+        content = chunk.get("content", "")
+        metadata = chunk.get("metadata", {})
+        start_line = chunk.get("start_line", 0)
+        end_line = chunk.get("end_line", 0)
+
+        if debug:
+            output_metadata = metadata.copy()
+        else:
+            output_metadata = self._filter_metadata_for_rag(metadata, metadata_fields)
 
-            if debug:
-                output_metadata = metadata.copy()
-            else:
-                output_metadata = self._filter_metadata_for_rag(metadata)
+        output_metadata["start_line"] = start_line
+        output_metadata["end_line"] = end_line
 
-            output_metadata["start_line"] = start_line
-            output_metadata["end_line"] = end_line
+        metadata_json = dumps_metadata(output_metadata, metadata_format)
+        return f"<metadata>\n{metadata_json}\n</metadata>\n{content}"
 
-            metadata_json = json.dumps(output_metadata, ensure_ascii=False, indent=2)
-            formatted = f"<metadata>\n{metadata_json}\n</metadata>\n{content}"
-            result.append(formatted)
+    def _render_chunk_structured(
+        self,
+        chunk: dict[str, Any],
+        debug: bool,
+        metadata_fields: tuple[str, ...] | None = None,
+    ) -> dict[str, Any]:
+        """Render a single chunk as a JSON-ready object (no string formatting)."""
+        metadata = chunk.get("metadata", {})
 
-        return result
+        if debug:
+            output_metadata = metadata.copy()
+        else:
+            output_metadata = self._filter_metadata_for_rag(metadata, metadata_fields)
+
+        return {
+            "content": chunk.get("content", ""),
+            "metadata": output_metadata,
+            "start_line": chunk.get("start_line", 0),
+            "end_line": chunk.get("end_line", 0),
+        }
 
     def _render_without_metadata(self, raw_chunks: list[dict[str, Any]]) -> list[str]:
         """Render without metadata (with embedded overlap).
@@ -276,57 +1541,59 @@ class MigrationAdapter:
             # Graceful fallback on any error
             return chunk.get("content", "")
 
-    def _chunk_to_dict(self, chunk: Any) -> dict[str, Any]:
-        """Convert Chunk object to dictionary."""
+    @staticmethod
+    def _requests_token_count(render_options: RenderOptions | None) -> bool:
+        """Whether a metadata_fields whitelist asks for token_count."""
+        fields = (render_options or DEFAULT_RENDER_OPTIONS).metadata_fields
+        return fields is not None and TOKEN_COUNT_KEY in fields
+
+    def _chunk_to_dict(
+        self,
+        chunk: Any,
+        spans: HierarchySpans | None = None,
+        measure: int | None = None,
+        count_tokens: bool = False,
+    ) -> dict[str, Any]:
+        """Convert Chunk object to dictionary, adding content hash and tokens.
+
+        Internal nodes get their significance measure (non-header chars)
+        stored here, computed from the full text unless selection already
+        measured it (measure). With spans they then get their own content
+        and a source span instead of the subtree text; filtering uses the
+        stored measure, so it is the same in both modes.
+        Tokenizing is the costliest step, so metadata["token_count"] is
+        only set with count_tokens (max_tokens mode, or token_count listed
+        in metadata_fields).
+        """
+        metadata = chunk.metadata.copy() if chunk.metadata else {}
+        content = chunk.content
+        if not metadata.get("is_leaf", True):
+            if measure is None:
+                measure = significant_chars(content)
+            metadata[SIGNIFICANT_CHARS_KEY] = measure
+            if spans is not None:
+                content = spans.to_span_node(chunk, metadata)
+        metadata[CONTENT_HASH_KEY] = content_hash(
+            content, metadata.get("header_path")
+        )
+        if count_tokens:
+            metadata[TOKEN_COUNT_KEY] = self._token_counter.count(content)
         return {
-            "content": chunk.content,
+            "content": content,
             "start_line": chunk.start_line,
             "end_line": chunk.end_line,
-            "metadata": chunk.metadata.copy() if chunk.metadata else {},
+            "metadata": metadata,
         }
 
-    def _filter_metadata_for_rag(self, metadata: dict) -> dict:
-        """Filter metadata to keep only fields useful for RAG search."""
-        excluded_fields = {
-            "avg_line_length",
-            "avg_word_length",
-            "char_count",
-            "line_count",
-            "size_bytes",
-            "word_count",
-            "item_count",
-            "nested_item_count",
-            "unordered_item_count",
-            "ordered_item_count",
-            "max_nesting",
-            "task_item_count",
-            "execution_fallback_level",
-            "execution_fallback_used",
-            "execution_strategy_used",
-            "preamble.char_count",
-            "preamble.line_count",
-            "preamble.has_metadata",
-            "preamble.metadata_fields",
-            "preamble.type",
-            "preamble_type",
-            "preview",
-            "total_chunks",
-        }
+    def _filter_metadata_for_rag(
+        self, metadata: dict, fields: tuple[str, ...] | None = None
+    ) -> dict:
+        """Filter metadata to keep only fields useful for RAG search.
 
-        filtered = {}
-        for key, value in metadata.items():
-            if key in excluded_fields:
-                continue
-
-            if key in {"is_leaf", "is_root"}:
-                continue
-
-            if (key.startswith("is_") or key.startswith("has_")) and not value:
-                continue
-
-            filtered[key] = value
-
-        return filtered
+        Uses a keep/drop plan compiled once per metadata key set (see
+        metadata_projection.py); fields is an optional whitelist.
+        """
+        return self._metadata_projector.project(metadata, fields)
 
 
 # Compatibility alias for legacy tests that import MarkdownChunker
@@ -0,0 +1,132 @@
+"""
+Process-wide registry for migration adapters and chunker configs.
+
+Building a MigrationAdapter re-reads the config defaults snapshot from disk,
+and building a ChunkerConfig re-validates every field. Both are pure
+functions of a handful of tool parameters, so the tool keeps them in bounded
+LRU caches shared across invocations of the plugin process.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class LRUCache(Generic[T]):
+    """Thread-safe bounded LRU cache with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 128) -> None:
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be >= 1, got {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, T] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], T]) -> T:
+        """
+        Return cached value for key, building it with factory on a miss.
+
+        The factory runs outside the lock, so two concurrent misses for the
+        same key may both build a value; the first one stored wins.
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = factory()
+
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        """Return counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class AdapterRegistry:
+    """
+    Caches adapters keyed by leaf_only/span_hierarchy and configs keyed by
+    tool parameters.
+
+    Adapters and configs are treated as immutable once built: callers must
+    not mutate the objects returned from the registry.
+    """
+
+    def __init__(self, max_adapters: int = 4, max_configs: int = 64) -> None:
+        self._adapters: LRUCache[Any] = LRUCache(max_adapters)
+        self._configs: LRUCache[Any] = LRUCache(max_configs)
+
+    def get_adapter(
+        self,
+        leaf_only: bool,
+        factory: Callable[[], T],
+        span_hierarchy: bool = False,
+    ) -> T:
+        """Return the shared adapter for the flags, building it on first use."""
+        return self._adapters.get_or_create(
+            (bool(leaf_only), bool(span_hierarchy)), factory
+        )
+
+    def get_config(
+        self,
+        max_chunk_size: int,
+        chunk_overlap: int,
+        strategy: str,
+        factory: Callable[[], T],
+        max_tokens: int | None = None,
+    ) -> T:
+        """Return the shared config for the given parameters."""
+        key = (max_chunk_size, chunk_overlap, strategy, max_tokens)
+        return self._configs.get_or_create(key, factory)
+
+    def clear(self) -> None:
+        """Drop all cached adapters and configs."""
+        self._adapters.clear()
+        self._configs.clear()
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Return hit/miss counters for both caches."""
+        return {
+            "adapters": self._adapters.stats(),
+            "configs": self._configs.stats(),
+        }
+
+
+# Shared by every tool invocation in this plugin process
+registry = AdapterRegistry()
@@ -0,0 +1,218 @@
+"""
+Process-pool execution for batch chunking.
+
+Chunking is CPU-bound pure Python, so a single plugin process is capped at
+one core by the GIL. BatchExecutor fans batch documents out to a pool of
+pre-warmed worker processes (chunkana imported, config defaults loaded)
+and returns results in submission order.
+
+Worker count is bounded by the plugin memory budget declared in
+manifest.yaml (resource.memory), since every worker holds its own
+interpreter, chunkana and per-document working set.
+"""
+
+import logging
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from env_config import env_int
+
+logger = logging.getLogger(__name__)
+
+ENV_BATCH_WORKERS = "MARKDOWN_CHUNKER_BATCH_WORKERS"
+
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+# Parent process: plugin runtime, input texts and collected results
+PARENT_RESERVE_BYTES = 160 * 1024 * 1024
+# Worker process: interpreter + chunkana + one document's working set
+PER_WORKER_BYTES = 96 * 1024 * 1024
+
+MANIFEST_PATH = Path(__file__).parent / "manifest.yaml"
+
+
+def load_memory_budget(manifest_path: Path = MANIFEST_PATH) -> int:
+    """Read resource.memory from manifest.yaml, falling back to 512MB."""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = yaml.safe_load(f) or {}
+        return int(manifest.get("resource", {}).get("memory", DEFAULT_MEMORY_BUDGET))
+    except (OSError, yaml.YAMLError, TypeError, ValueError):
+        return DEFAULT_MEMORY_BUDGET
+
+
+def max_workers_for_budget(
+    memory_budget: int,
+    cpu_count: int | None = None,
+    per_worker_bytes: int = PER_WORKER_BYTES,
+    reserve_bytes: int = PARENT_RESERVE_BYTES,
+) -> int:
+    """Return the largest worker count fitting both CPUs and memory budget."""
+    cpus = cpu_count or os.cpu_count() or 1
+    by_memory = (memory_budget - reserve_bytes) // per_worker_bytes
+    return max(1, min(cpus, by_memory))
+
+
+def schedule_order(input_texts: list[Any]) -> list[int]:
+    """Return document indices largest first, to avoid straggler tasks."""
+    return sorted(
+        range(len(input_texts)),
+        key=lambda i: len(input_texts[i]) if isinstance(input_texts[i], str) else 0,
+        reverse=True,
+    )
+
+
+# Worker-side state, one adapter per AdapterSettings per worker process
+_worker_adapters: dict[Any, Any] = {}
+
+
+def _get_worker_adapter(settings: Any) -> Any:
+    adapter = _worker_adapters.get(settings)
+    if adapter is None:
+        adapter = settings.build()
+        _worker_adapters[settings] = adapter
+    return adapter
+
+
+def _init_worker() -> None:
+    """Pre-warm worker: import chunkana and load config defaults."""
+    from adapter import AdapterSettings
+
+    _get_worker_adapter(AdapterSettings())
+
+
+def _chunk_in_worker(
+    index: int,
+    input_text: Any,
+    config: Any,
+    settings: Any,
+    include_metadata: bool,
+    enable_hierarchy: bool,
+    debug: bool,
+    render_options: Any,
+    raw: bool = False,
+    max_tokens: int | None = None,
+) -> dict[str, Any]:
+    adapter = _get_worker_adapter(settings)
+    return adapter._run_batch_item(
+        index,
+        input_text,
+        config,
+        include_metadata,
+        enable_hierarchy,
+        debug,
+        render_options,
+        raw,
+        max_tokens,
+    )
+
+
+class BatchExecutor:
+    """Lazily started, reusable process pool for batch chunking."""
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        memory_budget: int | None = None,
+        start_method: str = "spawn",
+    ) -> None:
+        """
+        Args:
+            max_workers: Requested workers, None for one per CPU
+            memory_budget: Plugin memory limit, None to read manifest.yaml
+            start_method: multiprocessing start method ("spawn" is safe
+                under gevent monkey-patching used by dify_plugin)
+        """
+        budget = memory_budget if memory_budget is not None else load_memory_budget()
+        limit = max_workers_for_budget(budget)
+        self.max_workers = min(max_workers, limit) if max_workers else limit
+        self._start_method = start_method
+        self._pool: ProcessPoolExecutor | None = None
+
+    @classmethod
+    def from_env(cls) -> "BatchExecutor | None":
+        """Build executor from MARKDOWN_CHUNKER_BATCH_WORKERS (unset/0: off)."""
+        workers = env_int(ENV_BATCH_WORKERS, 0)
+        if workers <= 0:
+            return None
+        return cls(max_workers=workers)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=get_context(self._start_method),
+                initializer=_init_worker,
+            )
+        return self._pool
+
+    def run_batch(
+        self,
+        input_texts: list[Any],
+        config: Any,
+        settings: Any,
+        include_metadata: bool,
+        enable_hierarchy: bool,
+        debug: bool,
+        render_options: Any = None,
+        raw: bool = False,
+        max_tokens: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Chunk documents in worker processes.
+
+        Workers chunk with adapters built from settings (an
+        adapter.AdapterSettings). Tasks are submitted largest first;
+        results are returned in input order with the same per-document
+        error isolation as MigrationAdapter.run_chunking_batch(). With
+        raw=True, entries hold raw chunk dicts instead of rendered strings.
+        """
+        pool = self._get_pool()
+        futures: dict[int, Future] = {}
+        for index in schedule_order(input_texts):
+            futures[index] = pool.submit(
+                _chunk_in_worker,
+                index,
+                input_texts[index],
+                config,
+                settings,
+                include_metadata,
+                enable_hierarchy,
+                debug,
+                render_options,
+                raw,
+                max_tokens,
+            )
+
+        results = []
+        broken = False
+        for index in range(len(input_texts)):
+            try:
+                results.append(futures[index].result())
+            except Exception as e:
+                # Worker crash (e.g. OOM kill) or unpicklable input
+                broken = broken or isinstance(e, BrokenProcessPool)
+                logger.warning(f"[BatchExecutor] Document {index} failed: {e}")
+                results.append(
+                    {
+                        "index": index,
+                        "chunks": [],
+                        "error": f"Error chunking document: {str(e)}",
+                    }
+                )
+
+        if broken:
+            # A dead worker poisons the pool; start a fresh one next time
+            self.shutdown()
+        return results
+
+    def shutdown(self) -> None:
+        """Stop worker processes; the pool restarts on next use."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,329 @@
+"""
+Content-addressed cache for chunking results.
+
+Keys are a hash of the input text plus the normalized chunker config and
+tool flags, so identical documents submitted with identical settings skip
+chunking entirely. Two tiers:
+
+- memory: bounded by estimated byte size, LRU eviction
+- disk (optional): sqlite file that survives plugin restarts, bounded by
+  serialized byte size, least-recently-accessed eviction
+
+Caching is opt-in: from_env() returns None unless
+MARKDOWN_CHUNKER_CACHE_MAX_BYTES is set.
+
+The disk tier is best-effort: any sqlite or serialization failure is logged
+and treated as a miss, never as a chunking error. Disk I/O runs under the
+disk tier's own lock, so memory-tier lookups never wait for it. Access
+times of disk hits are written in batches, not committed per read.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from env_config import env_int
+
+logger = logging.getLogger(__name__)
+
+ENV_MAX_BYTES = "MARKDOWN_CHUNKER_CACHE_MAX_BYTES"
+ENV_CACHE_DIR = "MARKDOWN_CHUNKER_CACHE_DIR"
+ENV_DISK_MAX_BYTES = "MARKDOWN_CHUNKER_CACHE_DISK_MAX_BYTES"
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_MAX_BYTES = 512 * 1024 * 1024
+# Disk hits whose access time is buffered before it is written
+TOUCH_BATCH = 64
+
+
+def estimate_size(value: Any) -> int:
+    """Estimate in-memory size of a JSON-like value in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k) + estimate_size(v)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+def config_fingerprint(config: Any) -> str:
+    """Return a stable string form of a chunker config."""
+    if hasattr(config, "to_dict"):
+        data = config.to_dict()
+    elif dataclasses.is_dataclass(config):
+        data = dataclasses.asdict(config)
+    else:
+        data = vars(config)
+    return json.dumps(data, sort_keys=True, default=str)
+
+
+def make_cache_key(input_text: str, config: Any, **flags: Any) -> str:
+    """
+    Build a content-addressed key for a chunking request.
+
+    Args:
+        input_text: Markdown document
+        config: ChunkerConfig used for chunking
+        **flags: Tool flags affecting the output (include_metadata, ...)
+
+    Returns:
+        Hex digest identifying the request
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(input_text.encode("utf-8", "surrogatepass"))
+    h.update(b"\0")
+    h.update(config_fingerprint(config).encode("utf-8"))
+    h.update(b"\0")
+    h.update(json.dumps(flags, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+class _DiskTier:
+    """Sqlite-backed key/value store bounded by total payload bytes.
+
+    The payload total is tracked in memory and re-read from the file only
+    when it exceeds the budget (other processes may share the file).
+    """
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}  # key -> access time not yet written
+        self._conn = sqlite3.connect(str(path), timeout=5, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS chunks_accessed ON chunks(accessed)"
+        )
+        self._conn.commit()
+        self._total = self._stored_bytes()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM chunks WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_BATCH:
+                self._write_touched()
+                self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        blob = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size FROM chunks WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chunks (key, value, size, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            self._touched.pop(key, None)
+            self._total += len(blob) - (row[0] if row else 0)
+            self._write_touched()
+            if self._total > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _stored_bytes(self) -> int:
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM chunks"
+        ).fetchone()
+        return total
+
+    def _write_touched(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE chunks SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self) -> None:
+        """Delete least recently accessed entries until within budget."""
+        self._total = self._stored_bytes()
+        excess = self._total - self.max_bytes
+        if excess <= 0:
+            return
+        # Walks the accessed index only as far as needed
+        rows = self._conn.execute("SELECT key, size FROM chunks ORDER BY accessed ASC")
+        evicted = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            evicted.append((key,))
+            excess -= size
+            self._total -= size
+        rows.close()
+        self._conn.executemany("DELETE FROM chunks WHERE key = ?", evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.commit()
+            self._total = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+class ChunkCache:
+    """Two-tier (memory + optional sqlite) cache for chunking results."""
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        disk_path: str | Path | None = None,
+        disk_max_bytes: int = DEFAULT_DISK_MAX_BYTES,
+    ) -> None:
+        """
+        Args:
+            max_bytes: Memory tier budget (estimated bytes)
+            disk_path: Sqlite file for the disk tier, None to disable
+            disk_max_bytes: Disk tier budget (serialized bytes)
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self._disk: _DiskTier | None = None
+
+        if disk_path is not None:
+            try:
+                self._disk = _DiskTier(Path(disk_path), disk_max_bytes)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"[ChunkCache] Disk tier disabled: {e}")
+
+    @classmethod
+    def from_env(cls) -> "ChunkCache | None":
+        """
+        Build cache from environment variables.
+
+        MARKDOWN_CHUNKER_CACHE_MAX_BYTES: memory budget; unset or 0
+            disables caching (opt-in)
+        MARKDOWN_CHUNKER_CACHE_DIR: directory for the sqlite disk tier
+        MARKDOWN_CHUNKER_CACHE_DISK_MAX_BYTES: disk tier budget
+
+        Invalid numbers are logged and replaced by their default.
+        """
+        max_bytes = env_int(ENV_MAX_BYTES, 0)
+        if max_bytes <= 0:
+            return None
+
+        cache_dir = os.environ.get(ENV_CACHE_DIR)
+        disk_path = Path(cache_dir) / "chunk_cache.sqlite3" if cache_dir else None
+        disk_max_bytes = env_int(ENV_DISK_MAX_BYTES, DEFAULT_DISK_MAX_BYTES)
+        return cls(max_bytes, disk_path, disk_max_bytes)
+
+    def get(self, key: str) -> Any | None:
+        """Return cached value or None on miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if self._disk is None:
+                self.misses += 1
+                return None
+
+        # Disk lookup without holding the memory lock
+        try:
+            value = self._disk.get(key)
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"[ChunkCache] Disk read failed: {e}")
+            value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, value)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store value in memory and, if enabled, on disk."""
+        with self._lock:
+            self._store(key, value)
+        if self._disk is not None:
+            try:
+                self._disk.put(key, value)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"[ChunkCache] Disk write failed: {e}")
+
+    def _store(self, key: str, value: Any) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._current_bytes -= old[1]
+
+        self._entries[key] = (value, size)
+        self._current_bytes += size
+
+        while self._current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._current_bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries from both tiers and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        """Return counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_enabled": self._disk is not None,
+                "hit_rate": (
+                    (self.hits + self.disk_hits) / lookups if lookups else 0.0
+                ),
+            }
@@ -0,0 +1,226 @@
+"""
+Cross-document duplicate chunk detection for batches.
+
+Documentation sets repeat boilerplate (license footers, "Getting Started"
+sections, README blocks copied between projects). When a batch is
+deduplicated, every chunk is compared with the chunks before it, across
+all documents of the batch in input order:
+- exact duplicates: same normalized content (content_hash.normalize_content),
+  regardless of header_path
+- near duplicates: estimated Jaccard similarity of word shingles at or
+  above the threshold, found with MinHash signatures and LSH banding, so
+  the cost stays linear in the number of chunks
+
+The first occurrence is canonical. In "annotate" mode a duplicate gets
+metadata["duplicate_of"] = {"document", "chunk", "similarity"} pointing
+at it (document index in the batch, chunk position in that document's
+list); in "drop" mode duplicates are removed from the output.
+
+Shingle hashes are stdlib BLAKE2b, so results are deterministic across
+processes and restarts.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any
+
+from content_hash import content_hash, normalize_content
+
+DEDUP_OFF = "off"
+DEDUP_ANNOTATE = "annotate"
+DEDUP_DROP = "drop"
+DEDUP_MODES = (DEDUP_OFF, DEDUP_ANNOTATE, DEDUP_DROP)
+
+DUPLICATE_OF_KEY = "duplicate_of"
+
+# 64 MinHash values in 16 LSH bands of 4: pairs with Jaccard similarity
+# of about 0.5 and above become candidates, the threshold is then checked
+# on the full signature
+NUM_PERMUTATIONS = 64
+BAND_ROWS = 4
+
+# Densified values are offset past every real value (hash // 64 < 2**58),
+# so they never equal a real minimum
+_DENSIFY_OFFSET = 1 << 58
+
+
+@dataclass(frozen=True)
+class DedupConfig:
+    """Duplicate detection settings for one batch."""
+
+    mode: str = DEDUP_ANNOTATE
+    # Minimum estimated Jaccard similarity of word shingles
+    threshold: float = 0.85
+    # Words per shingle
+    shingle_size: int = 5
+
+    def __post_init__(self) -> None:
+        if self.mode not in DEDUP_MODES:
+            raise ValueError(
+                f"dedup mode must be one of {DEDUP_MODES}, got {self.mode!r}"
+            )
+        if not 0.0 < self.threshold <= 1.0:
+            raise ValueError(
+                f"dedup threshold must be in (0, 1], got {self.threshold}"
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != DEDUP_OFF
+
+
+def shingle_hashes(content: str, shingle_size: int) -> set[int]:
+    """64-bit hashes of the word shingles of normalized, lowercased content."""
+    words = normalize_content(content).lower().split()
+    if len(words) <= shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [
+            " ".join(words[i : i + shingle_size])
+            for i in range(len(words) - shingle_size + 1)
+        ]
+    return {
+        int.from_bytes(
+            hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little"
+        )
+        for s in shingles
+    }
+
+
+def minhash_signature(hashes: set[int]) -> tuple[int, ...]:
+    """
+    MinHash signature of a non-empty set of shingle hashes.
+
+    One-permutation hashing: each hash goes to one of NUM_PERMUTATIONS
+    bins by its low bits and every bin keeps its minimum, a single pass
+    instead of one pass per permutation. Empty bins (chunks with few
+    shingles) take the value of the next non-empty bin plus its distance
+    (rotation densification), which keeps the similarity estimate unbiased.
+    """
+    bins: list[int | None] = [None] * NUM_PERMUTATIONS
+    for h in hashes:
+        index, value = h % NUM_PERMUTATIONS, h // NUM_PERMUTATIONS
+        current = bins[index]
+        if current is None or value < current:
+            bins[index] = value
+
+    signature = list(bins)
+    following, distance = None, 0
+    # Two passes from the end so empty bins at the end wrap around
+    for i in reversed(range(2 * NUM_PERMUTATIONS)):
+        value = bins[i % NUM_PERMUTATIONS]
+        if value is not None:
+            following, distance = value, 0
+            continue
+        distance += 1
+        if i < NUM_PERMUTATIONS and following is not None:
+            signature[i] = following + distance * _DENSIFY_OFFSET
+    return tuple(signature)
+
+
+def estimate_similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity: share of equal signature positions."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class DuplicateIndex:
+    """Canonical chunks seen so far, searchable by exact and MinHash keys."""
+
+    def __init__(self, config: DedupConfig) -> None:
+        self.config = config
+        self._exact: dict[str, dict[str, Any]] = {}
+        self._buckets: dict[tuple[int, tuple[int, ...]], list[int]] = {}
+        self._canonical: list[tuple[dict[str, Any], tuple[int, ...]]] = []
+
+    def add(self, ref: dict[str, Any], content: str) -> dict[str, Any] | None:
+        """
+        Look up a chunk; register it as canonical if it is not a duplicate.
+
+        Args:
+            ref: {"document": int, "chunk": int} of this chunk
+
+        Returns:
+            duplicate_of reference (with similarity), or None if canonical
+        """
+        exact_key = content_hash(content)
+        canonical = self._exact.get(exact_key)
+        if canonical is not None:
+            return dict(canonical)
+
+        signature = minhash_signature(
+            shingle_hashes(content, self.config.shingle_size)
+        )
+        bands = [
+            (start, signature[start : start + BAND_ROWS])
+            for start in range(0, NUM_PERMUTATIONS, BAND_ROWS)
+        ]
+
+        best, best_similarity = None, 0.0
+        seen: set[int] = set()
+        for band in bands:
+            for candidate in self._buckets.get(band, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                similarity = estimate_similarity(
+                    signature, self._canonical[candidate][1]
+                )
+                if similarity > best_similarity:
+                    best, best_similarity = candidate, similarity
+
+        if best is not None and best_similarity >= self.config.threshold:
+            duplicate_of = {**self._canonical[best][0], "similarity": best_similarity}
+            # Later identical copies point at the same canonical chunk
+            self._exact[exact_key] = duplicate_of
+            return dict(duplicate_of)
+
+        self._exact[exact_key] = {**ref, "similarity": 1.0}
+        position = len(self._canonical)
+        self._canonical.append((dict(ref), signature))
+        for band in bands:
+            self._buckets.setdefault(band, []).append(position)
+        return None
+
+
+def deduplicate_documents(
+    documents: list[list[dict[str, Any]] | None], config: DedupConfig
+) -> tuple[list[list[dict[str, Any]] | None], int]:
+    """
+    Annotate or drop duplicate chunks across the documents of a batch.
+
+    Input chunks are never modified (they may be shared with the result
+    cache); annotated chunks are copies.
+
+    Args:
+        documents: Raw chunk lists in batch order; None for failed documents
+        config: Dedup settings (mode must not be "off")
+
+    Returns:
+        (documents with duplicates annotated or dropped, duplicate count)
+    """
+    index = DuplicateIndex(config)
+    result: list[list[dict[str, Any]] | None] = []
+    duplicates = 0
+    for document, chunks in enumerate(documents):
+        if chunks is None:
+            result.append(None)
+            continue
+
+        kept = []
+        for position, chunk in enumerate(chunks):
+            duplicate_of = index.add(
+                {"document": document, "chunk": position}, chunk.get("content", "")
+            )
+            if duplicate_of is None:
+                kept.append(chunk)
+                continue
+
+            duplicates += 1
+            if config.mode == DEDUP_ANNOTATE:
+                metadata = {
+                    **chunk.get("metadata", {}),
+                    DUPLICATE_OF_KEY: duplicate_of,
+                }
+                kept.append({**chunk, "metadata": metadata})
+        result.append(kept)
+    return result, duplicates
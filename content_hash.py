@@ -0,0 +1,40 @@
+"""
+Stable content identity for chunks.
+
+Every chunk carries metadata["content_hash"]: BLAKE2b-128 of its
+normalized content plus header_path. Unlike hierarchical chunk_id, it
+does not depend on the chunk's position, so a vector store can skip
+re-embedding chunks whose hash it already has, across re-ingestions and
+plugin restarts.
+
+Normalization ignores differences that do not change what is embedded:
+line endings, trailing whitespace on lines and leading/trailing blank
+lines. The hash is stdlib-only on purpose, so it is identical in every
+deployment.
+"""
+
+import hashlib
+from typing import Any
+
+CONTENT_HASH_KEY = "content_hash"
+
+
+def normalize_content(content: str) -> str:
+    """Canonical form of chunk content used for hashing."""
+    lines = content.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def _header_path_text(header_path: Any) -> str:
+    if isinstance(header_path, (list, tuple)):
+        return "/" + "/".join(str(part) for part in header_path) if header_path else ""
+    return str(header_path or "")
+
+
+def content_hash(content: str, header_path: Any = "") -> str:
+    """Return the 32-character hex content hash of a chunk."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(_header_path_text(header_path).encode("utf-8"))
+    h.update(b"\0")
+    h.update(normalize_content(content).encode("utf-8"))
+    return h.hexdigest()
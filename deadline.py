@@ -0,0 +1,133 @@
+"""
+Request deadlines and graceful degradation for the chunking pipeline.
+
+main.py kills a request after MAX_REQUEST_TIMEOUT (300s) and the caller
+then gets nothing. With a Deadline, MigrationAdapter instead:
+- projects the chunking time from the input size before starting and,
+  if it does not fit the remaining budget, chunks with a cheaper config
+  (fallback strategy, no invariant validation)
+- stops emitting chunks once the deadline has passed, returning the
+  chunks finished so far. The library call itself cannot be interrupted,
+  so this only bounds the work after it (conversion, filtering,
+  rendering) and, in windowed mode, the windows not yet chunked
+
+Either way every returned chunk carries metadata["degraded"], a list of
+the reasons (DEGRADE_* constants). Output for requests that were not
+degraded is unchanged.
+
+Deadlines are opt-in: they only apply when MARKDOWN_CHUNKER_DEADLINE_SECONDS
+is set.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+
+from env_config import env_float
+
+ENV_DEADLINE = "MARKDOWN_CHUNKER_DEADLINE_SECONDS"
+
+# Suggested budget: below main.py MAX_REQUEST_TIMEOUT, leaving time to
+# send the result
+RECOMMENDED_DEADLINE_SECONDS = 270.0
+
+# Degradation reasons reported in chunk metadata
+DEGRADE_FALLBACK_STRATEGY = "fallback_strategy"
+DEGRADE_SKIP_INVARIANTS = "skip_invariants"
+DEGRADE_TRUNCATED = "truncated"
+
+# Projection before any request has been observed (seconds per MB)
+DEFAULT_SECONDS_PER_MB = {"flat": 2.0, "hierarchical": 4.0}
+# Fixed per-call cost before any request has been observed (seconds)
+DEFAULT_OVERHEAD_SECONDS = 0.0
+
+# Inputs below this size are dominated by the per-call overhead; they
+# update the overhead, larger inputs update the per-MB rate
+MIN_RATE_CHARS = 100_000
+
+# Projections are multiplied by this; pathological inputs are slower
+# than the average request the estimate is learned from
+SAFETY_FACTOR = 2.0
+
+
+def deadline_seconds_from_env() -> float | None:
+    """Budget from MARKDOWN_CHUNKER_DEADLINE_SECONDS (unset or 0: no deadline)."""
+    seconds = env_float(ENV_DEADLINE, 0.0)
+    return seconds if seconds > 0 else None
+
+
+class Deadline:
+    """Time budget of one request, plus the degradations applied to it."""
+
+    def __init__(
+        self, seconds: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.seconds = seconds
+        self._clock = clock
+        self._expires_at = clock() + seconds
+        self.reasons: list[str] = []
+
+    def remaining(self) -> float:
+        """Seconds left (negative once expired)."""
+        return self._expires_at - self._clock()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def degrade(self, reason: str) -> None:
+        """Record a degradation reason (once)."""
+        if reason not in self.reasons:
+            self.reasons.append(reason)
+
+    @property
+    def degraded(self) -> bool:
+        return bool(self.reasons)
+
+
+class ThroughputEstimator:
+    """
+    Learns chunking time as overhead + seconds per MB from completed runs.
+
+    Small inputs mostly measure the fixed per-call cost; learning a pure
+    per-MB rate from them would inflate projections for large documents.
+    Runs below MIN_RATE_CHARS therefore only update the overhead, larger
+    runs only the rate (net of the current overhead).
+    """
+
+    def __init__(self, smoothing: float = 0.2) -> None:
+        """
+        Args:
+            smoothing: Weight of each new observation in the moving averages
+        """
+        self.smoothing = smoothing
+        self._seconds_per_mb = dict(DEFAULT_SECONDS_PER_MB)
+        self._overhead: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, mode: str, input_chars: int, seconds: float) -> None:
+        """Fold one full (non-degraded) run into the estimate."""
+        if input_chars <= 0:
+            return
+        mb = input_chars / 1_000_000
+        with self._lock:
+            overhead = self._overhead.get(mode, DEFAULT_OVERHEAD_SECONDS)
+            rate = self._seconds_per_mb.get(mode, DEFAULT_SECONDS_PER_MB["flat"])
+            if input_chars < MIN_RATE_CHARS:
+                measured = max(seconds - rate * mb, 0.0)
+                self._overhead[mode] = (
+                    overhead + (measured - overhead) * self.smoothing
+                )
+            else:
+                measured = max(seconds - overhead, 0.0) / mb
+                self._seconds_per_mb[mode] = rate + (measured - rate) * self.smoothing
+
+    def project(self, mode: str, input_chars: int) -> float:
+        """Projected seconds for a full run, including the safety factor."""
+        with self._lock:
+            overhead = self._overhead.get(mode, DEFAULT_OVERHEAD_SECONDS)
+            rate = self._seconds_per_mb.get(mode, DEFAULT_SECONDS_PER_MB["flat"])
+        return (overhead + rate * input_chars / 1_000_000) * SAFETY_FACTOR
+
+
+# Shared by all adapters in the process
+throughput_estimator = ThroughputEstimator()
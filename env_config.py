@@ -0,0 +1,36 @@
+"""
+Numeric plugin settings from environment variables.
+
+Settings are read when the tool module is imported, so an invalid value
+must not stop the plugin from loading: it is logged and the default is
+used instead.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def env_int(name: str, default: int) -> int:
+    """Integer value of env var name; default if unset, empty or invalid."""
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"[EnvConfig] Invalid {name}={value!r}, using {default}")
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """Float value of env var name; default if unset, empty or invalid."""
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"[EnvConfig] Invalid {name}={value!r}, using {default}")
+        return default
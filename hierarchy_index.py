@@ -0,0 +1,171 @@
+"""
+Navigation index for hierarchical chunking results.
+
+Hierarchical chunks carry parent_id, children_ids and sibling_ids in
+their metadata, so "expand to parent" or "fetch siblings" means scanning
+the result for matching ids. NavigationIndex answers these by position
+in constant time (plus the size of the answer) from a few flat arrays:
+
+- ids: chunk_id per position
+- parents: position of the parent, -1 for top-level nodes
+- child_offsets / children: children of position i are
+  children[child_offsets[i]:child_offsets[i + 1]] (CSR layout)
+
+Positions 0..size-1 are the returned chunks in output order. A parent
+that is not part of the output (the root outside debug mode, internal
+nodes dropped by leaf_only) gets a placeholder position >= size with
+its id, so its children are still siblings of each other.
+
+The index is built while the chunks stream past (NavigationIndexBuilder),
+optionally dropping the now redundant children_ids/sibling_ids lists from
+chunk metadata. to_dict() is plain JSON, so it can be cached and sent
+with the chunks.
+"""
+
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+CHUNK_ID_KEY = "chunk_id"
+PARENT_ID_KEY = "parent_id"
+# Per-chunk id lists the index replaces
+ID_LIST_KEYS = ("children_ids", "sibling_ids")
+
+
+class NavigationIndex:
+    """Constant-time parent/children/siblings lookup by chunk position."""
+
+    def __init__(
+        self,
+        size: int,
+        ids: list[str | None],
+        parents: list[int],
+        child_offsets: list[int],
+        children: list[int],
+    ) -> None:
+        """
+        Args:
+            size: Number of chunks; later positions are placeholders
+            ids: chunk_id per position
+            parents: Parent position per position, -1 if none
+            child_offsets: CSR row offsets into children (len(ids) + 1)
+            children: Child positions, grouped by parent in output order
+        """
+        self.size = size
+        self.ids = ids
+        self.parents = parents
+        self.child_offsets = child_offsets
+        self.children = children
+        self._positions = {
+            chunk_id: position
+            for position, chunk_id in enumerate(ids)
+            if chunk_id is not None
+        }
+        self._top_level = [p for p in range(size) if parents[p] < 0]
+
+    def position(self, chunk_id: str) -> int | None:
+        """Position of a chunk_id (>= size for placeholders), or None."""
+        return self._positions.get(chunk_id)
+
+    def parent(self, position: int) -> int | None:
+        """Parent position, or None for top-level nodes."""
+        parent = self.parents[position]
+        return parent if parent >= 0 else None
+
+    def children_of(self, position: int) -> list[int]:
+        """Child positions in output order."""
+        return self.children[
+            self.child_offsets[position] : self.child_offsets[position + 1]
+        ]
+
+    def siblings(self, position: int) -> list[int]:
+        """Positions sharing the parent of position, without position itself."""
+        parent = self.parents[position]
+        if parent < 0:
+            group = self._top_level
+        else:
+            group = self.children_of(parent)
+        return [p for p in group if p != position]
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-ready form; inverse of from_dict()."""
+        return {
+            "size": self.size,
+            "ids": self.ids,
+            "parents": self.parents,
+            "child_offsets": self.child_offsets,
+            "children": self.children,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "NavigationIndex":
+        return cls(
+            data["size"],
+            data["ids"],
+            data["parents"],
+            data["child_offsets"],
+            data["children"],
+        )
+
+
+class NavigationIndexBuilder:
+    """Records chunk ids as chunks stream through, then builds the index."""
+
+    def __init__(self, strip_id_lists: bool = False) -> None:
+        """
+        Args:
+            strip_id_lists: Remove children_ids/sibling_ids from the
+                metadata of passing chunks (modified in place, so pass
+                rendered chunks, not shared raw chunks)
+        """
+        self.strip_id_lists = strip_id_lists
+        self._ids: list[str | None] = []
+        self._parent_ids: list[str | None] = []
+
+    def observe(self, chunks: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        """Pass chunks through, recording their chunk_id and parent_id."""
+        for chunk in chunks:
+            metadata = chunk.get("metadata", {})
+            self._ids.append(metadata.get(CHUNK_ID_KEY))
+            self._parent_ids.append(metadata.get(PARENT_ID_KEY))
+            if self.strip_id_lists:
+                for key in ID_LIST_KEYS:
+                    metadata.pop(key, None)
+            yield chunk
+
+    def build(self) -> NavigationIndex:
+        """Index of the chunks observed so far."""
+        size = len(self._ids)
+        ids = list(self._ids)
+        positions = {
+            chunk_id: position
+            for position, chunk_id in enumerate(ids)
+            if chunk_id is not None
+        }
+
+        parents = []
+        for parent_id in self._parent_ids:
+            if parent_id is None:
+                parents.append(-1)
+                continue
+            if parent_id not in positions:
+                # Parent not in the output: placeholder position
+                positions[parent_id] = len(ids)
+                ids.append(parent_id)
+            parents.append(positions[parent_id])
+        parents.extend([-1] * (len(ids) - size))
+
+        # Counting sort of children by parent keeps output order per parent
+        counts = [0] * (len(ids) + 1)
+        for parent in parents:
+            if parent >= 0:
+                counts[parent + 1] += 1
+        for i in range(len(ids)):
+            counts[i + 1] += counts[i]
+        child_offsets = list(counts)
+        children = [0] * child_offsets[-1]
+        for position, parent in enumerate(parents):
+            if parent >= 0:
+                children[counts[parent]] = position
+                counts[parent] += 1
+
+        return NavigationIndex(size, ids, parents, child_offsets, children)
@@ -0,0 +1,109 @@
+"""
+Span-based content for internal hierarchy nodes.
+
+In hierarchical output the root and internal nodes hold the full text of
+their subtrees, so every byte of a document is stored once per depth
+level (O(depth * n) for the raw chunks, the cache and the response). In
+span mode an internal node instead carries:
+- content: its own direct text only, i.e. its lines not covered by any
+  child (typically the section header and intro paragraph)
+- metadata["span"]: {start_line, end_line, start_char, end_char} of the
+  whole subtree in the source text
+- metadata["content_scope"]: "own"
+
+The full subtree text is materialized on demand from the source with
+materialize_subtree(). Leaves are unchanged. The library still builds
+the full-text nodes; span mode bounds what the plugin keeps and returns.
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+from stream_input import iter_text_lines
+
+SPAN_KEY = "span"
+CONTENT_SCOPE_KEY = "content_scope"
+CONTENT_SCOPE_OWN = "own"
+
+
+class HierarchySpans:
+    """Line offsets of a source document plus the child ranges of its nodes."""
+
+    def __init__(self, source: str, nodes: Iterable[Any]) -> None:
+        """
+        Args:
+            source: The chunked Markdown text
+            nodes: All library hierarchy nodes (result.chunks), used to
+                find the line ranges of every node's children
+        """
+        # Lines are sliced from the source on demand, not kept as copies
+        self._source = source
+        self._offsets = [0]
+        for line in iter_text_lines(source):
+            self._offsets.append(self._offsets[-1] + len(line))
+        self._line_count = len(self._offsets) - 1
+
+        self._child_ranges: dict[Any, list[tuple[int, int]]] = {}
+        for node in nodes:
+            parent_id = (node.metadata or {}).get("parent_id")
+            if parent_id is not None:
+                self._child_ranges.setdefault(parent_id, []).append(
+                    (node.start_line, node.end_line)
+                )
+
+    def span(self, start_line: int, end_line: int) -> dict[str, int]:
+        """Line and character span of 1-based inclusive source lines."""
+        start = min(max(start_line, 1), self._line_count + 1)
+        end = min(max(end_line, start - 1), self._line_count)
+        return {
+            "start_line": start_line,
+            "end_line": end_line,
+            "start_char": self._offsets[start - 1],
+            "end_char": self._offsets[end],
+        }
+
+    def own_content(self, chunk_id: Any, start_line: int, end_line: int) -> str:
+        """Text of the node's lines that no child covers."""
+        covered = sorted(self._child_ranges.get(chunk_id, ()))
+        parts = []
+        line = start_line
+        for child_start, child_end in covered:
+            stop = min(child_start - 1, end_line)
+            if stop >= line:
+                parts.append(self._slice_lines(line, stop))
+            line = max(line, child_end + 1)
+        if line <= end_line:
+            parts.append(self._slice_lines(line, end_line))
+        return "".join(parts).strip()
+
+    def _slice_lines(self, start_line: int, end_line: int) -> str:
+        """Source text of 1-based inclusive lines, clamped to the source."""
+        start = min(max(start_line, 1), self._line_count + 1)
+        end = min(max(end_line, start - 1), self._line_count)
+        return self._source[self._offsets[start - 1] : self._offsets[end]]
+
+    def to_span_node(self, chunk: Any, metadata: dict[str, Any]) -> str:
+        """
+        Own content of a library internal node; adds span fields.
+
+        Args:
+            chunk: Library chunk (content is not read)
+            metadata: The chunk's copied metadata, updated in place
+
+        Returns:
+            The node's own direct content
+        """
+        metadata[SPAN_KEY] = self.span(chunk.start_line, chunk.end_line)
+        metadata[CONTENT_SCOPE_KEY] = CONTENT_SCOPE_OWN
+        return self.own_content(
+            metadata.get("chunk_id"), chunk.start_line, chunk.end_line
+        )
+
+
+def materialize_subtree(chunk: dict[str, Any], source: str) -> str:
+    """Full subtree text of a chunk; its content if it is not a span node."""
+    metadata = chunk.get("metadata", {})
+    span = metadata.get(SPAN_KEY)
+    if metadata.get(CONTENT_SCOPE_KEY) != CONTENT_SCOPE_OWN or not span:
+        return chunk.get("content", "")
+    return source[span["start_char"] : span["end_char"]].strip()
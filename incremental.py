@@ -0,0 +1,359 @@
+"""
+Incremental re-chunking of edited documents.
+
+Given the previous text, its chunks and the new text, only the parts of
+the document touched by the edit are chunked again; every other chunk is
+reused verbatim (with line numbers shifted).
+
+A re-chunked region always:
+- starts at a header line outside code fences that also starts a chunk
+  (or at the document start) and ends before such a line (or at the end)
+- spans whole sibling sections, so every chunk inside shares the same
+  ancestor headers and header_path can be completed with a fixed prefix
+- reproduces its first and last previous chunk (content and header_path),
+  otherwise it grows by one boundary on that side. Chunks outside the
+  region therefore keep valid previous_content/next_content overlap.
+"""
+
+import bisect
+import difflib
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from stream_input import iter_text_lines, scan_headers
+
+# Chunks a piece of text into {content, metadata, start_line, end_line}
+# dicts with line numbers relative to that piece
+ChunkText = Callable[[str], list[dict[str, Any]]]
+
+Opcode = tuple[str, int, int, int, int]
+
+
+@dataclass
+class IncrementalResult:
+    """Chunks of the new text and how they relate to the previous chunks."""
+
+    chunks: list[dict[str, Any]]
+    changed: list[int]  # indices into chunks whose content must be re-embedded
+    reused: dict[int, int]  # new index -> previous index with the same content
+    removed: list[int]  # previous indices without a counterpart
+    rechunked_lines: int  # lines of the new text that were chunked again
+
+
+def diff_opcodes(old_lines: list[str], new_lines: list[str]) -> list[Opcode]:
+    """Line-level diff opcodes; the common prefix and suffix are not diffed."""
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+
+    old_end, new_end = len(old_lines) - suffix, len(new_lines) - suffix
+    matcher = difflib.SequenceMatcher(
+        None, old_lines[prefix:old_end], new_lines[prefix:new_end], autojunk=False
+    )
+    opcodes: list[Opcode] = []
+    if prefix:
+        opcodes.append(("equal", 0, prefix, 0, prefix))
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        opcodes.append((tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix))
+    if suffix:
+        opcodes.append(("equal", old_end, len(old_lines), new_end, len(new_lines)))
+    return opcodes
+
+
+def line_mapper(opcodes: list[Opcode]) -> Callable[[int], int]:
+    """
+    Return a function mapping a previous line index to the new text.
+
+    Lines inserted before an index map to the first inserted line, so a
+    region starting there includes them. Only exact for lines of "equal"
+    blocks and the first line of changed blocks, which holds for every
+    region boundary.
+    """
+    ends = [op[2] for op in opcodes]
+    old_size, new_size = opcodes[-1][2], opcodes[-1][4]
+
+    def map_line(index: int) -> int:
+        if index >= old_size:
+            return new_size
+        pos = bisect.bisect_right(ends, index)
+        if pos > 0 and opcodes[pos - 1][0] == "insert" and ends[pos - 1] == index:
+            return opcodes[pos - 1][3]
+        tag, i1, _, j1, _ = opcodes[pos]
+        return j1 + (index - i1) if tag == "equal" else j1
+
+    return map_line
+
+
+class _RegionPlanner:
+    """Expands dirty line ranges of the previous text to re-chunkable regions."""
+
+    def __init__(self, lines: list[str], chunks: list[dict[str, Any]]) -> None:
+        self.size = len(lines)
+        self.headers = scan_headers(lines)
+        self.header_lines = sorted(self.headers)
+        self.starts = [chunk["start_line"] - 1 for chunk in chunks]
+        # Header lines that start a chunk, plus the document start
+        self.boundaries = sorted(
+            {0} | {start for start in self.starts if start in self.headers}
+        )
+
+    def expand(self, a: int, b: int) -> tuple[int, int]:
+        """Smallest region containing [a, b) that follows the module rules."""
+        while True:
+            previous = (a, b)
+
+            # Whole chunks; a region ends at the next chunk start (gaps of
+            # blank lines between chunks belong to the region)
+            k = bisect.bisect_right(self.starts, a) - 1
+            a = self.starts[k] if k >= 0 else 0
+            k = bisect.bisect_right(self.starts, b - 1)
+            b = self.starts[k] if k < len(self.starts) else self.size
+
+            # Header boundaries
+            a = self.boundaries[bisect.bisect_right(self.boundaries, a) - 1]
+            k = bisect.bisect_left(self.boundaries, b)
+            b = self.boundaries[k] if k < len(self.boundaries) else self.size
+
+            # Whole sibling sections: a header inside that is shallower than
+            # the first one moves the start to their common ancestor
+            if a > 0:
+                lo = bisect.bisect_right(self.header_lines, a)
+                hi = bisect.bisect_left(self.header_lines, b)
+                inner = [self.headers[i][0] for i in self.header_lines[lo:hi]]
+                if inner and min(inner) < self.headers[a][0]:
+                    a = self._ancestor(a, min(inner))
+
+            if (a, b) == previous:
+                return a, b
+
+    def _ancestor(self, index: int, level: int) -> int:
+        pos = bisect.bisect_left(self.header_lines, index)
+        for i in reversed(self.header_lines[:pos]):
+            if self.headers[i][0] <= level:
+                return i
+        return 0
+
+    def normalize(self, ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """Expand ranges and merge overlapping ones, until stable."""
+        regions = sorted(self.expand(a, b) for a, b in ranges)
+        while True:
+            merged: list[tuple[int, int]] = []
+            for a, b in regions:
+                if merged and a < merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(b, merged[-1][1]))
+                else:
+                    merged.append((a, b))
+            expanded = sorted(self.expand(a, b) for a, b in merged)
+            if expanded == regions:
+                return regions
+            regions = expanded
+
+
+def _chunk_key(chunk: dict[str, Any]) -> tuple[Any, Any]:
+    return chunk.get("content"), chunk.get("metadata", {}).get("header_path")
+
+
+def _shifted(chunk: dict[str, Any], start_line: int) -> dict[str, Any]:
+    """Copy of chunk moved to start_line (the caller's dicts are not modified)."""
+    return {
+        **chunk,
+        "start_line": start_line,
+        "end_line": start_line + chunk["end_line"] - chunk["start_line"],
+        "metadata": dict(chunk.get("metadata", {})),
+    }
+
+
+def rechunk(
+    previous_text: str,
+    previous_chunks: list[dict[str, Any]],
+    new_text: str,
+    chunk_text: ChunkText,
+) -> IncrementalResult:
+    """
+    Re-chunk only the regions of new_text affected by the edit.
+
+    Args:
+        previous_text: Document text previous_chunks were produced from
+        previous_chunks: Its flat chunks ({content, metadata, start_line,
+            end_line}, 1-based inclusive line numbers)
+        new_text: Edited document text
+        chunk_text: Chunks a piece of text (see ChunkText)
+
+    Returns:
+        IncrementalResult; metadata chunk_index (and total_chunks, when
+        present) is renumbered across the whole result
+    """
+    old_lines = list(iter_text_lines(previous_text))
+    new_lines = list(iter_text_lines(new_text))
+    previous_chunks = sorted(previous_chunks, key=lambda c: c["start_line"])
+
+    if not previous_chunks or not old_lines or not new_lines:
+        chunks = chunk_text(new_text) if new_lines else []
+        return _result(chunks, {}, len(previous_chunks), len(new_lines))
+
+    opcodes = diff_opcodes(old_lines, new_lines)
+    dirty = []
+    for tag, i1, i2, _, _ in opcodes:
+        if tag == "insert":
+            # Include both neighbours so the insert lies inside the region
+            dirty.append((max(i1 - 1, 0), min(i1 + 1, len(old_lines))))
+        elif tag != "equal":
+            dirty.append((i1, i2))
+    if not dirty:
+        unchanged = [_shifted(c, c["start_line"]) for c in previous_chunks]
+        return _result(unchanged, {i: i for i in range(len(unchanged))}, 0, 0)
+
+    planner = _RegionPlanner(old_lines, previous_chunks)
+    map_line = line_mapper(opcodes)
+    new_headers = scan_headers(new_lines)
+    starts = [chunk["start_line"] - 1 for chunk in previous_chunks]
+    regions = planner.normalize(dirty)
+    rechunked: dict[tuple[int, int], list[dict[str, Any]]] = {}
+
+    # Grow regions until their first and last chunks are reproduced
+    while True:
+        grown = []
+        for a, b in regions:
+            if (a, b) not in rechunked:
+                rechunked[(a, b)] = _chunk_region(
+                    map_line(a), map_line(b), new_lines, new_headers, chunk_text
+                )
+            chunks = rechunked[(a, b)]
+            old = previous_chunks[
+                bisect.bisect_left(starts, a) : bisect.bisect_left(starts, b)
+            ]
+            left_ok = a == 0 or bool(
+                chunks and _chunk_key(chunks[0]) == _chunk_key(old[0])
+            )
+            right_ok = b == len(old_lines) or bool(
+                chunks and _chunk_key(chunks[-1]) == _chunk_key(old[-1])
+            )
+            grown.append((a if left_ok else a - 1, b if right_ok else b + 1))
+        if grown == regions:
+            break
+        regions = planner.normalize(grown)
+
+    # Previous chunks outside regions, new chunks inside
+    result: list[dict[str, Any]] = []
+    reused: dict[int, int] = {}
+    old_index = 0
+    for a, b in regions + [(len(old_lines), len(old_lines))]:
+        while old_index < len(previous_chunks) and starts[old_index] < a:
+            chunk = previous_chunks[old_index]
+            reused[len(result)] = old_index
+            result.append(_shifted(chunk, map_line(starts[old_index]) + 1))
+            old_index += 1
+
+        region_end = bisect.bisect_left(starts, b)
+        if a < b:
+            _merge_region(
+                rechunked[(a, b)],
+                range(old_index, region_end),
+                previous_chunks,
+                keep_first=a > 0,
+                keep_last=b < len(old_lines),
+                result=result,
+                reused=reused,
+            )
+        old_index = region_end
+
+    rechunked_lines = sum(map_line(b) - map_line(a) for a, b in regions)
+    return _result(result, reused, len(previous_chunks), rechunked_lines)
+
+
+def _chunk_region(
+    start: int,
+    end: int,
+    new_lines: list[str],
+    new_headers: dict[int, tuple[int, str]],
+    chunk_text: ChunkText,
+) -> list[dict[str, Any]]:
+    """Chunk new_lines[start:end] with document line numbers and header paths."""
+    chunks = chunk_text("".join(new_lines[start:end]))
+
+    # Ancestors of the region's first header are outside the piece
+    prefix = ""
+    if start in new_headers:
+        stack: list[tuple[int, str]] = []
+        for index in sorted(i for i in new_headers if i < start):
+            level, title = new_headers[index]
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, title))
+        first_level = new_headers[start][0]
+        prefix = "".join(f"/{title}" for level, title in stack if level < first_level)
+
+    for chunk in chunks:
+        chunk["start_line"] += start
+        chunk["end_line"] += start
+        header_path = chunk.get("metadata", {}).get("header_path")
+        if prefix and isinstance(header_path, str) and header_path.startswith("/"):
+            chunk["metadata"]["header_path"] = prefix + header_path
+    return chunks
+
+
+def _merge_region(
+    chunks: list[dict[str, Any]],
+    old_indices: range,
+    previous_chunks: list[dict[str, Any]],
+    keep_first: bool,
+    keep_last: bool,
+    result: list[dict[str, Any]],
+    reused: dict[int, int],
+) -> None:
+    """
+    Append a region's chunks to result.
+
+    The verified first/last chunks take the overlap context that faces
+    outside the region from their previous version, since the piece was
+    chunked without its neighbours. Chunks whose content and header_path
+    are unchanged are reported as reused.
+    """
+    candidates: dict[tuple[Any, Any], list[int]] = {}
+    for index in old_indices:
+        candidates.setdefault(_chunk_key(previous_chunks[index]), []).append(index)
+
+    for position, chunk in enumerate(chunks):
+        matches = candidates.get(_chunk_key(chunk))
+        if matches:
+            old_index = matches.pop(0)
+            reused[len(result)] = old_index
+            outer_keys = []
+            if keep_first and position == 0:
+                outer_keys += ["previous_content", "overlap_size"]
+            if keep_last and position == len(chunks) - 1:
+                outer_keys.append("next_content")
+            old_metadata = previous_chunks[old_index].get("metadata", {})
+            for key in outer_keys:
+                if key in old_metadata:
+                    chunk["metadata"][key] = old_metadata[key]
+                else:
+                    chunk.get("metadata", {}).pop(key, None)
+        result.append(chunk)
+
+
+def _result(
+    chunks: list[dict[str, Any]],
+    reused: dict[int, int],
+    previous_count: int,
+    rechunked_lines: int,
+) -> IncrementalResult:
+    for index, chunk in enumerate(chunks):
+        metadata = chunk.get("metadata", {})
+        if "chunk_index" in metadata:
+            metadata["chunk_index"] = index
+        if "total_chunks" in metadata:
+            metadata["total_chunks"] = len(chunks)
+    used = set(reused.values())
+    return IncrementalResult(
+        chunks=chunks,
+        changed=[i for i in range(len(chunks)) if i not in reused],
+        reused=reused,
+        removed=[i for i in range(previous_count) if i not in used],
+        rechunked_lines=rechunked_lines,
+    )
@@ -6,6 +6,7 @@ to library changes and missing fields.
 """
 
 import logging
+from collections.abc import Iterable, Iterator
 from typing import Any
 
 logger = logging.getLogger(__name__)
@@ -27,19 +28,40 @@ class InputValidator:
             Validated chunks with defaults applied
         """
         for i, chunk in enumerate(chunks):
-            metadata = chunk.get("metadata", {})
+            self.validate_chunk(chunk, i)
 
-            # Set default for is_leaf if missing
-            if "is_leaf" not in metadata:
-                metadata["is_leaf"] = True
-                logger.warning(
-                    f"[ChunkanaAdapter] Chunk {i} missing is_leaf, defaulting to True"
-                )
+        return chunks
+
+    def iter_validate_and_fix(
+        self, chunks: Iterable[dict[str, Any]]
+    ) -> Iterator[dict[str, Any]]:
+        """Lazy variant of validate_and_fix() for generator pipelines."""
+        for i, chunk in enumerate(chunks):
+            yield self.validate_chunk(chunk, i)
 
-            # Set default for is_root if missing
-            if "is_root" not in metadata:
-                metadata["is_root"] = False
+    def validate_chunk(self, chunk: dict[str, Any], index: int) -> dict[str, Any]:
+        """
+        Validate a single chunk in place.
 
-            chunk["metadata"] = metadata
+        Args:
+            chunk: Raw chunk from chunkana
+            index: Position of the chunk, used in warnings
 
-        return chunks
+        Returns:
+            The same chunk with defaults applied
+        """
+        metadata = chunk.get("metadata", {})
+
+        # Set default for is_leaf if missing
+        if "is_leaf" not in metadata:
+            metadata["is_leaf"] = True
+            logger.warning(
+                f"[ChunkanaAdapter] Chunk {index} missing is_leaf, defaulting to True"
+            )
+
+        # Set default for is_root if missing
+        if "is_root" not in metadata:
+            metadata["is_root"] = False
+
+        chunk["metadata"] = metadata
+        return chunk
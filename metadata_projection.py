@@ -0,0 +1,115 @@
+"""
+Metadata projection for RAG output.
+
+Outside debug mode every rendered chunk carries only the metadata fields
+useful for retrieval: statistics and execution details are dropped, as
+are is_leaf/is_root and falsy is_*/has_* flags. Chunks produced by one
+strategy share the same metadata keys, so instead of testing every key
+of every chunk, MetadataProjector compiles the keep/drop decision once
+per distinct key sequence into a plan and applies it as a direct key
+selection. Only the falsy-flag rule depends on values; the plan marks
+those keys and checks just them.
+
+A caller-supplied field whitelist (RenderOptions.metadata_fields) narrows
+the projection further, so unused fields are never serialized.
+"""
+
+import threading
+from collections.abc import Iterable
+from typing import Any
+
+from output_filter import SIGNIFICANT_CHARS_KEY
+
+# Statistical and execution fields not useful for retrieval
+RAG_EXCLUDED_FIELDS = frozenset(
+    {
+        "avg_line_length",
+        "avg_word_length",
+        "char_count",
+        "line_count",
+        "size_bytes",
+        "word_count",
+        "item_count",
+        "nested_item_count",
+        "unordered_item_count",
+        "ordered_item_count",
+        "max_nesting",
+        "task_item_count",
+        "execution_fallback_level",
+        "execution_fallback_used",
+        "execution_strategy_used",
+        "preamble.char_count",
+        "preamble.line_count",
+        "preamble.has_metadata",
+        "preamble.metadata_fields",
+        "preamble.type",
+        "preamble_type",
+        "preview",
+        SIGNIFICANT_CHARS_KEY,
+        "total_chunks",
+    }
+)
+# Hierarchy flags, always dropped from RAG output
+HIERARCHY_FLAG_FIELDS = frozenset({"is_leaf", "is_root"})
+# Boolean flags kept only when truthy
+FLAG_PREFIXES = ("is_", "has_")
+DEFAULT_MAX_PLANS = 1024
+
+# Plan: (key, keep only if truthy) in metadata key order
+Plan = tuple[tuple[str, bool], ...]
+
+
+class MetadataProjector:
+    """RAG metadata filter with keep/drop plans cached per key sequence."""
+
+    def __init__(
+        self,
+        excluded: Iterable[str] = RAG_EXCLUDED_FIELDS,
+        max_plans: int = DEFAULT_MAX_PLANS,
+    ) -> None:
+        """
+        Args:
+            excluded: Fields always dropped
+            max_plans: Cached plans kept before the cache is reset
+        """
+        self._excluded = frozenset(excluded) | HIERARCHY_FLAG_FIELDS
+        self._max_plans = max_plans
+        self._plans: dict[tuple[Any, ...], Plan] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def plan_count(self) -> int:
+        """Number of cached plans."""
+        return len(self._plans)
+
+    def project(
+        self, metadata: dict[str, Any], fields: tuple[str, ...] | None = None
+    ) -> dict[str, Any]:
+        """
+        RAG view of metadata as a new dict, in the original key order.
+
+        Args:
+            metadata: Chunk metadata (not modified)
+            fields: Optional whitelist; other fields are dropped too
+
+        Returns:
+            Projected metadata
+        """
+        key = (fields, *metadata)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._compile(metadata, fields)
+            with self._lock:
+                if len(self._plans) >= self._max_plans:
+                    self._plans.clear()
+                self._plans[key] = plan
+        return {k: metadata[k] for k, flag in plan if not flag or metadata[k]}
+
+    def _compile(self, keys: Iterable[str], fields: tuple[str, ...] | None) -> Plan:
+        """Keep/drop decision for one key sequence."""
+        allowed = None if fields is None else frozenset(fields)
+        return tuple(
+            (k, k.startswith(FLAG_PREFIXES))
+            for k in keys
+            if k not in self._excluded and (allowed is None or k in allowed)
+        )
@@ -0,0 +1,69 @@
+"""
+Metadata serialization options for rendered chunks.
+
+The default "pretty" format (indent=2) is the historical plugin output and
+is what the golden snapshots are recorded with. "compact" drops all
+insignificant whitespace, which shrinks every chunk and the embedding
+tokens spent on the header; orjson is used for it when installed.
+
+metadata_fields restricts RAG metadata to a whitelist of fields (see
+metadata_projection.py); start_line/end_line are always rendered.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, stdlib json is the fallback
+    orjson = None
+
+METADATA_FORMATS = ("pretty", "compact")
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    """Options for the rendering stage (does NOT affect chunk boundaries)."""
+
+    metadata_format: str = "pretty"  # "pretty" (indent=2) or "compact"
+    metadata_fields: tuple[str, ...] | None = None  # None: all RAG fields
+
+    def __post_init__(self) -> None:
+        if self.metadata_format not in METADATA_FORMATS:
+            raise ValueError(
+                f"metadata_format must be one of {METADATA_FORMATS}, "
+                f"got {self.metadata_format!r}"
+            )
+        if self.metadata_fields is not None:
+            if isinstance(self.metadata_fields, str) or not all(
+                isinstance(f, str) and f for f in self.metadata_fields
+            ):
+                raise ValueError(
+                    "metadata_fields must be a sequence of field names, "
+                    f"got {self.metadata_fields!r}"
+                )
+            object.__setattr__(self, "metadata_fields", tuple(self.metadata_fields))
+
+
+def parse_metadata_fields(value: str | None) -> tuple[str, ...] | None:
+    """Comma-separated field names to a whitelist; None if empty."""
+    fields = tuple(f.strip() for f in (value or "").split(",") if f.strip())
+    return fields or None
+
+
+DEFAULT_RENDER_OPTIONS = RenderOptions()
+
+
+def dumps_metadata(metadata: dict[str, Any], metadata_format: str = "pretty") -> str:
+    """Serialize chunk metadata for the <metadata> header."""
+    if metadata_format == "compact":
+        if orjson is not None:
+            try:
+                return orjson.dumps(metadata).decode("utf-8")
+            except TypeError:
+                # orjson rejects e.g. non-str keys; stdlib json is more lenient
+                pass
+        return json.dumps(metadata, ensure_ascii=False, separators=(",", ":"))
+
+    return json.dumps(metadata, ensure_ascii=False, indent=2)
@@ -7,11 +7,39 @@ to prevent accidental indexing of technical nodes (root, internal nodes).
 CRITICAL CHANGE in 0.1.3:
 - _add_indexable_field() uses setdefault() - respects library value
 - _filter_for_indexing() uses indexable field, not just is_leaf
+
+The same root/indexable decisions can be pushed down to the library
+Chunk objects (iter_select), so that dropped nodes are never converted
+to dicts or validated.
+
+The significance measure of internal nodes (non-header characters) is
+computed once per chunk, during selection (iter_select_measured) or
+conversion, and stored in metadata["significant_chars"], so filtering
+is a comparison.
 """
 
+import re
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from typing import Any
 
+SIGNIFICANT_CHARS_KEY = "significant_chars"
+# Internal nodes with more non-header characters are indexable
+SIGNIFICANT_MIN_CHARS = 100
+
+# A header line with its line break; leading whitespace as in line.strip()
+_HEADER_LINE = re.compile(r"^[^\S\n]*#[^\n]*(?:\n|\Z)", re.MULTILINE)
+
+
+def significant_chars(content: str) -> int:
+    """
+    Length of content without header lines, stripped.
+
+    Same value as stripping, splitting into lines, dropping lines that
+    start with "#" and re-joining, without the intermediate copies.
+    """
+    return len(_HEADER_LINE.sub("", content.strip()).strip())
+
 
 @dataclass
 class FilterConfig:
@@ -40,22 +68,71 @@ class OutputFilter:
         Returns:
             Filtered list of chunks with indexable field
         """
-        # Add indexable field (respecting library value)
-        chunks = self._add_indexable_field(chunks)
+        return list(self.iter_filter(chunks, debug=debug))
+
+    def iter_filter(
+        self, chunks: Iterable[dict[str, Any]], debug: bool = False
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Lazy variant of filter() for generator pipelines.
 
-        if debug:
-            return chunks  # All chunks for debugging
+        Every decision is per-chunk, so chunks are processed one at a time
+        in input order.
+        """
+        for chunk in chunks:
+            # Add indexable field (respecting library value)
+            metadata = self._set_indexable(chunk)
 
-        # Exclude root chunk
-        chunks = [
-            c for c in chunks if not c.get("metadata", {}).get("is_root", False)
-        ]
+            if debug:
+                yield chunk  # All chunks for debugging
+                continue
 
-        # Optionally: filter for indexing (uses indexable, not just is_leaf)
-        if self.config.leaf_only:
-            chunks = self._filter_for_indexing(chunks)
+            # Exclude root chunk
+            if metadata.get("is_root", False):
+                continue
 
-        return chunks
+            # Optionally: filter for indexing (uses indexable, not just is_leaf)
+            if self.config.leaf_only and not metadata.get("indexable", True):
+                continue
+
+            yield chunk
+
+    def iter_select(self, chunks: Iterable[Any]) -> Iterator[Any]:
+        """
+        Pre-filter library Chunk objects (non-debug output).
+
+        Applies the decisions of iter_filter() to the objects' content and
+        metadata without copying or modifying them, so only chunks that
+        iter_filter() would keep reach dict conversion and validation.
+        Missing is_root/is_leaf fields get InputValidator's defaults.
+        """
+        for chunk, _measure in self.iter_select_measured(chunks):
+            yield chunk
+
+    def iter_select_measured(
+        self, chunks: Iterable[Any]
+    ) -> Iterator[tuple[Any, int | None]]:
+        """
+        Like iter_select(), yielding (chunk, significance measure) pairs.
+
+        The measure of internal nodes is computed here when leaf_only
+        needs it, so conversion can store it instead of computing it
+        again; it is None when selection did not need it.
+        """
+        leaf_only = self.config.leaf_only
+        for chunk in chunks:
+            metadata = chunk.metadata or {}
+            if metadata.get("is_root", False):
+                continue
+            measure = None
+            if leaf_only:
+                if not metadata.get("is_leaf", True):
+                    measure = metadata.get(SIGNIFICANT_CHARS_KEY)
+                    if measure is None:
+                        measure = significant_chars(chunk.content)
+                if not self.is_indexable(metadata, chunk.content, measure):
+                    continue
+            yield chunk, measure
 
     def _add_indexable_field(
         self, chunks: list[dict[str, Any]]
@@ -72,24 +149,44 @@ class OutputFilter:
           - Non-leaf: indexable=True if has significant content
         """
         for chunk in chunks:
-            metadata = chunk.get("metadata", {})
+            self._set_indexable(chunk)
 
-            # CRITICAL: setdefault, not overwrite!
-            if "indexable" not in metadata:
-                is_root = metadata.get("is_root", False)
-                is_leaf = metadata.get("is_leaf", True)
+        return chunks
 
-                if is_root:
-                    metadata["indexable"] = False
-                elif is_leaf:
-                    metadata["indexable"] = True
-                else:
-                    # Non-leaf: indexable if has significant content
-                    metadata["indexable"] = self._has_significant_content(chunk)
+    def _set_indexable(self, chunk: dict[str, Any]) -> dict[str, Any]:
+        """Add indexable field to one chunk; returns its metadata."""
+        metadata = chunk.get("metadata", {})
 
-            chunk["metadata"] = metadata
+        # CRITICAL: setdefault, not overwrite!
+        if "indexable" not in metadata:
+            metadata["indexable"] = self.is_indexable(
+                metadata, chunk.get("content", "")
+            )
 
-        return chunks
+        chunk["metadata"] = metadata
+        return metadata
+
+    def is_indexable(
+        self, metadata: dict[str, Any], content: str, measure: int | None = None
+    ) -> bool:
+        """Library indexable value, or derived from root/leaf/content.
+
+        measure is the significance of an internal node when the caller
+        already has it.
+        """
+        if "indexable" in metadata:
+            return metadata["indexable"]
+        if metadata.get("is_root", False):
+            return False
+        if metadata.get("is_leaf", True):
+            return True
+        # Non-leaf: indexable if has significant content (precomputed
+        # during conversion or selection when available)
+        if measure is None:
+            measure = metadata.get(SIGNIFICANT_CHARS_KEY)
+        if measure is None:
+            measure = significant_chars(content)
+        return measure > SIGNIFICANT_MIN_CHARS
 
     def _filter_for_indexing(
         self, chunks: list[dict[str, Any]]
@@ -104,12 +201,7 @@ class OutputFilter:
 
     def _has_significant_content(self, chunk: dict[str, Any]) -> bool:
         """Check if chunk has >100 chars of non-header content."""
-        content = chunk.get("content", "").strip()
-        if not content:
-            return False
-
-        lines = content.split("\n")
-        non_header_lines = [line for line in lines if not line.strip().startswith("#")]
-        non_header_content = "\n".join(non_header_lines).strip()
-
-        return len(non_header_content) > 100
+        measure = chunk.get("metadata", {}).get(SIGNIFICANT_CHARS_KEY)
+        if measure is None:
+            measure = significant_chars(chunk.get("content", ""))
+        return measure > SIGNIFICANT_MIN_CHARS
@@ -0,0 +1,406 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are kept per plugin process (no external
+dependency). They can be exported in two ways, both opt-in via env:
+- MARKDOWN_CHUNKER_METRICS_FILE: path rewritten atomically by a
+  background flush at most every MARKDOWN_CHUNKER_METRICS_FILE_INTERVAL
+  seconds after invocations ("{pid}" is replaced with the process id, so
+  replicas sharing a volume do not overwrite each other), e.g. for the
+  node exporter textfile collector
+- MARKDOWN_CHUNKER_METRICS_PORT: local HTTP endpoint serving /metrics
+  (bound to MARKDOWN_CHUNKER_METRICS_HOST, default 127.0.0.1)
+"""
+
+import atexit
+import logging
+import os
+import tempfile
+import threading
+from collections.abc import Callable, Iterable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from env_config import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+ENV_METRICS_FILE = "MARKDOWN_CHUNKER_METRICS_FILE"
+ENV_METRICS_PORT = "MARKDOWN_CHUNKER_METRICS_PORT"
+ENV_METRICS_HOST = "MARKDOWN_CHUNKER_METRICS_HOST"
+ENV_METRICS_FILE_INTERVAL = "MARKDOWN_CHUNKER_METRICS_FILE_INTERVAL"
+
+# Minimum seconds between textfile rewrites
+DEFAULT_TEXTFILE_INTERVAL = 5.0
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets in seconds (up to main.py MAX_REQUEST_TIMEOUT)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+# Strategy label values; anything else is reported as "other". The
+# label is the strategy used, "unknown" if the output does not show it
+KNOWN_STRATEGIES = frozenset(
+    {"auto", "code_aware", "list_aware", "structural", "fallback", "unknown"}
+)
+
+# (label, exclusive upper bound in bytes)
+SIZE_BUCKETS = (
+    ("lt_1kb", 1024),
+    ("lt_10kb", 10 * 1024),
+    ("lt_100kb", 100 * 1024),
+    ("lt_1mb", 1024 * 1024),
+    ("ge_1mb", float("inf")),
+)
+
+# Collector: returns samples (metric name, type, help, [(labels, value)])
+Sample = tuple[str, str, str, list[tuple[dict[str, str], float]]]
+
+
+def size_bucket(size_bytes: int) -> str:
+    """Return the size bucket label for an input size."""
+    for label, upper in SIZE_BUCKETS:
+        if size_bytes < upper:
+            return label
+    return SIZE_BUCKETS[-1][0]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            labels = _format_labels(dict(zip(self.labelnames, key)))
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram with optional labels."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = [0.0] * (len(self.buckets) + 2)
+                self._values[key] = series
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def count(self, **labels: str) -> float:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            return series[-2] if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        for key, series in items:
+            labels = dict(zip(self.labelnames, key))
+            for upper, count in zip(self.buckets + (float("inf"),), series):
+                bucket_labels = _format_labels({**labels, "le": _format_value(upper)})
+                lines.append(
+                    f"{self.name}_bucket{bucket_labels} {_format_value(count)}"
+                )
+            label_text = _format_labels(labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(series[-2])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and collectors; renders the exposition text."""
+
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+        self._collectors: list[Callable[[], list[Sample]]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: tuple = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], list[Sample]]) -> None:
+        """Add a callback producing samples at exposition time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for collector in self._collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                logger.warning(f"[PluginMetrics] Collector failed: {e}")
+                continue
+            for name, metric_type, help_text, values in samples:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in values:
+                    lines.append(
+                        f"{name}{_format_labels(labels)} {_format_value(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+def write_textfile(registry: MetricsRegistry, path: Path) -> None:
+    """Write the exposition atomically (readers never see a partial file)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(registry.render())
+        os.replace(tmp_path, path)
+    except OSError:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def start_http_server(
+    registry: MetricsRegistry, port: int, host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server API
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass  # keep scrapes out of the plugin log
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    thread = threading.Thread(
+        target=server.serve_forever, name="markdown-chunker-metrics", daemon=True
+    )
+    thread.start()
+    return server
+
+
+class PluginMetrics:
+    """The plugin's metric set plus optional exporters."""
+
+    def __init__(
+        self,
+        textfile_path: Path | None = None,
+        textfile_interval: float = DEFAULT_TEXTFILE_INTERVAL,
+    ) -> None:
+        """
+        Args:
+            textfile_path: Exposition file, None to disable
+            textfile_interval: Minimum seconds between rewrites; 0 writes
+                synchronously after every invocation
+        """
+        self.registry = MetricsRegistry()
+        self.textfile_path = textfile_path
+        self.textfile_interval = textfile_interval
+        self.server: ThreadingHTTPServer | None = None
+        self._flush_timer: threading.Timer | None = None
+        self._flush_lock = threading.Lock()
+
+        self.invocations = self.registry.counter(
+            "markdown_chunker_invocations_total",
+            "Tool invocations by output mode.",
+            ("mode",),
+        )
+        self.errors = self.registry.counter(
+            "markdown_chunker_errors_total",
+            "Failed invocations by error type (validation: ValueError).",
+            ("type",),
+        )
+        self.input_bytes = self.registry.counter(
+            "markdown_chunker_input_bytes_total",
+            "UTF-8 bytes of Markdown received.",
+        )
+        self.chunks = self.registry.counter(
+            "markdown_chunker_chunks_total",
+            "Chunks returned.",
+        )
+        self.degraded = self.registry.counter(
+            "markdown_chunker_degraded_total",
+            "Invocations degraded to meet the deadline, by reason.",
+            ("reason",),
+        )
+        self.latency = self.registry.histogram(
+            "markdown_chunker_request_duration_seconds",
+            "Invocation latency by strategy and input size bucket.",
+            ("strategy", "size_bucket"),
+        )
+        self._caches: dict[str, Callable[[], dict[str, Any]]] = {}
+        self.registry.register_collector(self._collect_caches)
+
+    @classmethod
+    def from_env(cls) -> "PluginMetrics":
+        """Build metrics and start the exporters configured in env."""
+        path = os.environ.get(ENV_METRICS_FILE, "")
+        textfile_path = Path(path.replace("{pid}", str(os.getpid()))) if path else None
+        interval = env_float(ENV_METRICS_FILE_INTERVAL, DEFAULT_TEXTFILE_INTERVAL)
+        metrics = cls(textfile_path=textfile_path, textfile_interval=interval)
+        if textfile_path is not None:
+            atexit.register(metrics.flush)
+
+        port = env_int(ENV_METRICS_PORT, 0)
+        if port > 0:
+            host = os.environ.get(ENV_METRICS_HOST, "127.0.0.1")
+            try:
+                metrics.server = start_http_server(metrics.registry, port, host)
+            except OSError as e:
+                logger.warning(f"[PluginMetrics] Cannot serve on {host}:{port}: {e}")
+        return metrics
+
+    def register_cache(self, cache: str, stats: Callable[[], dict[str, Any]]) -> None:
+        """Expose hits, misses and hit ratio of a cache's stats() dict."""
+        self._caches[cache] = stats
+
+    def _collect_caches(self) -> list[Sample]:
+        hits, misses, ratio = [], [], []
+        for cache, stats in self._caches.items():
+            values = stats()
+            labels = {"cache": cache}
+            hits.append((labels, values.get("hits", 0) + values.get("disk_hits", 0)))
+            misses.append((labels, values.get("misses", 0)))
+            ratio.append((labels, values.get("hit_rate", 0.0)))
+        return [
+            ("markdown_chunker_cache_hits_total", "counter", "Cache hits.", hits),
+            ("markdown_chunker_cache_misses_total", "counter", "Cache misses.", misses),
+            (
+                "markdown_chunker_cache_hit_ratio",
+                "gauge",
+                "Cache hit ratio since process start.",
+                ratio,
+            ),
+        ]
+
+    def observe_invocation(
+        self,
+        mode: str,
+        strategy: str,
+        input_bytes: int,
+        chunks: int,
+        seconds: float,
+        error: str | None = None,
+        degraded: Iterable[str] = (),
+    ) -> None:
+        """Record one finished invocation and schedule a textfile refresh."""
+        self.invocations.inc(mode=mode)
+        self.input_bytes.inc(input_bytes)
+        self.chunks.inc(chunks)
+        self.latency.observe(
+            seconds,
+            strategy=strategy if strategy in KNOWN_STRATEGIES else "other",
+            size_bucket=size_bucket(input_bytes),
+        )
+        if error is not None:
+            self.errors.inc(type=error)
+        for reason in degraded:
+            self.degraded.inc(reason=reason)
+
+        if self.textfile_path is None:
+            return
+        if self.textfile_interval <= 0:
+            self.flush()
+            return
+        with self._flush_lock:
+            # One pending write covers every invocation until it runs
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(
+                    self.textfile_interval, self.flush
+                )
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Write the textfile now (no-op without a textfile path)."""
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        if self.textfile_path is None:
+            return
+        try:
+            write_textfile(self.registry, self.textfile_path)
+        except OSError as e:
+            logger.warning(f"[PluginMetrics] Cannot write metrics file: {e}")
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -0,0 +1,154 @@
+"""
+Input size guard: estimate peak memory before chunking a document.
+
+The plugin runs under the resource.memory limit in manifest.yaml. The
+in-memory pipeline holds several copies of the text (library blocks,
+chunk dicts, overlap context, rendered strings), so a 50MB input can
+exceed a 512MB limit. Before anything is allocated, SizeGuard estimates
+peak memory from the string's in-memory size and, in order:
+1. disables debug in hierarchical mode (no full tree with internal nodes)
+2. switches to the windowed path (stream_input.iter_windows), whose
+   working set is bounded by the window size; hierarchy is not available
+   there
+3. rejects the input with a ValueError
+
+Estimates are rough multipliers of the string size (sys.getsizeof, so
+non-ASCII text counts at its real width), deliberately on the high side.
+
+The guard is opt-in: it only runs when MARKDOWN_CHUNKER_MEMORY_LIMIT_BYTES
+is set.
+"""
+
+import logging
+import os
+import sys
+from dataclasses import dataclass
+
+from batch_executor import PARENT_RESERVE_BYTES, load_memory_budget
+from env_config import env_int
+from stream_input import DEFAULT_WINDOW_CHARS
+
+logger = logging.getLogger(__name__)
+
+ENV_MEMORY_LIMIT = "MARKDOWN_CHUNKER_MEMORY_LIMIT_BYTES"
+ENV_MAX_INPUT_CHARS = "MARKDOWN_CHUNKER_MAX_INPUT_CHARS"
+
+# MARKDOWN_CHUNKER_MEMORY_LIMIT_BYTES value for the manifest-derived limit
+MEMORY_LIMIT_AUTO = "auto"
+
+# Peak memory per byte of input string, by pipeline path
+MEMORY_FACTORS = {
+    "flat": 8,
+    "hierarchical": 10,
+    "hierarchical_debug": 16,
+    # Input and rendered output; the window working set is added separately
+    "windowed": 3,
+}
+WINDOW_WORKING_SET = DEFAULT_WINDOW_CHARS * MEMORY_FACTORS["flat"]
+
+# Plan reasons
+REASON_DEBUG_DISABLED = "debug_disabled"
+REASON_WINDOWED = "windowed"
+
+
+@dataclass(frozen=True)
+class SizePlan:
+    """How a document of a given size will be chunked."""
+
+    enable_hierarchy: bool
+    debug: bool
+    windowed: bool
+    estimated_bytes: int
+    reasons: tuple[str, ...] = ()
+
+
+class SizeGuard:
+    """Picks a pipeline path that fits the memory limit, or rejects."""
+
+    def __init__(self, memory_limit: int, max_input_chars: int | None = None) -> None:
+        """
+        Args:
+            memory_limit: Estimated peak bytes one document may use
+            max_input_chars: Hard input size limit (None: memory only)
+        """
+        self.memory_limit = memory_limit
+        self.max_input_chars = max_input_chars
+
+    @classmethod
+    def from_env(cls) -> "SizeGuard | None":
+        """
+        Build from env; None if disabled.
+
+        MARKDOWN_CHUNKER_MEMORY_LIMIT_BYTES is a byte count, or "auto" for
+        the manifest resource.memory minus the runtime reserve; unset or 0
+        leaves the guard off. MARKDOWN_CHUNKER_MAX_INPUT_CHARS applies only
+        with the guard on.
+        """
+        value = os.environ.get(ENV_MEMORY_LIMIT, "").strip()
+        if value.lower() == MEMORY_LIMIT_AUTO:
+            memory_limit = load_memory_budget() - PARENT_RESERVE_BYTES
+        else:
+            memory_limit = env_int(ENV_MEMORY_LIMIT, 0)
+        if memory_limit <= 0:
+            return None
+
+        max_input_chars = env_int(ENV_MAX_INPUT_CHARS, 0)
+        return cls(memory_limit, max_input_chars or None)
+
+    def estimate(
+        self,
+        input_text: str,
+        enable_hierarchy: bool,
+        debug: bool,
+        windowed: bool = False,
+    ) -> int:
+        """Estimated peak bytes for chunking input_text on a given path."""
+        size = sys.getsizeof(input_text)
+        if windowed:
+            return size * MEMORY_FACTORS["windowed"] + WINDOW_WORKING_SET
+        if enable_hierarchy:
+            key = "hierarchical_debug" if debug else "hierarchical"
+        else:
+            key = "flat"
+        return size * MEMORY_FACTORS[key]
+
+    def plan(self, input_text: str, enable_hierarchy: bool, debug: bool) -> SizePlan:
+        """
+        Return the cheapest-degradation path that fits the memory limit.
+
+        Raises:
+            ValueError: If the input is too large for every path
+        """
+        if self.max_input_chars is not None and len(input_text) > self.max_input_chars:
+            raise ValueError(
+                f"Input of {len(input_text)} characters exceeds the limit of "
+                f"{self.max_input_chars} characters"
+            )
+
+        reasons: list[str] = []
+        estimate = self.estimate(input_text, enable_hierarchy, debug)
+        if estimate > self.memory_limit and enable_hierarchy and debug:
+            debug = False
+            reasons.append(REASON_DEBUG_DISABLED)
+            estimate = self.estimate(input_text, enable_hierarchy, debug)
+
+        windowed = False
+        if estimate > self.memory_limit:
+            windowed = True
+            enable_hierarchy = False
+            reasons.append(REASON_WINDOWED)
+            estimate = self.estimate(input_text, enable_hierarchy, debug, windowed)
+
+        if estimate > self.memory_limit:
+            raise ValueError(
+                f"Input of {len(input_text)} characters is too large to chunk: "
+                f"estimated {estimate // 2**20} MB exceeds the memory limit of "
+                f"{self.memory_limit // 2**20} MB"
+            )
+
+        if reasons:
+            logger.warning(
+                f"[SizeGuard] {len(input_text)} chars, estimated "
+                f"{estimate // 2**20} MB: {', '.join(reasons)}"
+            )
+        return SizePlan(enable_hierarchy, debug, windowed, estimate, tuple(reasons))
@@ -0,0 +1,139 @@
+"""
+Per-stage wall and CPU timing for the chunking pipeline.
+
+MigrationAdapter stages are lazy generators feeding each other
+(chunk -> dict -> validate -> filter -> render), so timing a stage's
+next() call would also count every stage upstream of it. StageTimings
+keeps a stack of open frames and charges each stage only its exclusive
+time.
+
+Timing is opt-in: the adapter only wraps stages when a StageTimings is
+passed, so the disabled path costs one None check per request. A
+StageTimings created with enabled=False makes no clock calls; it only
+records chunk count, strategy used and cache hits (for metrics labels).
+"""
+
+import json
+import logging
+import os
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import Any
+
+ENV_TIMING = "MARKDOWN_CHUNKER_TIMING"
+
+
+def timing_enabled_from_env() -> bool:
+    """True when MARKDOWN_CHUNKER_TIMING is set to a truthy value."""
+    return os.environ.get(ENV_TIMING, "").lower() in {"1", "true", "yes", "on"}
+
+
+class StageTimings:
+    """Structured timing record for one chunking request."""
+
+    def __init__(self, input_chars: int = 0, enabled: bool = True) -> None:
+        """
+        Args:
+            input_chars: Input size, reported in the record
+            enabled: Time stages; False records only count, strategy and
+                cache use
+        """
+        self.input_chars = input_chars
+        self.enabled = enabled
+        self.chunk_count = 0
+        self.strategy: str | None = None
+        self.cache_hit: str | None = None  # "rendered" or "raw"
+        self._wall: dict[str, float] = {}
+        self._cpu: dict[str, float] = {}
+        # Open frames: [stage name, child wall, child cpu]
+        self._frames: list[list[Any]] = []
+
+    def stage(self, name: str) -> AbstractContextManager:
+        """Time a block as stage name."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed_stage(name)
+
+    @contextmanager
+    def _timed_stage(self, name: str) -> Iterator[None]:
+        self._open(name)
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self._close(time.perf_counter() - wall0, time.thread_time() - cpu0)
+
+    def iter_stage(self, name: str, iterable: Iterable[Any]) -> Iterator[Any]:
+        """Yield from iterable, charging each next() call to stage name."""
+        if not self.enabled:
+            return iter(iterable)
+        return self._iter_timed(name, iterable)
+
+    def _iter_timed(self, name: str, iterable: Iterable[Any]) -> Iterator[Any]:
+        iterator = iter(iterable)
+        while True:
+            self._open(name)
+            wall0, cpu0 = time.perf_counter(), time.thread_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._close(time.perf_counter() - wall0, time.thread_time() - cpu0)
+            yield item
+
+    def count_chunks(
+        self, chunks: Iterable[dict[str, Any]]
+    ) -> Iterator[dict[str, Any]]:
+        """Pass raw chunks through, recording count and strategy used."""
+        for chunk in chunks:
+            self.chunk_count += 1
+            if self.strategy is None:
+                self.strategy = chunk.get("metadata", {}).get("strategy")
+            yield chunk
+
+    def _open(self, name: str) -> None:
+        self._frames.append([name, 0.0, 0.0])
+
+    def _close(self, wall: float, cpu: float) -> None:
+        name, child_wall, child_cpu = self._frames.pop()
+        self._wall[name] = self._wall.get(name, 0.0) + wall - child_wall
+        self._cpu[name] = self._cpu.get(name, 0.0) + cpu - child_cpu
+        if self._frames:
+            self._frames[-1][1] += wall
+            self._frames[-1][2] += cpu
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the record as a JSON-serializable dict (times in ms)."""
+        record: dict[str, Any] = {
+            "input_chars": self.input_chars,
+            "chunk_count": self.chunk_count,
+            "strategy": self.strategy,
+            "cache_hit": self.cache_hit,
+            "stages": {
+                name: {
+                    "wall_ms": round(self._wall[name] * 1000, 3),
+                    "cpu_ms": round(self._cpu[name] * 1000, 3),
+                }
+                for name in self._wall
+            },
+            "total_wall_ms": round(sum(self._wall.values()) * 1000, 3),
+            "total_cpu_ms": round(sum(self._cpu.values()) * 1000, 3),
+        }
+        if self._frames:
+            # Reported mid-request, e.g. after a timeout
+            record["active_stages"] = [frame[0] for frame in self._frames]
+        return record
+
+    def log(self, logger: logging.Logger, level: int = logging.INFO) -> None:
+        """Emit the record as one JSON log line."""
+        if logger.isEnabledFor(level):
+            logger.log(level, f"[StageTimings] {json.dumps(self.to_dict())}")
+
+
+def timed(timings: StageTimings | None, name: str) -> AbstractContextManager:
+    """timings.stage(name), or a no-op context when timing is disabled."""
+    if timings is None:
+        return nullcontext()
+    return timings.stage(name)
@@ -0,0 +1,250 @@
+"""
+Fence-aware windowing of large Markdown sources.
+
+Reads a path or a text/binary stream line by line and yields bounded
+windows of complete Markdown blocks, so documents far larger than memory
+budget can be chunked window by window with chunk_markdown().
+
+Split points, in order of preference:
+1. Before a header line outside a code fence
+2. Before a block that follows a blank line outside a code fence (a blank
+   line always ends a table, so tables are never split here)
+3. Forced line boundary once a window reaches max_window_chars (only for
+   pathological input such as a single multi-megabyte table or fence)
+
+A window chunked on its own does not see the headers of earlier windows;
+HeaderContext carries the header stack across windows so header_path
+can be completed with the ancestors that precede the window.
+"""
+
+import bisect
+import io
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any
+
+DEFAULT_WINDOW_CHARS = 256 * 1024
+
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})(.*)$")
+_HEADER_RE = re.compile(r"^ {0,3}#{1,6}(\s|$)")
+_ATX_RE = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+
+# header_path the library gives content before the first header
+PREAMBLE_PATH = "/__preamble__"
+
+
+@dataclass
+class MarkdownWindow:
+    """A slice of the source made of whole lines."""
+
+    text: str
+    start_line: int  # 1-based line number of the first line in the source
+    index: int  # 0-based window index
+
+
+class FenceTracker:
+    """Tracks whether the current line is inside a fenced code block."""
+
+    def __init__(self) -> None:
+        self._open: str | None = None  # opening fence marker, e.g. "````"
+
+    @property
+    def inside(self) -> bool:
+        return self._open is not None
+
+    def feed(self, line: str) -> None:
+        """Update fence state with the next line (without newline)."""
+        match = _FENCE_RE.match(line)
+        if match is None:
+            return
+
+        marker, rest = match.group(1), match.group(2)
+        if self._open is None:
+            # Backtick fences cannot have backticks in the info string
+            if marker[0] == "`" and "`" in rest:
+                return
+            self._open = marker
+        elif (
+            marker[0] == self._open[0]
+            and len(marker) >= len(self._open)
+            and not rest.strip()
+        ):
+            self._open = None
+
+
+def scan_headers(lines: list[str]) -> dict[int, tuple[int, str]]:
+    """Map 0-based line index -> (level, title) of ATX headers outside fences."""
+    headers = {}
+    fences = FenceTracker()
+    for index, line in enumerate(lines):
+        stripped = line.rstrip("\r\n")
+        outside_fence = not fences.inside
+        fences.feed(stripped)
+        if outside_fence:
+            match = _ATX_RE.match(stripped)
+            if match:
+                level, title = len(match.group(1)), (match.group(2) or "").strip()
+                headers[index] = (level, title)
+    return headers
+
+
+class HeaderContext:
+    """Header stack carried across consecutive windows of one source."""
+
+    def __init__(self) -> None:
+        # (level, title) of the headers open at the current window start
+        self._stack: list[tuple[int, str]] = []
+        self._headers: list[tuple[int, str]] = []  # current window, in order
+        self._lines: list[int] = []  # 0-based line of each window header
+        self._top_levels: list[int] = []  # lowest level up to each header
+
+    def enter(self, text: str) -> None:
+        """Start the next window: close the previous one, scan this one."""
+        for level, title in self._headers:
+            while self._stack and self._stack[-1][0] >= level:
+                self._stack.pop()
+            self._stack.append((level, title))
+
+        headers = scan_headers(list(iter_text_lines(text)))
+        self._headers = list(headers.values())
+        self._lines = list(headers)
+        self._top_levels = []
+        for level, _title in self._headers:
+            top = self._top_levels[-1] if self._top_levels else level
+            self._top_levels.append(min(top, level))
+
+    def header_path(self, header_path: Any, start_line: int) -> Any:
+        """
+        header_path of a chunk with the ancestors from earlier windows.
+
+        Args:
+            header_path: Path the library computed within the window
+            start_line: 1-based line of the chunk within the window
+
+        Returns:
+            The completed path; unchanged in the first window
+        """
+        if not self._stack:
+            return header_path
+        count = bisect.bisect_left(self._lines, start_line)
+        if count == 0:
+            # Before the window's first header: continues an earlier section
+            return "".join(f"/{title}" for _level, title in self._stack)
+        if not isinstance(header_path, str) or not header_path.startswith("/"):
+            return header_path
+        if header_path == PREAMBLE_PATH:
+            return header_path
+        # The window's lowest header so far is the root of header_path
+        top = self._top_levels[count - 1]
+        prefix = "".join(f"/{title}" for level, title in self._stack if level < top)
+        return prefix + header_path
+
+
+def open_source(source: str | Path | IO[Any]) -> tuple[IO[str], bool]:
+    """
+    Return a text stream for a path or stream.
+
+    Returns:
+        (text stream, whether the caller owns it and must close it)
+    """
+    if isinstance(source, (str, Path)):
+        return open(source, "r", encoding="utf-8"), True
+    if isinstance(source, io.TextIOBase):
+        return source, False
+    # Binary stream: decode as UTF-8 without taking ownership
+    wrapper = io.TextIOWrapper(source, encoding="utf-8")
+    return wrapper, False
+
+
+def iter_text_lines(text: str) -> Iterator[str]:
+    """Yield the lines of an in-memory text, one at a time, with their newlines.
+
+    Unlike str.splitlines(), only one line is allocated at a time, so a
+    large string can be windowed without a second full copy.
+    """
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start : end + 1]
+        start = end + 1
+
+
+def iter_windows(
+    stream: Iterable[str],
+    window_chars: int = DEFAULT_WINDOW_CHARS,
+    max_window_chars: int | None = None,
+) -> Iterator[MarkdownWindow]:
+    """
+    Split a text stream into fence-aware windows of about window_chars.
+
+    Args:
+        stream: Text stream (or any iterable of lines) to read line by line
+        window_chars: Target window size; a split is made at the first safe
+            point once this size is reached
+        max_window_chars: Hard cap forcing a split at a line boundary
+            (default: 4 * window_chars)
+
+    Yields:
+        MarkdownWindow objects covering the source exactly, in order
+    """
+    if window_chars < 1:
+        raise ValueError(f"window_chars must be >= 1, got {window_chars}")
+    hard_cap = max_window_chars or window_chars * 4
+
+    fences = FenceTracker()
+    lines: list[str] = []
+    size = 0
+    start_line = 1
+    index = 0
+    # Latest safe split positions (split happens before lines[pos])
+    header_split = 0
+    blank_split = 0
+
+    def emit(split: int) -> MarkdownWindow:
+        nonlocal lines, size, start_line, index, header_split, blank_split
+        window = MarkdownWindow("".join(lines[:split]), start_line, index)
+        lines = lines[split:]
+        size = sum(len(line) for line in lines)
+        start_line += split
+        index += 1
+        header_split = max(0, header_split - split)
+        blank_split = max(0, blank_split - split)
+        return window
+
+    def choose_split() -> int:
+        # Prefer a header boundary unless it would leave a tiny window
+        if header_split:
+            head_size = sum(len(line) for line in lines[:header_split])
+            if head_size >= window_chars // 2:
+                return header_split
+        return max(header_split, blank_split)
+
+    for line in stream:
+        stripped = line.rstrip("\r\n")
+        outside_fence = not fences.inside
+        fences.feed(stripped)
+
+        if outside_fence and lines:
+            if _HEADER_RE.match(stripped):
+                header_split = len(lines)
+            elif stripped.strip() and not lines[-1].strip():
+                # New block after a blank line (never inside a table)
+                blank_split = len(lines)
+
+        lines.append(line)
+        size += len(line)
+
+        if size >= window_chars:
+            split = choose_split()
+            if split:
+                yield emit(split)
+            elif size >= hard_cap:
+                yield emit(len(lines))
+
+    if lines:
+        yield emit(len(lines))
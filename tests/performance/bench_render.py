@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Compare metadata render formats on the golden fixtures.
+
+Chunks every fixture once, then times Stage 2 rendering per format and
+reports bytes per chunk and render time per chunk.
+
+Usage:
+    python tests/performance/bench_render.py [--repeat N]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from adapter import MigrationAdapter  # noqa: E402
+from metadata_render import METADATA_FORMATS, RenderOptions  # noqa: E402
+
+FIXTURES_DIR = ROOT / "tests" / "baseline_data" / "fixtures"
+
+
+def bench_render(repeat: int = 20) -> dict[str, dict[str, float]]:
+    """Return {format: {"chunks", "bytes_per_chunk", "us_per_chunk"}}."""
+    adapter = MigrationAdapter()
+    config = adapter.build_chunker_config()
+    raw_chunks = []
+    for fixture in sorted(FIXTURES_DIR.glob("*.md")):
+        text = fixture.read_text(encoding="utf-8")
+        raw_chunks.extend(adapter._perform_chunking(text, config, False, False))
+
+    results = {}
+    for metadata_format in METADATA_FORMATS:
+        options = RenderOptions(metadata_format=metadata_format)
+        rendered = adapter._render_chunks(raw_chunks, True, False, options)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            adapter._render_chunks(raw_chunks, True, False, options)
+        elapsed = time.perf_counter() - start
+
+        total_bytes = sum(len(chunk.encode("utf-8")) for chunk in rendered)
+        results[metadata_format] = {
+            "chunks": len(rendered),
+            "bytes_per_chunk": total_bytes / max(len(rendered), 1),
+            "us_per_chunk": elapsed / repeat / max(len(rendered), 1) * 1e6,
+        }
+
+    structured = [adapter._render_chunk_structured(c, False) for c in raw_chunks]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        [adapter._render_chunk_structured(chunk, False) for chunk in raw_chunks]
+    elapsed = time.perf_counter() - start
+
+    # Size as sent in a JSON message
+    total_bytes = sum(
+        len(json.dumps(item, ensure_ascii=False).encode("utf-8"))
+        for item in structured
+    )
+    results["structured"] = {
+        "chunks": len(structured),
+        "bytes_per_chunk": total_bytes / max(len(structured), 1),
+        "us_per_chunk": elapsed / repeat / max(len(structured), 1) * 1e6,
+    }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = bench_render(args.repeat)
+    print(f"{'format':<12}{'chunks':>8}{'bytes/chunk':>14}{'us/chunk':>12}")
+    for name, row in results.items():
+        print(
+            f"{name:<12}{row['chunks']:>8}"
+            f"{row['bytes_per_chunk']:>14.1f}{row['us_per_chunk']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
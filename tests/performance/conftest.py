@@ -0,0 +1,109 @@
+"""Shared fixtures for the benchmark suite.
+
+Results from every benchmark module are collected in one session-wide
+ResultsManager and written to tests/performance/results/ at session end.
+"""
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from adapter import MigrationAdapter
+
+from .corpus_selector import CorpusDocument, CorpusSelector
+from .results_manager import ResultsManager
+from .utils import aggregate_results, run_benchmark
+
+CORPUS_PATH = Path(__file__).parent.parent / "corpus"
+RESULTS_PATH = Path(__file__).parent / "results"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption(
+        "--bench-sample",
+        type=int,
+        default=3,
+        help="Documents per category (0: whole corpus, default: 3)",
+    )
+    group.addoption(
+        "--bench-runs", type=int, default=3, help="Measurement runs per document"
+    )
+    group.addoption(
+        "--save-baseline",
+        action="store_true",
+        default=False,
+        help="Write results/baseline.json from this run (never written otherwise)",
+    )
+
+
+@pytest.fixture(scope="session")
+def bench_settings(request) -> dict[str, Any]:
+    sample = request.config.getoption("--bench-sample", default=3)
+    return {
+        "sample": sample or None,
+        "warmup_runs": 1,
+        "measurement_runs": request.config.getoption("--bench-runs", default=3),
+    }
+
+
+@pytest.fixture(scope="session")
+def corpus_selector() -> CorpusSelector:
+    return CorpusSelector(CORPUS_PATH)
+
+
+@pytest.fixture(scope="session")
+def results_manager(request):
+    manager = ResultsManager(RESULTS_PATH)
+    yield manager
+
+    if not manager.results:
+        return
+    manager.save_all()
+    # Only an explicit save replaces the reference, so a run on a
+    # regressed tree never becomes the baseline by accident
+    if request.config.getoption("--save-baseline", default=False):
+        manager.save_baseline()
+
+
+@pytest.fixture(scope="session")
+def bench_adapter() -> MigrationAdapter:
+    # No result cache: every run must exercise the full chunking path
+    return MigrationAdapter()
+
+
+@pytest.fixture(scope="session")
+def benchmark_documents(
+    bench_adapter, bench_settings
+) -> Callable[..., dict[str, Any]]:
+    """Return a function benchmarking run_chunking over documents."""
+
+    def run(
+        documents: list[CorpusDocument], config: Any, **chunk_kwargs: Any
+    ) -> dict[str, Any]:
+        records = []
+        for doc in documents:
+            text = doc.read()
+            stats = run_benchmark(
+                bench_adapter.run_chunking,
+                text,
+                config,
+                warmup_runs=bench_settings["warmup_runs"],
+                measurement_runs=bench_settings["measurement_runs"],
+                **chunk_kwargs,
+            )
+            records.append(
+                {
+                    "name": doc.name,
+                    "size_bytes": len(text.encode("utf-8")),
+                    "chunk_count": len(stats["result"]),
+                    "mean_ms": stats["mean_ms"],
+                    "median_ms": stats["median_ms"],
+                    "peak_memory_mb": stats["peak_memory_mb"],
+                }
+            )
+        return aggregate_results(records)
+
+    return run
@@ -0,0 +1,173 @@
+"""
+Benchmark document selection from tests/corpus/.
+
+Documents are categorized by metadata.csv (content category, expected
+strategy); files missing from the CSV fall back to their directory name.
+Corpus meta-documentation (README, INDEX, USAGE) is never benchmarked.
+"""
+
+import csv
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+META_DOCUMENTS = frozenset({"README.md", "INDEX.md", "USAGE.md"})
+
+# (name, lower bound inclusive, upper bound exclusive) in bytes
+SIZE_CATEGORIES = (
+    ("tiny", 0, 1024),
+    ("small", 1024, 5 * 1024),
+    ("medium", 5 * 1024, 20 * 1024),
+    ("large", 20 * 1024, 100 * 1024),
+    ("very_large", 100 * 1024, float("inf")),
+)
+
+
+def size_category(size_bytes: int) -> str:
+    """Return the size category name for a document size."""
+    for name, low, high in SIZE_CATEGORIES:
+        if low <= size_bytes < high:
+            return name
+    return SIZE_CATEGORIES[-1][0]
+
+
+@dataclass
+class CorpusDocument:
+    """A corpus document with its benchmark categories."""
+
+    path: Path
+    category: str
+    size_bytes: int
+    expected_strategy: str | None = None
+    code_ratio: float = 0.0
+    list_count: int = 0
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    @property
+    def size_category(self) -> str:
+        return size_category(self.size_bytes)
+
+    def read(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+
+class CorpusSelector:
+    """Scans the corpus once and serves categorized samples."""
+
+    def __init__(self, corpus_path: Path, seed: int = 42) -> None:
+        """
+        Args:
+            corpus_path: tests/corpus directory
+            seed: Seed for representative sampling, fixed for comparable runs
+        """
+        self.corpus_path = Path(corpus_path)
+        self.seed = seed
+        self.documents = self._scan()
+
+    def _scan(self) -> list[CorpusDocument]:
+        paths = {
+            path.name: path
+            for path in sorted(self.corpus_path.rglob("*.md"))
+            if path.name not in META_DOCUMENTS
+        }
+
+        documents = []
+        metadata_path = self.corpus_path / "metadata.csv"
+        if metadata_path.exists():
+            with open(metadata_path, "r", encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    path = paths.pop(row["filename"], None)
+                    if path is None:
+                        continue
+                    documents.append(
+                        CorpusDocument(
+                            path=path,
+                            category=row["category"],
+                            size_bytes=path.stat().st_size,
+                            expected_strategy=row.get("expected_strategy") or None,
+                            code_ratio=float(row.get("code_ratio") or 0),
+                            list_count=int(row.get("list_count") or 0),
+                        )
+                    )
+
+        # Files not listed in metadata.csv, e.g. deep_fencing.md
+        for path in paths.values():
+            parent = path.parent
+            category = (
+                parent.name if parent != self.corpus_path else "uncategorized"
+            )
+            documents.append(
+                CorpusDocument(
+                    path=path, category=category, size_bytes=path.stat().st_size
+                )
+            )
+
+        return sorted(documents, key=lambda d: (d.size_bytes, d.name))
+
+    def by_size_category(self) -> dict[str, list[CorpusDocument]]:
+        """Group documents by size category (all categories present)."""
+        groups: dict[str, list[CorpusDocument]] = {
+            name: [] for name, _, _ in SIZE_CATEGORIES
+        }
+        for doc in self.documents:
+            groups[doc.size_category].append(doc)
+        return groups
+
+    def by_content_type(self) -> dict[str, list[CorpusDocument]]:
+        """Group documents by metadata.csv category."""
+        groups: dict[str, list[CorpusDocument]] = {}
+        for doc in self.documents:
+            groups.setdefault(doc.category, []).append(doc)
+        return groups
+
+    def by_expected_strategy(self) -> dict[str, list[CorpusDocument]]:
+        """Group documents by the strategy metadata.csv expects."""
+        groups: dict[str, list[CorpusDocument]] = {}
+        for doc in self.documents:
+            if doc.expected_strategy:
+                groups.setdefault(doc.expected_strategy, []).append(doc)
+        return groups
+
+    def sample(
+        self, documents: list[CorpusDocument], count: int | None
+    ) -> list[CorpusDocument]:
+        """
+        Pick up to count documents spread across the size range.
+
+        None returns all documents. The pick is deterministic for a seed.
+        """
+        if count is None or len(documents) <= count:
+            return list(documents)
+        ordered = sorted(documents, key=lambda d: (d.size_bytes, d.name))
+        # One random pick per equal-width slice of the size-sorted list
+        rng = random.Random(self.seed)
+        step = len(ordered) / count
+        return [
+            ordered[int(i * step) + rng.randrange(max(int(step), 1))]
+            for i in range(count)
+        ]
+
+    def code_heavy(self, count: int) -> list[CorpusDocument]:
+        """Return the count documents with the highest code ratio."""
+        return sorted(self.documents, key=lambda d: (-d.code_ratio, d.name))[:count]
+
+    def list_heavy(self, count: int) -> list[CorpusDocument]:
+        """Return the count documents with the most list items per KB."""
+        return sorted(
+            self.documents,
+            key=lambda d: (-d.list_count / max(d.size_bytes / 1024, 1), d.name),
+        )[:count]
+
+    def get(self, name: str) -> CorpusDocument:
+        """Return a document by file name."""
+        for doc in self.documents:
+            if doc.name == name:
+                return doc
+        raise KeyError(name)
+
+    def largest(self) -> CorpusDocument:
+        """Return the largest document (base for scalability inputs)."""
+        return max(self.documents, key=lambda d: d.size_bytes)
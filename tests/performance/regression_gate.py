@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Performance regression gate for MigrationAdapter.run_chunking.
+
+Times representative corpus documents (code-heavy, list-heavy and
+large_concat_1mb.md), compares them with the regression_gate section of
+results/baseline.json (the benchmark suite's tracked baseline) and
+exits non-zero when throughput drops or peak memory grows beyond the
+per-case tolerance. The baseline is only written by --update-baseline.
+
+Comparison is deliberately conservative so it is not flaky:
+- throughput is the median of N passes with a bootstrap confidence
+  interval; a case regresses only if even the CI upper bound is below
+  the tolerated minimum
+- throughput is scaled by a pure-Python calibration workload, so a
+  baseline recorded on a faster or slower machine stays comparable
+- peak memory (tracemalloc) is the median of its runs
+
+Usage (from project root):
+    python tests/performance/regression_gate.py [--runs N]
+    python tests/performance/regression_gate.py --update-baseline
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from adapter import MigrationAdapter  # noqa: E402
+from tests.performance.corpus_selector import (  # noqa: E402
+    CorpusDocument,
+    CorpusSelector,
+)
+from tests.performance.results_manager import environment_info  # noqa: E402
+from tests.performance.utils import measure_memory, median_ci  # noqa: E402
+
+CORPUS_PATH = ROOT / "tests" / "corpus"
+BASELINE_PATH = Path(__file__).parent / "results" / "baseline.json"
+# Key of the gate measurements in the shared baseline file
+BASELINE_SECTION = "regression_gate"
+
+
+@dataclass(frozen=True)
+class GateCase:
+    """A group of documents compared as one unit."""
+
+    name: str
+    throughput_tolerance: float  # allowed relative throughput drop
+    memory_tolerance: float  # allowed relative peak memory growth
+
+
+CASES = (
+    GateCase("code_heavy", throughput_tolerance=0.15, memory_tolerance=0.10),
+    GateCase("list_heavy", throughput_tolerance=0.15, memory_tolerance=0.10),
+    # Single 1MB document: fewer, longer runs, noisier GC pauses
+    GateCase("large_document", throughput_tolerance=0.20, memory_tolerance=0.10),
+)
+
+
+def select_documents(corpus: CorpusSelector, case: str) -> list[CorpusDocument]:
+    if case == "code_heavy":
+        return corpus.code_heavy(3)
+    if case == "list_heavy":
+        return corpus.list_heavy(3)
+    if case == "large_document":
+        return [corpus.get("large_concat_1mb.md")]
+    raise ValueError(f"Unknown gate case: {case}")
+
+
+def calibrate(runs: int = 5) -> float:
+    """Median ms of a fixed pure-Python workload (machine speed reference)."""
+    text = (CORPUS_PATH / "deep_fencing.md").read_text(encoding="utf-8")
+    pattern = re.compile(r"^(#{1,6}|`{3,}|\s*[-*+]\s)", re.MULTILINE)
+
+    def workload() -> None:
+        for _ in range(20):
+            lines = text.splitlines()
+            json.loads(json.dumps({"lines": lines}))
+            pattern.findall(text)
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        workload()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def measure_case(
+    adapter: MigrationAdapter,
+    documents: list[CorpusDocument],
+    runs: int,
+    memory_runs: int,
+) -> dict[str, Any]:
+    """Throughput samples (one per pass over the documents) and peak memory."""
+    config = adapter.build_chunker_config()
+    texts = [doc.read() for doc in documents]
+    total_kb = sum(len(text.encode("utf-8")) for text in texts) / 1024
+
+    def one_pass() -> None:
+        for text in texts:
+            adapter.run_chunking(text, config)
+
+    one_pass()  # warm-up
+    throughput = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        one_pass()
+        throughput.append(total_kb / (time.perf_counter() - start))
+
+    memory = [measure_memory(one_pass)[1] for _ in range(memory_runs)]
+    median, lower, upper = median_ci(throughput)
+    return {
+        "documents": [doc.name for doc in documents],
+        "total_kb": total_kb,
+        "throughput_kb_s": median,
+        "throughput_ci": [lower, upper],
+        "throughput_samples": throughput,
+        "peak_memory_mb": statistics.median(memory),
+    }
+
+
+def compare_case(
+    case: GateCase,
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    speed_scale: float,
+) -> list[str]:
+    """
+    Return failure messages for one case (empty list: no regression).
+
+    speed_scale is baseline calibration time / current calibration time,
+    i.e. > 1 when this machine is faster than the baseline machine.
+    """
+    failures = []
+
+    expected = baseline["throughput_kb_s"] * speed_scale
+    minimum = expected * (1 - case.throughput_tolerance)
+    upper = current["throughput_ci"][1]
+    if upper < minimum:
+        failures.append(
+            f"{case.name}: throughput {current['throughput_kb_s']:.0f} KB/s "
+            f"(95% CI upper {upper:.0f}) < minimum {minimum:.0f} KB/s "
+            f"(baseline {expected:.0f}, tolerance {case.throughput_tolerance:.0%})"
+        )
+
+    limit = baseline["peak_memory_mb"] * (1 + case.memory_tolerance)
+    if current["peak_memory_mb"] > limit:
+        failures.append(
+            f"{case.name}: peak memory {current['peak_memory_mb']:.1f} MB > "
+            f"limit {limit:.1f} MB (baseline {baseline['peak_memory_mb']:.1f}, "
+            f"tolerance {case.memory_tolerance:.0%})"
+        )
+    return failures
+
+
+def run_measurements(runs: int = 7, memory_runs: int = 3) -> dict[str, Any]:
+    """Measure every gate case plus the calibration workload."""
+    corpus = CorpusSelector(CORPUS_PATH)
+    adapter = MigrationAdapter()  # no result cache
+    return {
+        "environment": environment_info(),
+        "runs": runs,
+        "calibration_ms": calibrate(),
+        "cases": {
+            case.name: measure_case(
+                adapter, select_documents(corpus, case.name), runs, memory_runs
+            )
+            for case in CASES
+        },
+    }
+
+
+def _read_baseline_file(path: Path) -> dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict[str, Any] | None:
+    """Gate measurements stored in the baseline file, None if not recorded."""
+    return _read_baseline_file(path).get(BASELINE_SECTION)
+
+
+def save_baseline(measurements: dict[str, Any], path: Path = BASELINE_PATH) -> None:
+    """Store gate measurements, keeping the benchmark suite's sections."""
+    data = _read_baseline_file(path)
+    data[BASELINE_SECTION] = measurements
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def run_gate(measurements: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """Compare measurements with a baseline; return all failure messages."""
+    speed_scale = baseline["calibration_ms"] / measurements["calibration_ms"]
+    failures = []
+    for case in CASES:
+        if case.name not in baseline["cases"]:
+            continue
+        failures += compare_case(
+            case,
+            measurements["cases"][case.name],
+            baseline["cases"][case.name],
+            speed_scale,
+        )
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Performance regression gate")
+    parser.add_argument("--runs", type=int, default=7, help="Timed passes per case")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Record this run as the new baseline instead of comparing",
+    )
+    args = parser.parse_args()
+
+    measurements = run_measurements(runs=args.runs)
+    for name, case in measurements["cases"].items():
+        lower, upper = case["throughput_ci"]
+        print(
+            f"{name:<16}{case['throughput_kb_s']:>10.0f} KB/s "
+            f"[{lower:.0f}, {upper:.0f}]{case['peak_memory_mb']:>10.1f} MB"
+        )
+
+    if args.update_baseline:
+        save_baseline(measurements)
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    baseline = load_baseline()
+    if baseline is None:
+        print(
+            f"No {BASELINE_SECTION} baseline in {BASELINE_PATH}; record one with "
+            "make benchmark-baseline on the reference machine"
+        )
+        return 1
+
+    failures = run_gate(measurements, baseline)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if not failures:
+        print("No performance regressions")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Benchmark results collection and reporting.
+
+Writes, under tests/performance/results/:
+- latest_run.json: environment plus every result record
+- results_all.csv: one flat row per record
+- performance_report.md: human-readable summary tables
+- baseline.json: per-record key metrics of a reference run (only on an
+  explicit save; the regression gate keeps its own section in it)
+"""
+
+import csv
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Metrics copied into baseline.json for each record
+BASELINE_METRICS = (
+    "mean_ms",
+    "median_ms",
+    "throughput_kb_per_s",
+    "peak_memory_mb",
+)
+
+
+def plugin_version() -> str:
+    """Read the plugin version from manifest.yaml."""
+    try:
+        with open(ROOT / "manifest.yaml", "r", encoding="utf-8") as f:
+            return str((yaml.safe_load(f) or {}).get("version", "unknown"))
+    except (OSError, yaml.YAMLError):
+        return "unknown"
+
+
+def environment_info() -> dict[str, Any]:
+    """Describe the machine and versions the benchmarks ran on."""
+    try:
+        from importlib.metadata import version
+
+        chunkana_version = version("chunkana")
+    except Exception:
+        chunkana_version = "unknown"
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "plugin_version": plugin_version(),
+        "chunkana_version": chunkana_version,
+        "python_version": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+class ResultsManager:
+    """Collects benchmark records and exports them."""
+
+    def __init__(self, results_path: Path) -> None:
+        self.results_path = Path(results_path)
+        self.environment = environment_info()
+        self.results: list[dict[str, Any]] = []
+
+    def add_result(self, benchmark: str, name: str, metrics: dict[str, Any]) -> None:
+        """
+        Record one measurement.
+
+        Args:
+            benchmark: Suite name (size, content_type, strategy, config,
+                scalability)
+            name: Case name within the suite, e.g. "medium"
+            metrics: JSON-serializable metrics
+        """
+        self.results.append({"benchmark": benchmark, "name": name, **metrics})
+
+    def results_for(self, benchmark: str) -> list[dict[str, Any]]:
+        return [r for r in self.results if r["benchmark"] == benchmark]
+
+    def save_json(self, filename: str = "latest_run.json") -> Path:
+        path = self._prepare(filename)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"environment": self.environment, "results": self.results},
+                f,
+                indent=2,
+                default=str,
+            )
+        return path
+
+    def save_csv(self, filename: str = "results_all.csv") -> Path:
+        path = self._prepare(filename)
+        fields: list[str] = []
+        for record in self.results:
+            for key, value in record.items():
+                if key not in fields and not isinstance(value, (list, dict)):
+                    fields.append(key)
+
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(self.results)
+        return path
+
+    def save_report(self, filename: str = "performance_report.md") -> Path:
+        path = self._prepare(filename)
+        path.write_text(self.generate_report(), encoding="utf-8")
+        return path
+
+    def generate_report(self) -> str:
+        """Render all records as markdown tables, one section per suite."""
+        env = self.environment
+        lines = [
+            "# Performance Report",
+            "",
+            f"- Plugin version: {env['plugin_version']}",
+            f"- chunkana: {env['chunkana_version']}",
+            f"- Python: {env['python_version']} on {env['platform']}",
+            f"- Generated: {env['timestamp']}",
+        ]
+
+        columns = (
+            ("name", "Case"),
+            ("documents", "Docs"),
+            ("total_bytes", "Bytes"),
+            ("mean_ms", "Mean ms"),
+            ("median_ms", "Median ms"),
+            ("throughput_kb_per_s", "KB/s"),
+            ("throughput_chunks_per_s", "Chunks/s"),
+            ("peak_memory_mb", "Peak MB"),
+        )
+        benchmarks = list(dict.fromkeys(r["benchmark"] for r in self.results))
+        for benchmark in benchmarks:
+            lines += [
+                "",
+                f"## {benchmark.replace('_', ' ').title()}",
+                "",
+                "| " + " | ".join(title for _, title in columns) + " |",
+                "|" + "---|" * len(columns),
+            ]
+            for record in self.results_for(benchmark):
+                cells = [_format_cell(record.get(key)) for key, _ in columns]
+                lines.append("| " + " | ".join(cells) + " |")
+
+            extras = [r for r in self.results_for(benchmark) if r.get("regression")]
+            for record in extras:
+                reg = record["regression"]
+                lines.append("")
+                lines.append(
+                    f"{record['name']}: {reg['slope_ms_per_kb']:.3f} ms/KB, "
+                    f"intercept {reg['intercept_ms']:.2f} ms, "
+                    f"R² {reg['r_squared']:.4f}"
+                )
+
+        return "\n".join(lines) + "\n"
+
+    def save_all(self) -> list[Path]:
+        """Write JSON, CSV and markdown outputs."""
+        return [self.save_json(), self.save_csv(), self.save_report()]
+
+    def baseline_path(self) -> Path:
+        return self.results_path / "baseline.json"
+
+    def save_baseline(self) -> Path:
+        """Store key metrics of this run as the baseline.
+
+        Other sections of the file (the regression gate's) are kept.
+        """
+        baseline = self.load_baseline() or {}
+        path = self._prepare("baseline.json")
+        baseline["environment"] = self.environment
+        baseline["results"] = {
+            f"{r['benchmark']}/{r['name']}": {
+                key: r[key] for key in BASELINE_METRICS if r.get(key) is not None
+            }
+            for r in self.results
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        return path
+
+    def load_baseline(self) -> dict[str, Any] | None:
+        """Return the stored baseline, or None if there is none yet."""
+        try:
+            with open(self.baseline_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _prepare(self, filename: str) -> Path:
+        self.results_path.mkdir(parents=True, exist_ok=True)
+        return self.results_path / filename
+
+
+def _format_cell(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
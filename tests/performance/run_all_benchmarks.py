@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Run the whole benchmark suite and write reports.
+
+Results go to tests/performance/results/ (latest_run.json,
+results_all.csv, performance_report.md). The tracked baseline.json is
+only written with --save-baseline.
+
+Usage (from project root):
+    python tests/performance/run_all_benchmarks.py [--full] [--save-baseline]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+TEST_FILES = [
+    "tests/performance/test_benchmark_size.py",
+    "tests/performance/test_benchmark_content_type.py",
+    "tests/performance/test_benchmark_strategy.py",
+    "tests/performance/test_benchmark_config.py",
+    "tests/performance/test_benchmark_scalability.py",
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run performance benchmarks")
+    parser.add_argument(
+        "--sample", type=int, default=3, help="Documents per category (default: 3)"
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="Benchmark the whole corpus"
+    )
+    parser.add_argument(
+        "--runs", type=int, default=3, help="Measurement runs per document"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Write results/baseline.json from this run",
+    )
+    args, pytest_args = parser.parse_known_args()
+
+    sample = 0 if args.full else args.sample
+    options = [
+        f"--bench-sample={sample}",
+        f"--bench-runs={args.runs}",
+        "-p",
+        "no:cacheprovider",
+    ]
+    if args.save_baseline:
+        options.append("--save-baseline")
+
+    return pytest.main(
+        [str(ROOT / path) for path in TEST_FILES] + options + pytest_args
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
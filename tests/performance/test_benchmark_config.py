@@ -0,0 +1,49 @@
+"""Configuration benchmarks: impact of chunk size, overlap and tool flags."""
+
+import pytest
+
+pytestmark = pytest.mark.slow
+
+# name -> (build_chunker_config kwargs, run_chunking kwargs)
+CONFIG_PROFILES = {
+    "default": ({}, {}),
+    "code_heavy": ({"max_chunk_size": 8192, "strategy": "code_aware"}, {}),
+    "structured": ({"strategy": "structural"}, {}),
+    "minimal": (
+        {"max_chunk_size": 1024, "chunk_overlap": 0},
+        {"include_metadata": False},
+    ),
+    "no_overlap": ({"chunk_overlap": 0}, {}),
+    "hierarchical": ({}, {"enable_hierarchy": True}),
+}
+
+MAX_DOCUMENT_BYTES = 100 * 1024
+
+
+class TestConfigBenchmarks:
+    """Processing time per configuration profile on a shared sample."""
+
+    @pytest.mark.parametrize("profile", list(CONFIG_PROFILES))
+    def test_config_profile(
+        self,
+        profile,
+        corpus_selector,
+        results_manager,
+        benchmark_documents,
+        bench_adapter,
+        bench_settings,
+    ):
+        config_kwargs, chunk_kwargs = CONFIG_PROFILES[profile]
+        candidates = [
+            doc
+            for doc in corpus_selector.documents
+            if doc.size_bytes < MAX_DOCUMENT_BYTES
+        ]
+        count = bench_settings["sample"] and bench_settings["sample"] * 3
+        documents = corpus_selector.sample(candidates, count)
+        config = bench_adapter.build_chunker_config(**config_kwargs)
+
+        summary = benchmark_documents(documents, config, **chunk_kwargs)
+        results_manager.add_result("config", profile, summary)
+
+        assert summary["total_chunks"] >= len(documents)
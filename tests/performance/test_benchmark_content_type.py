@@ -0,0 +1,28 @@
+"""Content-type benchmarks: run_chunking per metadata.csv category."""
+
+import pytest
+
+pytestmark = pytest.mark.slow
+
+
+class TestContentTypeBenchmarks:
+    """Processing time per content category."""
+
+    def test_content_types(
+        self,
+        corpus_selector,
+        results_manager,
+        benchmark_documents,
+        bench_adapter,
+        bench_settings,
+    ):
+        config = bench_adapter.build_chunker_config()
+        groups = corpus_selector.by_content_type()
+        assert groups, "Corpus has no categorized documents"
+
+        for category, documents in sorted(groups.items()):
+            documents = corpus_selector.sample(documents, bench_settings["sample"])
+            summary = benchmark_documents(documents, config)
+            results_manager.add_result("content_type", category, summary)
+
+            assert summary["total_chunks"] >= len(documents)
@@ -0,0 +1,79 @@
+"""Scalability analysis: linear fit of time and memory against input size."""
+
+import pytest
+
+from .utils import PERFORMANCE_THRESHOLDS, linear_regression, run_benchmark
+
+pytestmark = pytest.mark.slow
+
+# Input sizes cut from the largest corpus document
+SIZES_KB = (8, 32, 128, 256, 512, 1024)
+
+
+def truncate_at_block(text: str, size_bytes: int) -> str:
+    """Cut text to about size_bytes at a blank-line block boundary."""
+    if len(text) <= size_bytes:
+        return text
+    head = text[:size_bytes]
+    cut = head.rfind("\n\n")
+    return head[: cut + 1] if cut > 0 else head
+
+
+class TestScalabilityBenchmarks:
+    """Regression of processing time and peak memory on document size."""
+
+    def test_time_and_memory_scaling(
+        self, corpus_selector, results_manager, bench_adapter, bench_settings
+    ):
+        base = corpus_selector.largest().read()
+        config = bench_adapter.build_chunker_config()
+
+        points = []
+        for size_kb in SIZES_KB:
+            text = truncate_at_block(base, size_kb * 1024)
+            stats = run_benchmark(
+                bench_adapter.run_chunking,
+                text,
+                config,
+                warmup_runs=bench_settings["warmup_runs"],
+                measurement_runs=bench_settings["measurement_runs"],
+            )
+            points.append(
+                {
+                    "size_kb": len(text.encode("utf-8")) / 1024,
+                    "mean_ms": stats["mean_ms"],
+                    "peak_memory_mb": stats["peak_memory_mb"],
+                    "chunk_count": len(stats["result"]),
+                }
+            )
+            if len(text) == len(base):
+                break
+
+        sizes = [p["size_kb"] for p in points]
+        time_fit = linear_regression(sizes, [p["mean_ms"] for p in points])
+        memory_fit = linear_regression(sizes, [p["peak_memory_mb"] for p in points])
+        largest = points[-1]
+
+        results_manager.add_result(
+            "scalability",
+            "time_vs_size",
+            {
+                "documents": len(points),
+                "total_bytes": int(largest["size_kb"] * 1024),
+                "mean_ms": largest["mean_ms"],
+                "peak_memory_mb": largest["peak_memory_mb"],
+                "regression": {
+                    "slope_ms_per_kb": time_fit["slope"],
+                    "intercept_ms": time_fit["intercept"],
+                    "r_squared": time_fit["r_squared"],
+                    "memory_mb_per_kb": memory_fit["slope"],
+                    "memory_r_squared": memory_fit["r_squared"],
+                    "linear": time_fit["r_squared"]
+                    >= PERFORMANCE_THRESHOLDS["scaling_r_squared"],
+                },
+                "points": points,
+            },
+        )
+
+        assert len(points) >= 2
+        assert time_fit["slope"] > 0
@@ -0,0 +1,35 @@
+"""Size-based benchmarks: run_chunking across document size categories."""
+
+import pytest
+
+from .corpus_selector import SIZE_CATEGORIES
+from .utils import check_thresholds
+
+pytestmark = pytest.mark.slow
+
+
+class TestSizeBenchmarks:
+    """Processing time, throughput and memory per size category."""
+
+    @pytest.mark.parametrize("category", [name for name, _, _ in SIZE_CATEGORIES])
+    def test_size_category(
+        self,
+        category,
+        corpus_selector,
+        results_manager,
+        benchmark_documents,
+        bench_adapter,
+        bench_settings,
+    ):
+        documents = corpus_selector.sample(
+            corpus_selector.by_size_category()[category], bench_settings["sample"]
+        )
+        if not documents:
+            pytest.skip(f"No {category} documents in corpus")
+
+        summary = benchmark_documents(documents, bench_adapter.build_chunker_config())
+        summary["thresholds"] = check_thresholds(summary)
+        results_manager.add_result("size", category, summary)
+
+        assert summary["total_chunks"] >= len(documents)
+        assert summary["mean_ms"] > 0
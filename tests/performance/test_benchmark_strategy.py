@@ -0,0 +1,39 @@
+"""Strategy benchmarks: the same documents under each strategy override."""
+
+import pytest
+
+pytestmark = pytest.mark.slow
+
+# Tool strategy options (see tools/markdown_chunk_tool.yaml)
+STRATEGIES = ("auto", "code_aware", "list_aware", "structural", "fallback")
+
+# Keep strategy runs comparable and bounded: skip very large documents
+MAX_DOCUMENT_BYTES = 100 * 1024
+
+
+class TestStrategyBenchmarks:
+    """Strategy-specific processing time on a shared document sample."""
+
+    @pytest.mark.parametrize("strategy", STRATEGIES)
+    def test_strategy(
+        self,
+        strategy,
+        corpus_selector,
+        results_manager,
+        benchmark_documents,
+        bench_adapter,
+        bench_settings,
+    ):
+        candidates = [
+            doc
+            for doc in corpus_selector.documents
+            if doc.size_bytes < MAX_DOCUMENT_BYTES
+        ]
+        count = bench_settings["sample"] and bench_settings["sample"] * 3
+        documents = corpus_selector.sample(candidates, count)
+        config = bench_adapter.build_chunker_config(strategy=strategy)
+
+        summary = benchmark_documents(documents, config)
+        results_manager.add_result("strategy", strategy, summary)
+
+        assert summary["total_chunks"] >= len(documents)
@@ -0,0 +1,84 @@
+"""Performance regression gate against results/baseline.json."""
+
+import pytest
+
+from .regression_gate import (
+    CASES,
+    GateCase,
+    compare_case,
+    load_baseline,
+    run_gate,
+    run_measurements,
+    save_baseline,
+)
+
+CASE = GateCase("code_heavy", throughput_tolerance=0.15, memory_tolerance=0.10)
+BASELINE = {"throughput_kb_s": 1000.0, "peak_memory_mb": 10.0}
+
+
+def _current(median, lower, upper, memory=10.0):
+    return {
+        "throughput_kb_s": median,
+        "throughput_ci": [lower, upper],
+        "peak_memory_mb": memory,
+    }
+
+
+class TestCompareCase:
+    """Tests for the comparison rules."""
+
+    def test_within_tolerance_passes(self):
+        assert compare_case(CASE, _current(900, 880, 920), BASELINE, 1.0) == []
+
+    def test_noisy_median_with_overlapping_ci_passes(self):
+        """A low median alone does not fail while the CI reaches the limit."""
+        assert compare_case(CASE, _current(800, 700, 900), BASELINE, 1.0) == []
+
+    def test_throughput_drop_fails(self):
+        failures = compare_case(CASE, _current(700, 680, 720), BASELINE, 1.0)
+        assert len(failures) == 1
+        assert "throughput" in failures[0]
+
+    def test_machine_speed_is_scaled(self):
+        """A 2x slower machine halves the expected throughput."""
+        assert compare_case(CASE, _current(500, 480, 520), BASELINE, 0.5) == []
+
+    def test_memory_growth_fails(self):
+        failures = compare_case(CASE, _current(1000, 990, 1010, 11.5), BASELINE, 1.0)
+        assert len(failures) == 1
+        assert "peak memory" in failures[0]
+
+
+class TestBaselineFile:
+    """Tests for the shared baseline file."""
+
+    def test_gate_section_keeps_suite_results(self, tmp_path):
+        """Suite and gate baselines live side by side in one file."""
+        path = tmp_path / "baseline.json"
+        path.write_text('{"results": {"size/tiny": {"mean_ms": 1.0}}}')
+
+        save_baseline({"calibration_ms": 5.0, "cases": {}}, path)
+
+        assert load_baseline(path) == {"calibration_ms": 5.0, "cases": {}}
+        assert '"size/tiny"' in path.read_text()
+
+    def test_missing_section(self, tmp_path):
+        path = tmp_path / "baseline.json"
+        assert load_baseline(path) is None
+        path.write_text('{"results": {}}')
+        assert load_baseline(path) is None
+
+
+@pytest.mark.slow
+class TestRegressionGate:
+    """Runs the gate; refresh the baseline with --update-baseline."""
+
+    def test_no_regressions(self):
+        baseline = load_baseline()
+        if baseline is None:
+            pytest.skip("No regression_gate baseline in results/baseline.json")
+
+        measurements = run_measurements()
+
+        assert set(measurements["cases"]) == {case.name for case in CASES}
+        assert run_gate(measurements, baseline) == []
@@ -0,0 +1,206 @@
+"""
+Measurement utilities for the benchmark suite.
+
+Timing uses time.perf_counter(); memory uses tracemalloc peaks. Memory is
+measured in a separate run because tracemalloc slows allocation-heavy
+code down several times and would distort the timings.
+"""
+
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+# Acceptance thresholds from tests/performance/README.md
+PERFORMANCE_THRESHOLDS = {
+    "ms_per_100kb": 100.0,
+    "throughput_kb_s": 1000.0,
+    "memory_mb_per_kb": 0.2,
+    "scaling_r_squared": 0.95,
+}
+
+
+def measure_time(
+    func: Callable[..., Any], *args: Any, **kwargs: Any
+) -> tuple[Any, float]:
+    """
+    Run func once and time it.
+
+    Returns:
+        (result, elapsed seconds)
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def measure_memory(
+    func: Callable[..., Any], *args: Any, **kwargs: Any
+) -> tuple[Any, float]:
+    """
+    Run func once under tracemalloc.
+
+    Returns:
+        (result, peak traced memory in MB)
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / (1024 * 1024)
+
+
+def measure_all(func: Callable[..., Any], *args: Any, **kwargs: Any) -> dict[str, Any]:
+    """Time one run, then measure peak memory in a second run."""
+    result, elapsed = measure_time(func, *args, **kwargs)
+    _, peak_mb = measure_memory(func, *args, **kwargs)
+    return {"result": result, "time_s": elapsed, "peak_memory_mb": peak_mb}
+
+
+def run_benchmark(
+    func: Callable[..., Any],
+    *args: Any,
+    warmup_runs: int = 1,
+    measurement_runs: int = 3,
+    track_memory: bool = True,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    """
+    Benchmark func with warm-up, repeated timing and one memory run.
+
+    Returns:
+        Dict with times_ms, mean_ms, median_ms, min_ms, max_ms, stddev_ms,
+        peak_memory_mb (None if not tracked) and the last result
+    """
+    result = None
+    for _ in range(warmup_runs):
+        result = func(*args, **kwargs)
+
+    times_ms = []
+    for _ in range(measurement_runs):
+        result, elapsed = measure_time(func, *args, **kwargs)
+        times_ms.append(elapsed * 1000)
+
+    peak_memory_mb = None
+    if track_memory:
+        _, peak_memory_mb = measure_memory(func, *args, **kwargs)
+
+    return {
+        "times_ms": times_ms,
+        "mean_ms": statistics.fmean(times_ms),
+        "median_ms": statistics.median(times_ms),
+        "min_ms": min(times_ms),
+        "max_ms": max(times_ms),
+        "stddev_ms": statistics.stdev(times_ms) if len(times_ms) > 1 else 0.0,
+        "peak_memory_mb": peak_memory_mb,
+        "result": result,
+    }
+
+
+def calculate_throughput(
+    size_bytes: int, time_ms: float, chunk_count: int = 0
+) -> dict[str, float]:
+    """Return KB/s and chunks/s for one run of time_ms milliseconds."""
+    seconds = max(time_ms / 1000, 1e-9)
+    return {
+        "kb_per_s": size_bytes / 1024 / seconds,
+        "chunks_per_s": chunk_count / seconds,
+    }
+
+
+def aggregate_results(results: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Combine per-document benchmark records into one summary.
+
+    Each record needs size_bytes, mean_ms and chunk_count; peak_memory_mb
+    is optional.
+    """
+    if not results:
+        return {"documents": 0}
+
+    total_bytes = sum(r["size_bytes"] for r in results)
+    total_ms = sum(r["mean_ms"] for r in results)
+    total_chunks = sum(r["chunk_count"] for r in results)
+    per_doc_ms = [r["mean_ms"] for r in results]
+    with_memory = [r for r in results if r.get("peak_memory_mb")]
+    memory = [r["peak_memory_mb"] for r in with_memory]
+    memory_per_kb = [
+        r["peak_memory_mb"] / max(r["size_bytes"] / 1024, 1e-9) for r in with_memory
+    ]
+
+    summary = {
+        "documents": len(results),
+        "total_bytes": total_bytes,
+        "total_chunks": total_chunks,
+        "mean_ms": statistics.fmean(per_doc_ms),
+        "median_ms": statistics.median(per_doc_ms),
+        "min_ms": min(per_doc_ms),
+        "max_ms": max(per_doc_ms),
+        "total_ms": total_ms,
+        "peak_memory_mb": max(memory) if memory else None,
+        "memory_mb_per_kb": max(memory_per_kb) if memory_per_kb else None,
+    }
+    summary.update(
+        {
+            f"throughput_{key}": value
+            for key, value in calculate_throughput(
+                total_bytes, total_ms, total_chunks
+            ).items()
+        }
+    )
+    return summary
+
+
+def linear_regression(xs: list[float], ys: list[float]) -> dict[str, float]:
+    """Least-squares fit y = slope * x + intercept with R²."""
+    slope, intercept = statistics.linear_regression(xs, ys)
+    r = statistics.correlation(xs, ys) if len(set(ys)) > 1 else 1.0
+    return {"slope": slope, "intercept": intercept, "r_squared": r * r}
+
+
+def check_thresholds(summary: dict[str, Any]) -> dict[str, bool]:
+    """Compare an aggregate_results() summary with PERFORMANCE_THRESHOLDS."""
+    checks = {
+        "throughput_kb_s": summary["throughput_kb_per_s"]
+        >= PERFORMANCE_THRESHOLDS["throughput_kb_s"],
+        "ms_per_100kb": summary["total_ms"] / max(summary["total_bytes"], 1) * 102400
+        <= PERFORMANCE_THRESHOLDS["ms_per_100kb"],
+    }
+    if summary.get("memory_mb_per_kb") is not None:
+        checks["memory_mb_per_kb"] = (
+            summary["memory_mb_per_kb"] <= PERFORMANCE_THRESHOLDS["memory_mb_per_kb"]
+        )
+    return checks
+
+
+def median_ci(
+    values: list[float],
+    confidence: float = 0.95,
+    resamples: int = 2000,
+    seed: int = 0,
+) -> tuple[float, float, float]:
+    """
+    Median with a bootstrap confidence interval.
+
+    Returns:
+        (median, lower bound, upper bound)
+    """
+    median = statistics.median(values)
+    if len(values) < 2:
+        return median, median, median
+
+    rng = random.Random(seed)
+    medians = sorted(
+        statistics.median(rng.choices(values, k=len(values)))
+        for _ in range(resamples)
+    )
+    tail = (1 - confidence) / 2
+    lower = medians[int(tail * (resamples - 1))]
+    upper = medians[int((1 - tail) * (resamples - 1))]
+    return median, lower, upper
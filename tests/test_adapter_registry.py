@@ -0,0 +1,92 @@
+"""Tests for the process-wide adapter/config registry."""
+
+import pytest
+
+from adapter_registry import AdapterRegistry, LRUCache
+
+
+class TestLRUCache:
+    """Tests for the bounded LRU cache."""
+
+    def test_hit_and_miss_counters(self):
+        """Repeated keys are hits, new keys are misses."""
+        cache = LRUCache(maxsize=4)
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return object()
+
+        first = cache.get_or_create("a", factory)
+        second = cache.get_or_create("a", factory)
+
+        assert first is second
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_evicts_least_recently_used(self):
+        """Oldest untouched entry is evicted when maxsize is exceeded."""
+        cache = LRUCache(maxsize=2)
+        cache.get_or_create("a", lambda: 1)
+        cache.get_or_create("b", lambda: 2)
+        cache.get_or_create("a", lambda: 1)  # touch a
+        cache.get_or_create("c", lambda: 3)  # evicts b
+
+        assert len(cache) == 2
+        assert cache.stats()["evictions"] == 1
+        assert cache.get_or_create("b", lambda: 20) == 20
+
+    def test_clear_resets_counters(self):
+        """clear() drops entries and counters."""
+        cache = LRUCache(maxsize=2)
+        cache.get_or_create("a", lambda: 1)
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.stats()["misses"] == 0
+
+    def test_invalid_maxsize(self):
+        """maxsize below 1 is rejected."""
+        with pytest.raises(ValueError):
+            LRUCache(maxsize=0)
+
+
+class TestAdapterRegistry:
+    """Tests for adapter and config memoization."""
+
+    def test_adapters_keyed_by_leaf_only(self):
+        """One adapter per leaf_only value."""
+        registry = AdapterRegistry()
+
+        a = registry.get_adapter(False, object)
+        b = registry.get_adapter(False, object)
+        c = registry.get_adapter(True, object)
+
+        assert a is b
+        assert a is not c
+        assert registry.stats()["adapters"]["size"] == 2
+
+    def test_configs_keyed_by_parameters(self):
+        """Configs are shared only for identical parameters."""
+        registry = AdapterRegistry()
+
+        a = registry.get_config(4096, 200, "auto", object)
+        b = registry.get_config(4096, 200, "auto", object)
+        c = registry.get_config(2048, 200, "auto", object)
+
+        assert a is b
+        assert a is not c
+        assert registry.stats()["configs"]["hits"] == 1
+        assert registry.stats()["configs"]["misses"] == 2
+
+    def test_configs_bounded(self):
+        """Config cache never grows beyond max_configs."""
+        registry = AdapterRegistry(max_configs=3)
+
+        for size in range(10):
+            registry.get_config(size, 0, "auto", object)
+
+        assert registry.stats()["configs"]["size"] == 3
+        assert registry.stats()["configs"]["evictions"] == 7
@@ -0,0 +1,68 @@
+"""Tests for process-pool batch execution helpers."""
+
+from batch_executor import (
+    DEFAULT_MEMORY_BUDGET,
+    BatchExecutor,
+    load_memory_budget,
+    max_workers_for_budget,
+    schedule_order,
+)
+
+
+class TestWorkerBudget:
+    """Tests for memory-bounded worker counts."""
+
+    def test_manifest_budget(self):
+        """Budget is read from manifest.yaml resource.memory."""
+        assert load_memory_budget() == 512 * 1024 * 1024
+
+    def test_missing_manifest_falls_back(self, tmp_path):
+        """Missing manifest falls back to the default budget."""
+        assert load_memory_budget(tmp_path / "missing.yaml") == DEFAULT_MEMORY_BUDGET
+
+    def test_memory_bounds_workers(self):
+        """512MB budget allows fewer workers than a large CPU count."""
+        workers = max_workers_for_budget(512 * 1024 * 1024, cpu_count=64)
+        assert 1 <= workers < 64
+
+    def test_cpu_bounds_workers(self):
+        """Huge budget is capped by CPU count."""
+        assert max_workers_for_budget(64 * 1024**3, cpu_count=4) == 4
+
+    def test_at_least_one_worker(self):
+        """Tiny budget still yields one worker."""
+        assert max_workers_for_budget(1024, cpu_count=8) == 1
+
+    def test_requested_workers_capped(self):
+        """Requested workers never exceed the budget limit."""
+        executor = BatchExecutor(max_workers=1000, memory_budget=512 * 1024 * 1024)
+        assert executor.max_workers == max_workers_for_budget(512 * 1024 * 1024)
+
+
+class TestScheduling:
+    """Tests for largest-first scheduling."""
+
+    def test_largest_first(self):
+        """Indices are ordered by document length, descending."""
+        assert schedule_order(["ab", "abcd", "a", None]) == [1, 0, 2, 3]
+
+
+class TestFromEnv:
+    """Tests for environment configuration."""
+
+    def test_disabled_by_default(self, monkeypatch):
+        """No env var means sequential batches."""
+        monkeypatch.delenv("MARKDOWN_CHUNKER_BATCH_WORKERS", raising=False)
+        assert BatchExecutor.from_env() is None
+
+    def test_enabled(self, monkeypatch):
+        """Positive worker count enables the pool."""
+        monkeypatch.setenv("MARKDOWN_CHUNKER_BATCH_WORKERS", "2")
+        executor = BatchExecutor.from_env()
+        assert executor is not None
+        assert 1 <= executor.max_workers <= 2
+
+    def test_invalid_value_disables(self, monkeypatch):
+        """An invalid worker count falls back to sequential batches."""
+        monkeypatch.setenv("MARKDOWN_CHUNKER_BATCH_WORKERS", "four")
+        assert BatchExecutor.from_env() is None
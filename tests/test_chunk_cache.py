@@ -0,0 +1,158 @@
+"""Tests for the content-addressed chunk result cache."""
+
+from dataclasses import dataclass
+
+from chunk_cache import (
+    DEFAULT_DISK_MAX_BYTES,
+    ChunkCache,
+    estimate_size,
+    make_cache_key,
+)
+
+
+@dataclass
+class _Config:
+    max_chunk_size: int = 4096
+    overlap_size: int = 200
+
+
+class TestCacheKey:
+    """Tests for make_cache_key."""
+
+    def test_same_request_same_key(self):
+        """Identical text, config and flags produce identical keys."""
+        a = make_cache_key("# A", _Config(), include_metadata=True)
+        b = make_cache_key("# A", _Config(), include_metadata=True)
+        assert a == b
+
+    def test_key_depends_on_text_config_and_flags(self):
+        """Any input difference changes the key."""
+        base = make_cache_key("# A", _Config(), include_metadata=True)
+
+        assert make_cache_key("# B", _Config(), include_metadata=True) != base
+        assert (
+            make_cache_key("# A", _Config(max_chunk_size=1), include_metadata=True)
+            != base
+        )
+        assert make_cache_key("# A", _Config(), include_metadata=False) != base
+
+    def test_flag_order_irrelevant(self):
+        """Flags are normalized before hashing."""
+        a = make_cache_key("x", _Config(), debug=False, leaf_only=True)
+        b = make_cache_key("x", _Config(), leaf_only=True, debug=False)
+        assert a == b
+
+
+class TestMemoryTier:
+    """Tests for the in-process tier."""
+
+    def test_get_put(self):
+        """Stored values are returned and counted as hits."""
+        cache = ChunkCache()
+        assert cache.get("k") is None
+
+        cache.put("k", ["chunk 1", "chunk 2"])
+
+        assert cache.get("k") == ["chunk 1", "chunk 2"]
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_byte_bounded_eviction(self):
+        """Oldest entries are evicted once the byte budget is exceeded."""
+        value = ["x" * 1000]
+        size = estimate_size(value)
+        cache = ChunkCache(max_bytes=size * 2)
+
+        cache.put("a", value)
+        cache.put("b", value)
+        cache.get("a")  # touch a
+        cache.put("c", value)  # evicts b
+
+        assert cache.get("b") is None
+        assert cache.get("a") == value
+        assert cache.stats()["bytes"] <= size * 2
+        assert cache.stats()["evictions"] == 1
+
+    def test_oversized_value_not_stored(self):
+        """Values larger than the whole budget are skipped."""
+        cache = ChunkCache(max_bytes=100)
+        cache.put("k", ["x" * 1000])
+        assert len(cache) == 0
+
+
+class TestDiskTier:
+    """Tests for the sqlite tier."""
+
+    def test_survives_new_instance(self, tmp_path):
+        """A fresh cache pointing at the same file sees earlier results."""
+        path = tmp_path / "cache.sqlite3"
+        ChunkCache(disk_path=path).put("k", ["chunk"])
+
+        cache = ChunkCache(disk_path=path)
+
+        assert cache.get("k") == ["chunk"]
+        assert cache.stats()["disk_hits"] == 1
+        # Promoted to memory tier
+        assert cache.get("k") == ["chunk"]
+        assert cache.stats()["hits"] == 1
+
+    def test_disk_budget(self, tmp_path):
+        """Disk tier evicts least recently accessed entries."""
+        path = tmp_path / "cache.sqlite3"
+        cache = ChunkCache(max_bytes=1, disk_path=path, disk_max_bytes=2500)
+
+        cache.put("a", ["x" * 1000])
+        cache.put("b", ["x" * 1000])
+        cache.put("c", ["x" * 1000])
+
+        fresh = ChunkCache(disk_path=path)
+        assert fresh.get("a") is None
+        assert fresh.get("c") == ["x" * 1000]
+
+    def test_recent_hits_survive_eviction(self, tmp_path):
+        """Buffered access times of disk hits are written before evicting."""
+        path = tmp_path / "cache.sqlite3"
+        ChunkCache(max_bytes=1, disk_path=path).put("a", ["x" * 1000])
+        ChunkCache(max_bytes=1, disk_path=path).put("b", ["x" * 1000])
+        cache = ChunkCache(max_bytes=1, disk_path=path, disk_max_bytes=2500)
+
+        assert cache.get("a") == ["x" * 1000]  # a is now the most recent
+        cache.put("c", ["x" * 1000])  # evicts b
+
+        fresh = ChunkCache(disk_path=path)
+        assert fresh.get("b") is None
+        assert fresh.get("a") == ["x" * 1000]
+
+    def test_from_env(self, tmp_path, monkeypatch):
+        """Environment variables configure both tiers."""
+        monkeypatch.setenv("MARKDOWN_CHUNKER_CACHE_MAX_BYTES", "1024")
+        monkeypatch.setenv("MARKDOWN_CHUNKER_CACHE_DIR", str(tmp_path))
+
+        cache = ChunkCache.from_env()
+
+        assert cache.max_bytes == 1024
+        assert cache.stats()["disk_enabled"] is True
+
+    def test_from_env_disabled(self, monkeypatch):
+        """A zero memory budget disables caching."""
+        monkeypatch.setenv("MARKDOWN_CHUNKER_CACHE_MAX_BYTES", "0")
+        assert ChunkCache.from_env() is None
+
+    def test_from_env_opt_in(self, monkeypatch):
+        """Without a memory budget in env there is no cache."""
+        monkeypatch.delenv("MARKDOWN_CHUNKER_CACHE_MAX_BYTES", raising=False)
+        assert ChunkCache.from_env() is None
+
+    def test_from_env_invalid_values(self, tmp_path, monkeypatch):
+        """Invalid numbers fall back to their defaults instead of raising."""
+        monkeypatch.setenv("MARKDOWN_CHUNKER_CACHE_MAX_BYTES", "64MB")
+        assert ChunkCache.from_env() is None
+
+        monkeypatch.setenv("MARKDOWN_CHUNKER_CACHE_MAX_BYTES", "1024")
+        monkeypatch.setenv("MARKDOWN_CHUNKER_CACHE_DIR", str(tmp_path))
+        monkeypatch.setenv("MARKDOWN_CHUNKER_CACHE_DISK_MAX_BYTES", "lots")
+        cache = ChunkCache.from_env()
+
+        assert cache.max_bytes == 1024
+        assert cache._disk.max_bytes == DEFAULT_DISK_MAX_BYTES
@@ -0,0 +1,125 @@
+"""Tests for cross-document duplicate chunk detection."""
+
+import pytest
+
+from chunk_dedup import (
+    DedupConfig,
+    DuplicateIndex,
+    deduplicate_documents,
+    estimate_similarity,
+    minhash_signature,
+    shingle_hashes,
+)
+
+LICENSE = (
+    "## License\n\nThis project is released under the MIT License. "
+    "See the LICENSE file in the repository root for the full text."
+)
+GETTING_STARTED = (
+    "## Getting Started\n\nInstall the package with pip, import the client, "
+    "create a session with your API key and call the list endpoint to "
+    "check that everything works before moving on to the examples."
+)
+
+
+def chunk(content):
+    return {"content": content, "start_line": 1, "end_line": 1, "metadata": {}}
+
+
+class TestSignatures:
+    """Tests for shingling and MinHash similarity."""
+
+    def test_identical_content_has_identical_signature(self):
+        a = minhash_signature(shingle_hashes(GETTING_STARTED, 5))
+        b = minhash_signature(shingle_hashes(GETTING_STARTED + "\n\n", 5))
+
+        assert a == b
+        assert estimate_similarity(a, b) == 1.0
+
+    def test_similarity_tracks_overlap(self):
+        edited = GETTING_STARTED.replace("the examples", "the tutorials")
+        base = minhash_signature(shingle_hashes(GETTING_STARTED, 5))
+
+        near = estimate_similarity(
+            base, minhash_signature(shingle_hashes(edited, 5))
+        )
+        far = estimate_similarity(base, minhash_signature(shingle_hashes(LICENSE, 5)))
+
+        assert near > 0.6
+        assert far < 0.2
+
+    def test_short_content_is_one_shingle(self):
+        assert len(shingle_hashes("## License", 5)) == 1
+
+
+class TestDedupConfig:
+    """Tests for DedupConfig validation."""
+
+    def test_rejects_unknown_mode(self):
+        with pytest.raises(ValueError, match="dedup mode"):
+            DedupConfig(mode="merge")
+
+    def test_off_is_disabled(self):
+        assert not DedupConfig(mode="off").enabled
+        assert DedupConfig().enabled
+
+
+class TestDeduplicateDocuments:
+    """Tests for batch-wide annotation and dropping."""
+
+    def documents(self):
+        return [
+            [chunk("# Alpha\n\nAlpha intro."), chunk(GETTING_STARTED), chunk(LICENSE)],
+            None,
+            [chunk("# Beta\n\nBeta intro."), chunk(LICENSE)],
+            [chunk(GETTING_STARTED.replace("examples", "tutorials"))],
+        ]
+
+    def test_annotates_exact_and_near_duplicates(self):
+        documents = self.documents()
+
+        result, count = deduplicate_documents(documents, DedupConfig(threshold=0.6))
+
+        assert count == 2
+        assert result[1] is None
+        assert "duplicate_of" not in str(result[0])
+        exact = result[2][1]["metadata"]["duplicate_of"]
+        assert exact == {"document": 0, "chunk": 2, "similarity": 1.0}
+        near = result[3][0]["metadata"]["duplicate_of"]
+        assert (near["document"], near["chunk"]) == (0, 1)
+        assert 0.6 <= near["similarity"] < 1.0
+
+    def test_threshold_excludes_near_duplicates(self):
+        result, count = deduplicate_documents(
+            self.documents(), DedupConfig(threshold=1.0)
+        )
+
+        assert count == 1
+        assert "duplicate_of" not in result[3][0]["metadata"]
+
+    def test_drop_removes_duplicates(self):
+        result, count = deduplicate_documents(
+            self.documents(), DedupConfig(mode="drop", threshold=0.6)
+        )
+
+        assert count == 2
+        assert [c["content"] for c in result[2]] == ["# Beta\n\nBeta intro."]
+        assert result[3] == []
+
+    def test_input_chunks_not_modified(self):
+        documents = self.documents()
+
+        deduplicate_documents(documents, DedupConfig(threshold=0.6))
+
+        assert documents == self.documents()
+
+    def test_copies_point_at_first_occurrence(self):
+        index = DuplicateIndex(DedupConfig(threshold=0.6))
+        edited = GETTING_STARTED.replace("examples", "tutorials")
+
+        assert index.add({"document": 0, "chunk": 0}, GETTING_STARTED) is None
+        first = index.add({"document": 1, "chunk": 0}, edited)
+        second = index.add({"document": 2, "chunk": 0}, edited)
+
+        assert first == second
+        assert (second["document"], second["chunk"]) == (0, 0)
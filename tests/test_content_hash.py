@@ -0,0 +1,32 @@
+"""Tests for stable chunk content hashes."""
+
+from content_hash import content_hash, normalize_content
+
+
+class TestContentHash:
+    """Tests for content_hash()."""
+
+    def test_stable_and_hex(self):
+        value = content_hash("## Title\n\nText", "/Doc/Title")
+
+        assert value == content_hash("## Title\n\nText", "/Doc/Title")
+        assert len(value) == 32
+        int(value, 16)
+
+    def test_ignores_whitespace_noise(self):
+        base = content_hash("## Title\n\nText", "/Doc/Title")
+
+        assert content_hash("\n## Title  \r\n\r\nText\n\n", "/Doc/Title") == base
+
+    def test_depends_on_content_and_header_path(self):
+        base = content_hash("Text", "/Doc/A")
+
+        assert content_hash("Text.", "/Doc/A") != base
+        assert content_hash("Text", "/Doc/B") != base
+
+    def test_list_header_path(self):
+        assert content_hash("Text", ["Doc", "A"]) == content_hash("Text", "/Doc/A")
+        assert content_hash("Text", []) == content_hash("Text", "")
+
+    def test_normalize_keeps_indentation(self):
+        assert normalize_content("  code\n    more  \n") == "  code\n    more"
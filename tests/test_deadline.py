@@ -0,0 +1,101 @@
+"""Tests for request deadlines and throughput projection."""
+
+import pytest
+
+from deadline import (
+    SAFETY_FACTOR,
+    Deadline,
+    ThroughputEstimator,
+    deadline_seconds_from_env,
+)
+
+
+class TestDeadline:
+    """Tests for Deadline."""
+
+    def test_remaining_and_expired(self):
+        now = [100.0]
+        deadline = Deadline(10, clock=lambda: now[0])
+
+        assert deadline.remaining() == 10
+        assert not deadline.expired()
+
+        now[0] = 110.0
+        assert deadline.expired()
+
+    def test_degrade_records_reason_once(self):
+        deadline = Deadline(10)
+
+        assert not deadline.degraded
+        deadline.degrade("truncated")
+        deadline.degrade("truncated")
+
+        assert deadline.degraded
+        assert deadline.reasons == ["truncated"]
+
+    def test_seconds_from_env(self, monkeypatch):
+        monkeypatch.delenv("MARKDOWN_CHUNKER_DEADLINE_SECONDS", raising=False)
+        assert deadline_seconds_from_env() is None
+
+        monkeypatch.setenv("MARKDOWN_CHUNKER_DEADLINE_SECONDS", "60")
+        assert deadline_seconds_from_env() == 60
+
+        monkeypatch.setenv("MARKDOWN_CHUNKER_DEADLINE_SECONDS", "0")
+        assert deadline_seconds_from_env() is None
+
+        monkeypatch.setenv("MARKDOWN_CHUNKER_DEADLINE_SECONDS", "soon")
+        assert deadline_seconds_from_env() is None
+
+
+class TestThroughputEstimator:
+    """Tests for ThroughputEstimator."""
+
+    def test_project_scales_with_size(self):
+        estimator = ThroughputEstimator()
+
+        small = estimator.project("flat", 1_000_000)
+        large = estimator.project("flat", 10_000_000)
+
+        assert large == small * 10
+        assert estimator.project("hierarchical", 1_000_000) > small
+
+    def test_observe_moves_towards_measurement(self):
+        estimator = ThroughputEstimator(smoothing=0.5)
+        before = estimator.project("flat", 1_000_000)
+
+        # 1MB in 10s, much slower than the default estimate
+        estimator.observe("flat", 1_000_000, 10.0)
+        after = estimator.project("flat", 1_000_000)
+
+        assert before < after < 10.0 * SAFETY_FACTOR
+
+    def test_observe_ignores_empty_input(self):
+        estimator = ThroughputEstimator()
+        before = estimator.project("flat", 1000)
+
+        estimator.observe("flat", 0, 1.0)
+
+        assert estimator.project("flat", 1000) == before
+
+    def test_small_inputs_do_not_inflate_large_projection(self):
+        """Per-call overhead of small runs is not scaled up to large inputs."""
+        estimator = ThroughputEstimator()
+        before = estimator.project("flat", 5_000_000)
+
+        # 1KB in 50ms: as a pure rate this would be 50s per MB
+        for _ in range(50):
+            estimator.observe("flat", 1_000, 0.05)
+
+        after = estimator.project("flat", 5_000_000)
+        assert after < before + 0.1 * SAFETY_FACTOR
+        assert estimator.project("flat", 1_000) > 0.04 * SAFETY_FACTOR
+
+    def test_large_inputs_learn_rate_net_of_overhead(self):
+        estimator = ThroughputEstimator(smoothing=1.0)
+        estimator.observe("flat", 1_000, 0.5)
+
+        # 2MB in 4.5s with 0.5s overhead: 2s per MB
+        estimator.observe("flat", 2_000_000, 4.5)
+
+        projected = estimator.project("flat", 4_000_000)
+        assert projected == pytest.approx((0.5 + 8.0) * SAFETY_FACTOR, rel=1e-2)
@@ -0,0 +1,26 @@
+"""Tests for numeric settings read from environment variables."""
+
+from env_config import env_float, env_int
+
+
+class TestEnvConfig:
+    """Tests for env_int and env_float."""
+
+    def test_unset_and_empty_use_default(self, monkeypatch):
+        monkeypatch.delenv("CHUNKER_TEST_VALUE", raising=False)
+        assert env_int("CHUNKER_TEST_VALUE", 7) == 7
+        monkeypatch.setenv("CHUNKER_TEST_VALUE", " ")
+        assert env_float("CHUNKER_TEST_VALUE", 1.5) == 1.5
+
+    def test_valid_values(self, monkeypatch):
+        monkeypatch.setenv("CHUNKER_TEST_VALUE", "42")
+        assert env_int("CHUNKER_TEST_VALUE", 7) == 42
+        assert env_float("CHUNKER_TEST_VALUE", 1.5) == 42.0
+
+    def test_invalid_value_logged_and_defaulted(self, monkeypatch, caplog):
+        """An invalid value never raises; the default is used."""
+        monkeypatch.setenv("CHUNKER_TEST_VALUE", "12k")
+
+        assert env_int("CHUNKER_TEST_VALUE", 7) == 7
+        assert env_float("CHUNKER_TEST_VALUE", 1.5) == 1.5
+        assert "CHUNKER_TEST_VALUE" in caplog.text
@@ -0,0 +1,90 @@
+"""Tests for the hierarchical navigation index."""
+
+import json
+
+from hierarchy_index import NavigationIndex, NavigationIndexBuilder
+
+
+def node(chunk_id, parent_id=None, **metadata):
+    return {
+        "content": chunk_id,
+        "metadata": {"chunk_id": chunk_id, "parent_id": parent_id, **metadata},
+    }
+
+
+def tree():
+    """root > (a > (a1, a2), b > b1); output order is document order."""
+    return [
+        node("root", children_ids=["a", "b"]),
+        node("a", "root", children_ids=["a1", "a2"], sibling_ids=["b"]),
+        node("a1", "a", sibling_ids=["a2"]),
+        node("a2", "a", sibling_ids=["a1"]),
+        node("b", "root", children_ids=["b1"], sibling_ids=["a"]),
+        node("b1", "b"),
+    ]
+
+
+def build(chunks, strip_id_lists=False):
+    builder = NavigationIndexBuilder(strip_id_lists)
+    passed = list(builder.observe(chunks))
+    return passed, builder.build()
+
+
+class TestNavigationIndex:
+    """Tests for index construction and lookups."""
+
+    def test_parent_children_siblings(self):
+        _, index = build(tree())
+
+        a = index.position("a")
+        assert index.parent(index.position("a1")) == a
+        assert index.children_of(a) == [index.position("a1"), index.position("a2")]
+        assert index.siblings(a) == [index.position("b")]
+        assert index.parent(index.position("root")) is None
+        assert index.siblings(index.position("root")) == []
+
+    def test_matches_metadata_id_lists(self):
+        chunks = tree()
+        _, index = build(chunks)
+
+        for position, chunk in enumerate(chunks):
+            metadata = chunk["metadata"]
+            assert [
+                index.ids[p] for p in index.children_of(position)
+            ] == metadata.get("children_ids", [])
+            assert [index.ids[p] for p in index.siblings(position)] == metadata.get(
+                "sibling_ids", []
+            )
+
+    def test_dropped_parent_becomes_placeholder(self):
+        chunks = [c for c in tree() if c["metadata"]["chunk_id"] != "root"]
+
+        _, index = build(chunks)
+
+        placeholder = index.parent(index.position("a"))
+        assert index.size == 5
+        assert placeholder >= index.size
+        assert index.ids[placeholder] == "root"
+        assert index.siblings(index.position("a")) == [index.position("b")]
+
+    def test_strip_id_lists(self):
+        passed, _ = build(tree(), strip_id_lists=True)
+
+        for chunk in passed:
+            assert "children_ids" not in chunk["metadata"]
+            assert "sibling_ids" not in chunk["metadata"]
+            assert "parent_id" in chunk["metadata"]
+
+    def test_round_trips_through_json(self):
+        _, index = build(tree())
+
+        restored = NavigationIndex.from_dict(json.loads(json.dumps(index.to_dict())))
+
+        assert restored.to_dict() == index.to_dict()
+        assert restored.position("b1") == index.position("b1")
+
+    def test_chunks_without_ids(self):
+        _, index = build([{"content": "x", "metadata": {}}] * 3)
+
+        assert index.parents == [-1, -1, -1]
+        assert index.siblings(0) == [1, 2]
@@ -0,0 +1,72 @@
+"""Tests for span-based internal hierarchy nodes."""
+
+from types import SimpleNamespace
+
+from hierarchy_spans import HierarchySpans, materialize_subtree
+
+SOURCE = """# Doc
+
+Intro.
+
+## A
+
+Alpha.
+
+## B
+
+Beta.
+"""
+
+
+def lines_of(start, end):
+    return "".join(SOURCE.splitlines(keepends=True)[start - 1 : end]).strip()
+
+
+def node(chunk_id, parent_id, start, end):
+    return SimpleNamespace(
+        content=lines_of(start, end),
+        start_line=start,
+        end_line=end,
+        metadata={"chunk_id": chunk_id, "parent_id": parent_id},
+    )
+
+
+NODES = [
+    node("root", None, 1, 11),
+    node("a", "root", 5, 8),
+    node("b", "root", 9, 11),
+]
+
+
+class TestHierarchySpans:
+    """Tests for own content and span computation."""
+
+    def test_own_content_excludes_children(self):
+        spans = HierarchySpans(SOURCE, NODES)
+
+        assert spans.own_content("root", 1, 11) == "# Doc\n\nIntro."
+        assert spans.own_content("a", 5, 8) == "## A\n\nAlpha."
+
+    def test_gap_between_children_is_own_content(self):
+        nodes = [node("root", None, 1, 11), node("b", "root", 9, 11)]
+
+        spans = HierarchySpans(SOURCE, nodes)
+
+        assert "## A" in spans.own_content("root", 1, 11)
+        assert "Beta." not in spans.own_content("root", 1, 11)
+
+    def test_span_node_round_trip(self):
+        spans = HierarchySpans(SOURCE, NODES)
+        metadata = dict(NODES[0].metadata)
+
+        content = spans.to_span_node(NODES[0], metadata)
+        chunk = {"content": content, "metadata": metadata}
+
+        assert metadata["content_scope"] == "own"
+        assert metadata["span"]["start_char"] == 0
+        assert materialize_subtree(chunk, SOURCE) == NODES[0].content
+
+    def test_materialize_leaf_returns_content(self):
+        chunk = {"content": "Beta.", "metadata": {"chunk_id": "b"}}
+
+        assert materialize_subtree(chunk, SOURCE) == "Beta."
@@ -0,0 +1,184 @@
+"""Tests for incremental re-chunking."""
+
+import random
+
+from incremental import diff_opcodes, line_mapper, rechunk, scan_headers
+from stream_input import iter_text_lines
+
+
+def section_chunker(text, max_lines=6):
+    """
+    Header-local reference chunker: one chunk per section, long sections
+    split at blank lines, header_path and overlap like chunkana.
+    """
+    lines = list(iter_text_lines(text))
+    headers = scan_headers(lines)
+    pieces = []  # (start, end) 0-based, end exclusive
+    start = 0
+    for index in range(1, len(lines) + 1):
+        at_header = index in headers
+        too_long = index - start >= max_lines and not lines[index - 1].strip()
+        if index == len(lines) or at_header or too_long:
+            pieces.append((start, index))
+            start = index
+
+    chunks = []
+    stack = []
+    for start, end in pieces:
+        for index in range(start, end):
+            if index in headers:
+                level, title = headers[index]
+                while stack and stack[-1][0] >= level:
+                    stack.pop()
+                stack.append((level, title))
+        content = "".join(lines[start:end]).strip()
+        if not content:
+            continue
+        chunks.append(
+            {
+                "content": content,
+                "start_line": start + 1,
+                "end_line": end,
+                "metadata": {
+                    "header_path": "".join(f"/{title}" for _, title in stack),
+                    "chunk_index": len(chunks),
+                },
+            }
+        )
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        chunk["metadata"]["previous_content"] = previous["content"][-20:]
+        chunk["metadata"]["overlap_size"] = len(previous["content"][-20:])
+        previous["metadata"]["next_content"] = chunk["content"][:20]
+    return chunks
+
+
+DOCUMENT = """# Guide
+
+Intro text.
+
+## Install
+
+Run the installer.
+
+```bash
+# not a header
+pip install tool
+```
+
+### Linux
+
+Use the package manager.
+
+### macOS
+
+Use brew.
+
+## Usage
+
+Call the tool.
+
+More usage.
+
+Even more usage.
+
+And more.
+
+## FAQ
+
+Questions.
+"""
+
+
+class TestDiff:
+    """Tests for the line diff helpers."""
+
+    def test_scan_headers_skips_fences(self):
+        headers = scan_headers(list(iter_text_lines(DOCUMENT)))
+
+        assert (1, "Guide") in headers.values()
+        assert (3, "Linux") in headers.values()
+        assert all(title != "not a header" for _, title in headers.values())
+
+    def test_line_mapper_shifts_after_insert(self):
+        old = ["a\n", "b\n", "c\n"]
+        new = ["a\n", "x\n", "y\n", "b\n", "c\n"]
+        map_line = line_mapper(diff_opcodes(old, new))
+
+        # Line 1 maps to the first inserted line, so a region there covers it
+        assert [map_line(i) for i in range(4)] == [0, 1, 4, 5]
+
+
+class TestRechunk:
+    """Tests for rechunk() against a full re-chunk."""
+
+    def _check(self, old_text, new_text):
+        old_chunks = section_chunker(old_text)
+        result = rechunk(old_text, old_chunks, new_text, section_chunker)
+        assert result.chunks == section_chunker(new_text)
+        return result
+
+    def test_unchanged_document(self):
+        result = self._check(DOCUMENT, DOCUMENT)
+
+        assert result.changed == []
+        assert result.removed == []
+        assert result.rechunked_lines == 0
+
+    def test_edit_in_one_section(self):
+        new_text = DOCUMENT.replace("Use brew.", "Use brew or ports.")
+
+        result = self._check(DOCUMENT, new_text)
+
+        changed = [result.chunks[i]["metadata"] for i in result.changed]
+        assert [m["header_path"] for m in changed] == ["/Guide/Install/macOS"]
+        assert result.rechunked_lines < len(new_text.splitlines())
+
+    def test_inserted_section_shifts_lines(self):
+        new_text = DOCUMENT.replace("## FAQ", "## Config\n\nSet options.\n\n## FAQ")
+
+        result = self._check(DOCUMENT, new_text)
+
+        assert [result.chunks[i]["content"] for i in result.changed] == [
+            "## Config\n\nSet options."
+        ]
+        assert result.removed == []
+        faq = result.chunks[-1]
+        assert faq["start_line"] == new_text.splitlines().index("## FAQ") + 1
+
+    def test_deleted_section(self):
+        new_text = DOCUMENT.replace("### Linux\n\nUse the package manager.\n\n", "")
+
+        result = self._check(DOCUMENT, new_text)
+
+        old_chunks = section_chunker(DOCUMENT)
+        removed = [old_chunks[i]["metadata"]["header_path"] for i in result.removed]
+        assert "/Guide/Install/Linux" in removed
+
+    def test_renamed_header_updates_descendants(self):
+        self._check(DOCUMENT, DOCUMENT.replace("## Install", "## Setup"))
+
+    def test_caller_chunks_not_modified(self):
+        old_chunks = section_chunker(DOCUMENT)
+        snapshot = [dict(c, metadata=dict(c["metadata"])) for c in old_chunks]
+
+        rechunk(DOCUMENT, old_chunks, "# New\n\n" + DOCUMENT, section_chunker)
+
+        assert old_chunks == snapshot
+
+    def test_random_edits_match_full_rechunk(self):
+        rng = random.Random(7)
+        lines = list(iter_text_lines(DOCUMENT))
+        replacements = ["\n", "New paragraph.\n", "## Added\n", "### Deep\n", "x\n"]
+        for _ in range(300):
+            edited = list(lines)
+            for _ in range(rng.randint(1, 3)):
+                position = rng.randrange(len(edited) + 1)
+                action = rng.choice(("insert", "delete", "replace"))
+                if action == "insert" or position == len(edited):
+                    edited.insert(position, rng.choice(replacements))
+                elif action == "delete":
+                    del edited[position]
+                else:
+                    edited[position] = rng.choice(replacements)
+            self._check(DOCUMENT, "".join(edited))
@@ -0,0 +1,81 @@
+"""Tests for compiled RAG metadata projection."""
+
+from metadata_projection import MetadataProjector
+
+
+def legacy_filter(metadata, excluded):
+    """Per-key loop the projector replaces."""
+    filtered = {}
+    for key, value in metadata.items():
+        if key in excluded or key in {"is_leaf", "is_root"}:
+            continue
+        if (key.startswith("is_") or key.startswith("has_")) and not value:
+            continue
+        filtered[key] = value
+    return filtered
+
+
+METADATA = {
+    "chunk_index": 0,
+    "char_count": 120,
+    "content_type": "text",
+    "has_code": True,
+    "has_table": False,
+    "header_path": "/Intro",
+    "is_leaf": True,
+    "is_root": False,
+    "is_continuation": False,
+}
+
+
+class TestMetadataProjector:
+    """Tests for plan compilation and application."""
+
+    def test_matches_per_key_filter(self):
+        projector = MetadataProjector(excluded={"char_count"})
+
+        assert projector.project(METADATA) == legacy_filter(METADATA, {"char_count"})
+        assert list(projector.project(METADATA)) == [
+            "chunk_index",
+            "content_type",
+            "has_code",
+            "header_path",
+        ]
+
+    def test_flag_values_checked_per_chunk(self):
+        """Same keys share a plan; falsy is_/has_ flags still depend on values."""
+        projector = MetadataProjector()
+        other = {**METADATA, "has_code": False, "has_table": True}
+
+        first = projector.project(METADATA)
+        second = projector.project(other)
+
+        assert projector.plan_count == 1
+        assert "has_code" in first and "has_table" not in first
+        assert "has_code" not in second and "has_table" in second
+
+    def test_whitelist(self):
+        projector = MetadataProjector()
+
+        projected = projector.project(METADATA, ("header_path", "char_count"))
+
+        # Excluded fields stay excluded even when whitelisted
+        assert projected == {"header_path": "/Intro"}
+        assert projector.plan_count == 1
+        projector.project(METADATA)
+        assert projector.plan_count == 2
+
+    def test_does_not_modify_metadata(self):
+        metadata = dict(METADATA)
+
+        MetadataProjector().project(metadata)
+
+        assert metadata == METADATA
+
+    def test_plan_cache_is_bounded(self):
+        projector = MetadataProjector(max_plans=2)
+
+        for i in range(5):
+            assert projector.project({f"field_{i}": i}) == {f"field_{i}": i}
+
+        assert projector.plan_count <= 2
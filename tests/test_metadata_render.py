@@ -0,0 +1,72 @@
+"""Tests for metadata serialization options."""
+
+import json
+
+import pytest
+
+import metadata_render
+from metadata_render import RenderOptions, dumps_metadata, parse_metadata_fields
+
+METADATA = {"header_path": "/Intro/Раздел", "content_type": "text", "start_line": 1}
+
+
+class TestRenderOptions:
+    """Tests for RenderOptions validation."""
+
+    def test_default_is_pretty(self):
+        """The historical indented format stays the default."""
+        assert RenderOptions().metadata_format == "pretty"
+
+    def test_unknown_format_rejected(self):
+        """Unknown formats raise ValueError (reported as Validation error)."""
+        with pytest.raises(ValueError):
+            RenderOptions(metadata_format="yaml")
+
+    def test_metadata_fields_normalized_to_tuple(self):
+        """Whitelists are stored as tuples, so options stay hashable."""
+        options = RenderOptions(metadata_fields=["header_path", "token_count"])
+
+        assert options.metadata_fields == ("header_path", "token_count")
+        assert hash(options)
+
+    def test_invalid_metadata_fields_rejected(self):
+        """A bare string or empty names raise ValueError."""
+        with pytest.raises(ValueError):
+            RenderOptions(metadata_fields="header_path")
+        with pytest.raises(ValueError):
+            RenderOptions(metadata_fields=("header_path", ""))
+
+    def test_parse_metadata_fields(self):
+        """Comma-separated tool input; empty means no whitelist."""
+        assert parse_metadata_fields(" header_path, ,token_count ") == (
+            "header_path",
+            "token_count",
+        )
+        assert parse_metadata_fields("") is None
+        assert parse_metadata_fields(None) is None
+
+
+class TestDumpsMetadata:
+    """Tests for dumps_metadata."""
+
+    def test_pretty_matches_historical_output(self):
+        """Pretty output is byte-identical to json.dumps(indent=2)."""
+        assert dumps_metadata(METADATA) == json.dumps(
+            METADATA, ensure_ascii=False, indent=2
+        )
+
+    def test_compact_round_trips(self):
+        """Compact output has no whitespace and parses to the same object."""
+        compact = dumps_metadata(METADATA, "compact")
+
+        assert json.loads(compact) == METADATA
+        assert "\n" not in compact and ": " not in compact
+        assert "Раздел" in compact
+        assert len(compact) < len(dumps_metadata(METADATA))
+
+    def test_compact_without_orjson(self, monkeypatch):
+        """Stdlib json produces the same compact text when orjson is absent."""
+        with_orjson = dumps_metadata(METADATA, "compact")
+        monkeypatch.setattr(metadata_render, "orjson", None)
+
+        assert dumps_metadata(METADATA, "compact") == with_orjson
@@ -1,9 +1,24 @@
 #!/usr/bin/env python3
 """Tests for migration adapter."""
 
+import io
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
 from chunkana import ChunkerConfig
 
+import adapter as adapter_module
 from adapter import MigrationAdapter
+from batch_executor import BatchExecutor
+from chunk_cache import ChunkCache
+from chunk_dedup import DedupConfig
+from deadline import Deadline
+from metadata_render import RenderOptions
+from size_guard import SizeGuard
+from stage_timing import StageTimings
+from token_count import CHARS_PER_TOKEN, TokenCounter
 
 
 class TestMigrationAdapter:
@@ -186,3 +201,786 @@ class TestMigrationAdapter:
         assert isinstance(result_normal, list)
         assert isinstance(result_debug, list)
         assert len(result_debug) >= len(result_normal)
+
+    def test_run_chunking_result_cache(self):
+        """Test repeated requests are served from the result cache."""
+        cache = ChunkCache()
+        adapter = MigrationAdapter(result_cache=cache)
+        config = adapter.build_chunker_config()
+        text = "# Header\n\nThis is a paragraph."
+
+        first = adapter.run_chunking(text, config)
+        second = adapter.run_chunking(text, config)
+        other_mode = adapter.run_chunking(text, config, include_metadata=False)
+
+        assert first == second
+        assert first == self.adapter.run_chunking(text, config)
+        assert other_mode != first
+        assert other_mode == self.adapter.run_chunking(
+            text, config, include_metadata=False
+        )
+
+    def test_metadata_toggle_reuses_raw_chunks(self):
+        """Test switching include_metadata only re-renders cached raw chunks."""
+        adapter = MigrationAdapter(result_cache=ChunkCache())
+        config = adapter.build_chunker_config()
+        text = "# Header\n\nThis is a paragraph.\n\n## Sub\n\nMore text."
+        calls = []
+        original = adapter._perform_chunking
+
+        def counting(*args, **kwargs):
+            calls.append(args)
+            return original(*args, **kwargs)
+
+        adapter._perform_chunking = counting
+
+        with_metadata = adapter.run_chunking(text, config, include_metadata=True)
+        without_metadata = adapter.run_chunking(text, config, include_metadata=False)
+        hierarchical = adapter.run_chunking(text, config, enable_hierarchy=True)
+
+        assert len(with_metadata) == len(without_metadata)
+        assert len(hierarchical) > 0
+        # Metadata toggle reused stage 1, hierarchy change did not
+        assert len(calls) == 2
+
+    def test_run_chunking_batch(self):
+        """Test batch chunking matches per-document chunking in input order."""
+        config = self.adapter.build_chunker_config()
+        texts = ["# One\n\nFirst document.", "# Two\n\nSecond document."]
+
+        results = self.adapter.run_chunking_batch(texts, config)
+
+        assert [r["index"] for r in results] == [0, 1]
+        for text, result in zip(texts, results):
+            assert result["error"] is None
+            assert result["chunks"] == self.adapter.run_chunking(text, config)
+
+    def test_run_chunking_batch_isolates_errors(self):
+        """Test one bad document does not fail the batch."""
+        config = self.adapter.build_chunker_config()
+
+        results = self.adapter.run_chunking_batch(
+            ["# Good\n\nText.", "   ", None], config
+        )
+
+        assert results[0]["error"] is None
+        assert len(results[0]["chunks"]) > 0
+        assert results[1]["chunks"] == []
+        assert results[1]["error"].startswith("Validation error")
+        assert results[2]["error"].startswith("Validation error")
+
+    def test_run_chunking_batch_parallel(self):
+        """Test process-pool batches match sequential results and order."""
+        config = self.adapter.build_chunker_config()
+        texts = [
+            "# Small\n\nText.",
+            "# Large\n\n" + "Paragraph text. " * 500,
+            "",
+            "# Medium\n\n" + "More text. " * 50,
+        ]
+        executor = BatchExecutor(max_workers=2)
+        try:
+            parallel = self.adapter.run_chunking_batch(
+                texts, config, executor=executor
+            )
+        finally:
+            executor.shutdown()
+
+        assert parallel == self.adapter.run_chunking_batch(texts, config)
+
+    def test_run_chunking_batch_parallel_uses_adapter_settings(self):
+        """Test workers chunk with the parent's guard, tokenizer and flags."""
+        texts = [
+            "# Doc\n\nIntro text. " * 20 + "\n\n## A\n\n" + "Alpha text. " * 200,
+            "# Other\n\n" + "Beta text. " * 300,
+        ]
+        cache = ChunkCache()
+        adapter = MigrationAdapter(
+            leaf_only=True,
+            result_cache=cache,
+            size_guard=SizeGuard(memory_limit=2**30, max_input_chars=100_000),
+            token_counter=TokenCounter(),
+            span_hierarchy=True,
+        )
+        sequential_adapter = adapter.settings.build()
+        config = adapter.build_chunker_config(max_chunk_size=1000)
+        kwargs = {"enable_hierarchy": True, "max_tokens": 100}
+
+        executor = BatchExecutor(max_workers=2)
+        try:
+            parallel = adapter.run_chunking_batch(
+                texts, config, executor=executor, **kwargs
+            )
+            hits = cache.hits
+            repeated = adapter.run_chunking_batch(
+                texts, config, executor=executor, **kwargs
+            )
+        finally:
+            executor.shutdown()
+
+        assert parallel == sequential_adapter.run_chunking_batch(
+            texts, config, **kwargs
+        )
+        assert repeated == parallel
+        assert cache.hits == hits + len(texts)
+
+    def test_settings_round_trip(self):
+        """Test settings rebuild an equivalent adapter; custom tokenizers do not."""
+        adapter = MigrationAdapter(
+            leaf_only=True,
+            size_guard=SizeGuard(memory_limit=2**30, max_input_chars=5000),
+            span_hierarchy=True,
+        )
+
+        assert adapter.settings.build().settings == adapter.settings
+        assert self.adapter.settings.tokenizer is None
+
+        class CustomTokenizer:
+            name = "custom"
+
+            def count(self, text):
+                return 1
+
+        custom = MigrationAdapter(token_counter=TokenCounter(CustomTokenizer()))
+        assert custom.settings is None
+
+    def test_run_chunking_batch_dedup(self):
+        """Test boilerplate repeated across documents is annotated or dropped."""
+        config = self.adapter.build_chunker_config(max_chunk_size=200)
+        license_text = "## License\n\n" + "Released under the MIT License. " * 4
+        texts = [
+            "# Alpha\n\n" + "Alpha does one thing. " * 6 + "\n\n" + license_text,
+            "# Beta\n\n" + "Beta does another thing. " * 6 + "\n\n" + license_text,
+        ]
+
+        annotated = self.adapter.run_chunking_batch(
+            texts, config, dedup=DedupConfig(mode="annotate")
+        )
+        dropped = self.adapter.run_chunking_batch(
+            texts, config, dedup=DedupConfig(mode="drop")
+        )
+        plain = self.adapter.run_chunking_batch(texts, config)
+
+        assert [len(r["chunks"]) for r in annotated] == [
+            len(r["chunks"]) for r in plain
+        ]
+        assert "duplicate_of" not in "".join(annotated[0]["chunks"])
+        assert '"duplicate_of"' in "".join(annotated[1]["chunks"])
+        assert dropped[0]["chunks"] == plain[0]["chunks"]
+        assert len(dropped[1]["chunks"]) < len(plain[1]["chunks"])
+        assert all(chunk in plain[1]["chunks"] for chunk in dropped[1]["chunks"])
+
+    def test_run_chunking_stream_matches_run_chunking(self):
+        """Test streamed groups concatenate to the run_chunking output."""
+        config = self.adapter.build_chunker_config(max_chunk_size=200)
+        text = "\n\n".join(f"## Section {i}\n\n" + "Text. " * 30 for i in range(10))
+
+        for include_metadata in (True, False):
+            groups = list(
+                self.adapter.run_chunking_stream(
+                    text, config, include_metadata=include_metadata, group_size=3
+                )
+            )
+            flat = [chunk for group in groups for chunk in group]
+
+            assert all(1 <= len(group) <= 3 for group in groups)
+            assert flat == self.adapter.run_chunking(
+                text, config, include_metadata=include_metadata
+            )
+
+    def test_iter_chunking_is_lazy_and_matches(self):
+        """Test iter_chunking is a generator yielding run_chunking output."""
+        import types
+
+        config = self.adapter.build_chunker_config()
+        text = "# Header\n\nThis is a paragraph.\n\n## Subheader\n\nMore."
+
+        for enable_hierarchy in (False, True):
+            lazy = self.adapter.iter_chunking(
+                text, config, enable_hierarchy=enable_hierarchy
+            )
+            assert isinstance(lazy, types.GeneratorType)
+            assert list(lazy) == self.adapter.run_chunking(
+                text, config, enable_hierarchy=enable_hierarchy
+            )
+
+    def test_iter_chunking_stays_lazy_with_cache(self):
+        """Test a raw cache miss on the lazy path is neither materialized nor stored."""
+        adapter = MigrationAdapter(result_cache=ChunkCache())
+        config = adapter.build_chunker_config()
+        text = "# Header\n\nThis is a paragraph.\n\n## Sub\n\nMore text."
+        pulled = []
+        original = adapter._iter_raw_chunks
+
+        def counting(*args, **kwargs):
+            for chunk in original(*args, **kwargs):
+                pulled.append(chunk)
+                yield chunk
+
+        adapter._iter_raw_chunks = counting
+
+        lazy = adapter.iter_chunking(text, config)
+        first = next(lazy)
+
+        assert len(pulled) == 1
+        rest = list(lazy)
+        assert [first, *rest] == adapter.run_chunking(text, config)
+
+        # run_chunking stored the raw chunks; the lazy path now serves them
+        pulled.clear()
+        timings = StageTimings()
+        streamed = list(
+            adapter.iter_chunking(text, config, include_metadata=False, timings=timings)
+        )
+        assert pulled == []
+        assert timings.cache_hit == "raw"
+        assert streamed == adapter.run_chunking(text, config, include_metadata=False)
+
+    def test_iter_chunking_source_windows(self, tmp_path):
+        """Test windowed source chunking keeps source line numbers."""
+        sections = [f"## Section {i}\n\n" + "Body text.\n" * 30 for i in range(40)]
+        text = "# Manual\n\n" + "\n".join(sections)
+        path = tmp_path / "manual.md"
+        path.write_text(text, encoding="utf-8")
+        source_lines = text.splitlines()
+        config = self.adapter.build_chunker_config(max_chunk_size=500)
+
+        chunks = list(
+            self.adapter.iter_chunking_source(path, config, window_chars=2048)
+        )
+        metadata = [
+            json.loads(c.split("<metadata>\n", 1)[1].split("\n</metadata>", 1)[0])
+            for c in chunks
+        ]
+
+        assert [m["stream_chunk_index"] for m in metadata] == list(range(len(chunks)))
+        assert metadata[-1]["stream_window_index"] > 0
+        for chunk, meta in zip(chunks, metadata):
+            first_line = source_lines[meta["start_line"] - 1].strip()
+            assert first_line and first_line in chunk
+
+    def test_iter_chunking_source_section_spans_windows(self, monkeypatch):
+        """Test header_path, content_hash and overlap cross a window boundary."""
+        from content_hash import content_hash
+        from stream_input import PREAMBLE_PATH, scan_headers
+
+        def paragraph_chunker(text, config):
+            # One chunk per paragraph, header_path like chunkana
+            lines = text.split("\n")
+            headers = scan_headers(lines)
+            stack, chunks, line = [], [], 1
+            for part in text.split("\n\n"):
+                for index in range(line - 1, line - 1 + part.count("\n") + 1):
+                    if index in headers:
+                        level, title = headers[index]
+                        while stack and stack[-1][0] >= level:
+                            stack.pop()
+                        stack.append((level, title))
+                if part.strip():
+                    path = "".join(f"/{t}" for _, t in stack) or PREAMBLE_PATH
+                    chunks.append(
+                        SimpleNamespace(
+                            content=part.strip(),
+                            start_line=line,
+                            end_line=line + part.count("\n"),
+                            metadata={"header_path": path},
+                        )
+                    )
+                line += part.count("\n") + 2
+            return chunks
+
+        monkeypatch.setattr(adapter_module, "chunk_markdown", paragraph_chunker)
+        body = "\n\n".join(f"Install step {i}." for i in range(12))
+        text = f"# Guide\n\n## Install\n\n{body}\n\n### Linux\n\nUse apt.\n"
+        config = self.adapter.build_chunker_config(chunk_overlap=10)
+
+        chunks = list(
+            self.adapter.iter_chunking_source(
+                io.StringIO(text), config, window_chars=120
+            )
+        )
+        metadata = [
+            json.loads(c.split("<metadata>\n", 1)[1].split("\n</metadata>", 1)[0])
+            for c in chunks
+        ]
+
+        boundary = next(
+            i for i, m in enumerate(metadata) if m["stream_window_index"] > 0
+        )
+        assert "Install step" in chunks[boundary]
+        steps = [m for c, m in zip(chunks, metadata) if "Install step" in c]
+        assert {m["header_path"] for m in steps} == {"/Guide/Install"}
+        assert metadata[-1]["header_path"] == "/Guide/Install/Linux"
+        content = chunks[boundary].split("</metadata>\n", 1)[1]
+        assert metadata[boundary]["content_hash"] == content_hash(
+            content, "/Guide/Install"
+        )
+        previous = chunks[boundary - 1].split("</metadata>\n", 1)[1]
+        assert metadata[boundary]["previous_content"] == previous[-10:]
+        assert metadata[boundary - 1]["next_content"] == "Install st"
+
+    def test_compact_metadata_format(self):
+        """Test compact metadata parses to the same object as pretty."""
+        config = self.adapter.build_chunker_config()
+        text = "# Header\n\nThis is a paragraph.\n\n## Subheader\n\nMore."
+
+        pretty = self.adapter.run_chunking(text, config)
+        compact = self.adapter.run_chunking(
+            text, config, render_options=RenderOptions(metadata_format="compact")
+        )
+
+        assert len(compact) == len(pretty)
+        for p, c in zip(pretty, compact):
+            p_meta, p_body = p.split("\n</metadata>\n", 1)
+            c_meta, c_body = c.split("\n</metadata>\n", 1)
+            assert c_body == p_body
+            assert "\n" not in c_meta[len("<metadata>\n") :]
+            assert json.loads(c_meta[len("<metadata>\n") :]) == json.loads(
+                p_meta[len("<metadata>\n") :]
+            )
+            assert len(c) < len(p)
+
+    def test_metadata_fields_whitelist(self):
+        """Test a field whitelist limits rendered and structured metadata."""
+        config = self.adapter.build_chunker_config()
+        text = "# Header\n\nThis is a paragraph.\n\n## Subheader\n\nMore."
+        options = RenderOptions(metadata_fields=("header_path", "token_count"))
+
+        rendered = self.adapter.run_chunking(text, config, render_options=options)
+        structured = self.adapter.run_chunking_structured(
+            text, config, render_options=options
+        )
+
+        assert rendered
+        for chunk in rendered:
+            header = chunk.split("\n</metadata>\n", 1)[0]
+            meta = json.loads(header[len("<metadata>\n") :])
+            assert set(meta) <= {"header_path", "token_count", "start_line", "end_line"}
+            assert "token_count" in meta
+        for chunk in structured:
+            assert set(chunk["metadata"]) <= {"header_path", "token_count"}
+
+    def test_run_chunking_structured(self):
+        """Test structured output carries metadata as an object."""
+        config = self.adapter.build_chunker_config()
+        text = "# Header\n\nThis is a paragraph.\n\n## Subheader\n\nMore."
+
+        structured = self.adapter.run_chunking_structured(text, config)
+        rendered = self.adapter.run_chunking(text, config)
+
+        assert len(structured) == len(rendered)
+        for item, chunk in zip(structured, rendered):
+            assert set(item) == {"content", "metadata", "start_line", "end_line"}
+            assert chunk.endswith(item["content"])
+            meta = json.loads(
+                chunk.split("\n</metadata>", 1)[0][len("<metadata>\n") :]
+            )
+            assert meta == {
+                **item["metadata"],
+                "start_line": item["start_line"],
+                "end_line": item["end_line"],
+            }
+
+    def test_run_chunking_stream_structured(self):
+        """Test structured streaming groups match run_chunking_structured."""
+        config = self.adapter.build_chunker_config(max_chunk_size=200)
+        text = "\n\n".join(f"## Section {i}\n\n" + "Text. " * 30 for i in range(10))
+
+        groups = list(
+            self.adapter.run_chunking_stream(
+                text, config, group_size=4, structured=True
+            )
+        )
+
+        flat = [item for group in groups for item in group]
+        assert flat == self.adapter.run_chunking_structured(text, config)
+        assert all(isinstance(item["metadata"], dict) for item in flat)
+
+    def test_run_chunking_stage_timings(self):
+        """Test per-stage timings are recorded without changing output."""
+        text = "# Header\n\nThis is a paragraph.\n\n## Subheader\n\nMore."
+
+        for enable_hierarchy, library_stage, extra in (
+            (False, "chunk_markdown", set()),
+            (True, "chunk_hierarchical", {"filter"}),
+        ):
+            timings = StageTimings(input_chars=len(text))
+            config = self.adapter.build_chunker_config(timings=timings)
+            result = self.adapter.run_chunking(
+                text, config, enable_hierarchy=enable_hierarchy, timings=timings
+            )
+            record = timings.to_dict()
+
+            assert result == self.adapter.run_chunking(
+                text, config, enable_hierarchy=enable_hierarchy
+            )
+            assert set(record["stages"]) == {
+                "config_build",
+                library_stage,
+                "chunk_to_dict",
+                "validate",
+                "render",
+            } | extra
+            assert record["chunk_count"] == len(result)
+            assert record["strategy"]
+            assert "active_stages" not in record
+
+    def test_run_chunking_deadline_within_budget(self):
+        """Test a request that fits its deadline is not degraded."""
+        text = "# Header\n\nThis is a paragraph.\n\n## Subheader\n\nMore."
+        config = self.adapter.build_chunker_config()
+        deadline = Deadline(270)
+
+        result = self.adapter.run_chunking(text, config, deadline=deadline)
+
+        assert result == self.adapter.run_chunking(text, config)
+        assert not deadline.degraded
+
+    def test_run_chunking_deadline_degrades_config(self):
+        """Test a projected overrun switches to the cheaper config."""
+        text = "# Header\n\nThis is a paragraph.\n\n## Subheader\n\nMore."
+        config = self.adapter.build_chunker_config()
+        # Frozen clock: never expires, but nothing fits the budget
+        deadline = Deadline(1e-9, clock=lambda: 0.0)
+
+        result = self.adapter.run_chunking_structured(
+            text, config, deadline=deadline
+        )
+
+        assert deadline.reasons == ["fallback_strategy", "skip_invariants"]
+        assert result
+        for chunk in result:
+            assert chunk["metadata"]["degraded"] == deadline.reasons
+
+    def test_run_chunking_deadline_truncates(self):
+        """Test chunks stop once the deadline passes, last one tagged."""
+        text = "\n\n".join(
+            f"## Section {i}\n\n" + "Paragraph text. " * 20 for i in range(10)
+        )
+        config = self.adapter.build_chunker_config(max_chunk_size=400)
+        full = self.adapter.run_chunking_structured(text, config)
+        assert len(full) >= 3
+
+        now = [0.0]
+        deadline = Deadline(10, clock=lambda: now[0])
+        chunks = self.adapter.iter_chunking_structured(
+            text, config, deadline=deadline
+        )
+        first = next(chunks)
+        now[0] = 20.0
+        rest = list(chunks)
+
+        assert deadline.reasons == ["truncated"]
+        assert len(rest) == 1
+        assert first == full[0]
+        assert rest[0]["content"] == full[1]["content"]
+        assert rest[0]["metadata"]["degraded"] == ["truncated"]
+
+    def test_size_guard_switches_to_windowed(self):
+        """Test oversized input is chunked on the windowed path."""
+        text = "\n\n".join(
+            f"## Section {i}\n\n" + "Paragraph text. " * 200 for i in range(200)
+        )
+        guard = SizeGuard(memory_limit=0)
+        guard.memory_limit = guard.estimate(text, False, False, windowed=True)
+        adapter = MigrationAdapter(size_guard=guard)
+        config = adapter.build_chunker_config()
+
+        result = adapter.run_chunking_structured(
+            text, config, enable_hierarchy=True, debug=True
+        )
+
+        windows = {chunk["metadata"]["stream_window_index"] for chunk in result}
+        assert len(windows) > 1
+        reasons = ["debug_disabled", "windowed"]
+        assert all(chunk["metadata"]["degraded"] == reasons for chunk in result)
+
+    def test_size_guard_reasons_in_metadata(self):
+        """Test dropping debug is reported in every chunk's metadata."""
+        text = "# Header\n\n" + "Paragraph text. " * 200
+        guard = SizeGuard(memory_limit=0)
+        guard.memory_limit = guard.estimate(text, True, False)
+        adapter = MigrationAdapter(size_guard=guard)
+        config = adapter.build_chunker_config()
+
+        result = adapter.run_chunking_structured(
+            text, config, enable_hierarchy=True, debug=True
+        )
+        batch = adapter.run_chunking_batch(
+            [text, text],
+            config,
+            enable_hierarchy=True,
+            debug=True,
+            dedup=DedupConfig(mode="annotate"),
+        )
+
+        assert result
+        assert all(c["metadata"]["degraded"] == ["debug_disabled"] for c in result)
+        assert all('"debug_disabled"' in c for entry in batch for c in entry["chunks"])
+
+    def test_size_guard_rejects_early(self):
+        """Test input too large for every path raises ValueError."""
+        adapter = MigrationAdapter(size_guard=SizeGuard(memory_limit=1024))
+        config = adapter.build_chunker_config()
+
+        with pytest.raises(ValueError, match="too large"):
+            adapter.run_chunking("# Header\n\n" + "text " * 1000, config)
+
+    def test_rechunk_incremental_matches_full(self):
+        """Test an edited section is re-chunked and the rest reused."""
+        sections = [
+            f"## Section {i}\n\n" + f"Paragraph {i} text. " * 30 for i in range(8)
+        ]
+        text = "# Document\n\n" + "\n\n".join(sections) + "\n"
+        new_text = text.replace("Paragraph 5 text. ", "Edited 5 text. ", 1)
+        config = self.adapter.build_chunker_config(max_chunk_size=600)
+        previous = self.adapter.run_chunking_structured(text, config)
+
+        result = self.adapter.rechunk_incremental(text, previous, new_text, config)
+        full = self.adapter.run_chunking_structured(new_text, config)
+
+        assert [c["content"] for c in result.chunks] == [c["content"] for c in full]
+        assert [c["start_line"] for c in result.chunks] == [
+            c["start_line"] for c in full
+        ]
+        assert result.changed
+        assert len(result.changed) < len(full)
+        assert all("Edited 5" in result.chunks[i]["content"] for i in result.changed)
+
+    def test_content_hash_stable_across_shifts(self):
+        """Test chunks keep their content hash when their position changes."""
+        text = "# Doc\n\n## A\n\nAlpha text.\n\n## B\n\nBeta text."
+        shifted = text.replace("## A", "## Intro\n\nNew text.\n\n## A")
+        config = self.adapter.build_chunker_config()
+
+        before = self.adapter.run_chunking_structured(text, config)
+        after = self.adapter.run_chunking_structured(shifted, config)
+
+        hashes = {c["metadata"]["content_hash"]: c["content"] for c in before}
+        assert all(len(h) == 32 for h in hashes)
+        for chunk in after:
+            if chunk["content"] in hashes.values():
+                assert hashes[chunk["metadata"]["content_hash"]] == chunk["content"]
+
+    def test_hierarchy_filter_pushdown(self, monkeypatch):
+        """Test dropped hierarchy nodes are never converted to dicts."""
+        nodes = [
+            SimpleNamespace(
+                content="# Doc",
+                start_line=1,
+                end_line=9,
+                metadata={"is_root": True, "is_leaf": False},
+            ),
+            SimpleNamespace(
+                content="## Parent",
+                start_line=3,
+                end_line=9,
+                metadata={"is_root": False, "is_leaf": False},
+            ),
+            SimpleNamespace(
+                content="Leaf text.",
+                start_line=5,
+                end_line=5,
+                metadata={"is_root": False, "is_leaf": True},
+            ),
+        ]
+        result = SimpleNamespace(chunks=nodes, get_flat_chunks=lambda: nodes)
+        monkeypatch.setattr(adapter_module, "chunk_hierarchical", lambda *a: result)
+        adapter = MigrationAdapter(leaf_only=True)
+        converted = []
+        original = adapter._chunk_to_dict
+
+        def counting(chunk, *args):
+            converted.append(chunk.content)
+            return original(chunk, *args)
+
+        adapter._chunk_to_dict = counting
+        config = adapter.build_chunker_config()
+
+        chunks = adapter.run_chunking_structured("# Doc", config, enable_hierarchy=True)
+
+        assert [c["content"] for c in chunks] == ["Leaf text."]
+        assert converted == ["Leaf text."]
+        assert "indexable" not in nodes[2].metadata
+
+    def test_run_chunking_indexed(self, monkeypatch):
+        """Test the navigation index matches ids and is served from cache."""
+        nodes = [
+            SimpleNamespace(
+                content=content,
+                start_line=1,
+                end_line=1,
+                metadata={
+                    "chunk_id": chunk_id,
+                    "parent_id": parent_id,
+                    "children_ids": children,
+                    "is_root": parent_id is None,
+                    "is_leaf": not children,
+                },
+            )
+            for content, chunk_id, parent_id, children in [
+                ("# Doc", "r", None, ["a", "b"]),
+                ("## A\n\nAlpha.", "a", "r", []),
+                ("## B\n\nBeta.", "b", "r", []),
+            ]
+        ]
+        result = SimpleNamespace(chunks=nodes, get_flat_chunks=lambda: nodes)
+        monkeypatch.setattr(adapter_module, "chunk_hierarchical", lambda *a: result)
+        adapter = MigrationAdapter(result_cache=ChunkCache())
+        config = adapter.build_chunker_config()
+
+        chunks, index = adapter.run_chunking_indexed("# Doc", config)
+        cached_chunks, cached_index = adapter.run_chunking_indexed("# Doc", config)
+
+        assert [c["metadata"]["chunk_id"] for c in chunks] == ["a", "b"]
+        assert all("children_ids" not in c["metadata"] for c in chunks)
+        assert index.siblings(0) == [1]
+        assert index.ids[index.parent(0)] == "r"
+        assert cached_chunks == chunks
+        assert cached_chunks[0] is not chunks[0]
+        assert cached_index.to_dict() == index.to_dict()
+
+    def test_span_hierarchy(self, monkeypatch):
+        """Test internal nodes keep own content and a span in span mode."""
+        text = "# Doc\n\nIntro.\n\n## A\n\nAlpha.\n"
+        nodes = [
+            SimpleNamespace(
+                content=text.strip(),
+                start_line=1,
+                end_line=7,
+                metadata={"chunk_id": "r", "is_root": True, "is_leaf": False},
+            ),
+            SimpleNamespace(
+                content="# Doc\n\nIntro.\n\n## A\n\nAlpha.",
+                start_line=1,
+                end_line=7,
+                metadata={"chunk_id": "d", "parent_id": "r", "is_leaf": False},
+            ),
+            SimpleNamespace(
+                content="## A\n\nAlpha.",
+                start_line=5,
+                end_line=7,
+                metadata={"chunk_id": "a", "parent_id": "d", "is_leaf": True},
+            ),
+        ]
+        result = SimpleNamespace(chunks=nodes, get_flat_chunks=lambda: nodes)
+        monkeypatch.setattr(adapter_module, "chunk_hierarchical", lambda *a: result)
+        adapter = MigrationAdapter(span_hierarchy=True)
+        config = adapter.build_chunker_config()
+
+        chunks = adapter.run_chunking_structured(text, config, enable_hierarchy=True)
+
+        section, leaf = chunks
+        assert section["content"] == "# Doc\n\nIntro."
+        assert section["metadata"]["content_scope"] == "own"
+        span = section["metadata"]["span"]
+        assert text[span["start_char"] : span["end_char"]].strip() == nodes[1].content
+        assert leaf["content"] == "## A\n\nAlpha."
+        # Decided on the full text, measure not part of RAG metadata
+        assert section["metadata"]["indexable"] is False
+        assert "significant_chars" not in section["metadata"]
+        assert "span" not in leaf["metadata"]
+
+    def test_leaf_only_measures_internal_nodes_once(self, monkeypatch):
+        """Test leaf_only selection and conversion share one measurement."""
+        import output_filter
+
+        section = SimpleNamespace(
+            content="# Doc\n\n" + "Intro text. " * 20,
+            start_line=1,
+            end_line=3,
+            metadata={"chunk_id": "d", "is_leaf": False},
+        )
+        result = SimpleNamespace(
+            chunks=[section], get_flat_chunks=lambda: [section]
+        )
+        monkeypatch.setattr(adapter_module, "chunk_hierarchical", lambda *a: result)
+        calls = []
+
+        def counting(content):
+            calls.append(content)
+            return len(content)
+
+        monkeypatch.setattr(output_filter, "significant_chars", counting)
+        monkeypatch.setattr(adapter_module, "significant_chars", counting)
+        adapter = MigrationAdapter(leaf_only=True)
+        config = adapter.build_chunker_config()
+
+        chunks = adapter.run_chunking_structured(
+            section.content, config, enable_hierarchy=True
+        )
+
+        assert [c["content"] for c in chunks] == [section.content]
+        assert calls == [section.content]
+
+    def test_token_count_in_metadata(self):
+        """Test chunks report their token count only in max_tokens mode."""
+        counter = TokenCounter()
+        adapter = MigrationAdapter(token_counter=counter)
+        text = "# Doc\n\nSome text.\n\n## Sub\n\nMore text."
+
+        plain = adapter.run_chunking_structured(text, adapter.build_chunker_config())
+        fitted = adapter.run_chunking_structured(
+            text, adapter.build_chunker_config(max_tokens=1000), max_tokens=1000
+        )
+
+        assert all("token_count" not in chunk["metadata"] for chunk in plain)
+        assert counter.misses == len(fitted)
+        for chunk in fitted:
+            assert chunk["metadata"]["token_count"] == counter.count(chunk["content"])
+
+    def test_max_tokens_fits_chunks(self):
+        """Test max_tokens re-chunks smaller until chunks fit the budget."""
+        adapter = MigrationAdapter()
+        config = adapter.build_chunker_config(max_tokens=100)
+        text = "\n\n".join(f"## Part {i}\n\n" + "word " * 150 for i in range(4))
+        sizes = []
+
+        def fake_chunking(input_text, config, *args, count_tokens=False):
+            sizes.append(config.max_chunk_size)
+            words = input_text.split(" ")
+            step = max(1, config.max_chunk_size // 2)
+            return [
+                adapter._chunk_to_dict(
+                    SimpleNamespace(
+                        content=" ".join(words[i : i + step]),
+                        start_line=1,
+                        end_line=1,
+                        metadata={"chunk_index": i},
+                    ),
+                    count_tokens=count_tokens,
+                )
+                for i in range(0, len(words), step)
+            ]
+
+        adapter._perform_chunking = fake_chunking
+
+        chunks = adapter.run_chunking_structured(text, config, max_tokens=100)
+
+        assert config.max_chunk_size == 100 * CHARS_PER_TOKEN
+        assert sizes[0] == config.max_chunk_size
+        assert len(sizes) > 1
+        assert all(c["metadata"]["token_count"] <= 100 for c in chunks)
+
+    @pytest.mark.slow
+    def test_iter_chunking_source_10mb(self):
+        """Test a 10MB concatenated manual streams through in windows."""
+        corpus = Path(__file__).parent / "corpus" / "large_concat_1mb.md"
+        text = corpus.read_text(encoding="utf-8")
+        stream = io.StringIO(text * 10)
+        config = self.adapter.build_chunker_config()
+
+        count = sum(
+            1
+            for _ in self.adapter.iter_chunking_source(
+                stream, config, include_metadata=False
+            )
+        )
+        stream.seek(0)
+        windows = set()
+        for chunk in self.adapter.iter_chunking_source(stream, config):
+            meta = json.loads(chunk.split("\n</metadata>", 1)[0][len("<metadata>\n") :])
+            windows.add(meta["stream_window_index"])
+
+        assert count > 0
+        assert len(windows) >= 10 * 1024 * 1024 // (4 * 256 * 1024)
@@ -0,0 +1,134 @@
+"""Tests for OutputFilter and InputValidator pipeline stages."""
+
+from types import SimpleNamespace
+
+from input_validator import InputValidator
+from output_filter import FilterConfig, OutputFilter, significant_chars
+
+
+def _chunk(content, **metadata):
+    return {"content": content, "start_line": 1, "end_line": 1, "metadata": metadata}
+
+
+def _tree():
+    return [
+        _chunk("# Doc", is_root=True, is_leaf=False),
+        _chunk("# Section\n\n" + "Intro text. " * 20, is_root=False, is_leaf=False),
+        _chunk("## Empty parent", is_root=False, is_leaf=False),
+        _chunk("Leaf content.", is_root=False, is_leaf=True),
+    ]
+
+
+class TestOutputFilter:
+    """Tests for root/leaf/indexable filtering."""
+
+    def test_excludes_root(self):
+        """Root chunk is dropped outside debug mode."""
+        result = OutputFilter().filter(_tree())
+        assert len(result) == 3
+        assert not any(c["metadata"]["is_root"] for c in result)
+
+    def test_debug_keeps_all(self):
+        """Debug mode keeps every chunk but still adds indexable."""
+        result = OutputFilter().filter(_tree(), debug=True)
+        assert len(result) == 4
+        assert all("indexable" in c["metadata"] for c in result)
+
+    def test_leaf_only_uses_indexable(self):
+        """leaf_only keeps leaves and non-leaves with significant content."""
+        result = OutputFilter(FilterConfig(leaf_only=True)).filter(_tree())
+        contents = [c["content"] for c in result]
+        assert contents == [_tree()[1]["content"], "Leaf content."]
+
+    def test_respects_library_indexable(self):
+        """Existing indexable values are not overwritten."""
+        chunks = [_chunk("Leaf", is_root=False, is_leaf=True, indexable=False)]
+        result = OutputFilter(FilterConfig(leaf_only=True)).filter(chunks)
+        assert result == []
+
+    def test_iter_filter_is_lazy(self):
+        """iter_filter pulls input chunks one at a time."""
+        pulled = []
+
+        def source():
+            for chunk in _tree():
+                pulled.append(chunk)
+                yield chunk
+
+        first = next(OutputFilter().iter_filter(source()))
+
+        # Root skipped, first section yielded after two pulls
+        assert first["content"].startswith("# Section")
+        assert len(pulled) == 2
+
+    def test_iter_select_matches_filter(self):
+        """Pushdown on library objects keeps what filter() keeps."""
+        for leaf_only in (False, True):
+            output_filter = OutputFilter(FilterConfig(leaf_only=leaf_only))
+            objects = [SimpleNamespace(**c) for c in _tree()]
+
+            selected = list(output_filter.iter_select(objects))
+
+            expected = output_filter.filter(_tree())
+            assert [o.content for o in selected] == [c["content"] for c in expected]
+
+    def test_iter_select_does_not_modify_objects(self):
+        """Library chunks are only read, never given an indexable field."""
+        objects = [SimpleNamespace(**c) for c in _tree()]
+
+        list(OutputFilter(FilterConfig(leaf_only=True)).iter_select(objects))
+
+        assert all("indexable" not in o.metadata for o in objects)
+
+    def test_iter_select_measured_reports_significance(self):
+        """Internal nodes measured during leaf_only selection carry the value."""
+        objects = [SimpleNamespace(**c) for c in _tree()]
+
+        pairs = list(
+            OutputFilter(FilterConfig(leaf_only=True)).iter_select_measured(objects)
+        )
+
+        assert [(o.content, m) for o, m in pairs] == [
+            (objects[1].content, significant_chars(objects[1].content)),
+            ("Leaf content.", None),
+        ]
+
+    def test_significant_chars_matches_line_filter(self):
+        """Single regex pass equals stripping header lines one by one."""
+        samples = [
+            "",
+            "# Only header",
+            "# H\n\nBody text\n## Sub\nMore",
+            "  ## Indented\r\nText\r\n#End",
+            "\n\nBody\n\n# Trailing header\n\n",
+            "a#b\n #c\n\u00a0#d\nend",
+        ]
+        for content in samples:
+            lines = content.strip().split("\n")
+            kept = [line for line in lines if not line.strip().startswith("#")]
+            assert significant_chars(content) == len("\n".join(kept).strip())
+
+    def test_uses_precomputed_significance(self):
+        """A stored significant_chars is compared instead of rescanning."""
+        output_filter = OutputFilter()
+        metadata = {"is_root": False, "is_leaf": False}
+
+        assert not output_filter.is_indexable(metadata, "## Short")
+        metadata["significant_chars"] = 500
+        assert output_filter.is_indexable(metadata, "## Short")
+
+
+class TestInputValidator:
+    """Tests for default metadata fields."""
+
+    def test_defaults_applied(self):
+        """Missing is_leaf/is_root get defaults."""
+        chunks = InputValidator().validate_and_fix([_chunk("x")])
+        assert chunks[0]["metadata"] == {"is_leaf": True, "is_root": False}
+
+    def test_iter_matches_list(self):
+        """Lazy and list variants produce the same chunks."""
+        validator = InputValidator()
+        lazy = list(validator.iter_validate_and_fix([_chunk("a"), _chunk("b")]))
+        eager = validator.validate_and_fix([_chunk("a"), _chunk("b")])
+        assert lazy == eager
@@ -0,0 +1,149 @@
+"""Tests for in-process Prometheus-style metrics."""
+
+import urllib.request
+
+from plugin_metrics import (
+    DEFAULT_TEXTFILE_INTERVAL,
+    MetricsRegistry,
+    PluginMetrics,
+    size_bucket,
+    start_http_server,
+    write_textfile,
+)
+
+
+class TestExposition:
+    """Tests for counter/histogram text rendering."""
+
+    def test_counter_with_labels(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("x_total", "Things.", ("kind",))
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        counter.inc(kind='q"uote')
+
+        text = registry.render()
+
+        assert "# TYPE x_total counter" in text
+        assert 'x_total{kind="a"} 3' in text
+        assert 'x_total{kind="q\\"uote"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("lat_seconds", "Latency.", buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        text = registry.render()
+
+        assert 'lat_seconds_bucket{le="0.1"} 1' in text
+        assert 'lat_seconds_bucket{le="1"} 2' in text
+        assert 'lat_seconds_bucket{le="+Inf"} 3' in text
+        assert "lat_seconds_sum 5.55" in text
+        assert "lat_seconds_count 3" in text
+
+    def test_size_bucket(self):
+        assert size_bucket(10) == "lt_1kb"
+        assert size_bucket(50 * 1024) == "lt_100kb"
+        assert size_bucket(10 * 1024 * 1024) == "ge_1mb"
+
+
+class TestPluginMetrics:
+    """Tests for the plugin metric set."""
+
+    def test_observe_invocation(self):
+        metrics = PluginMetrics()
+        metrics.observe_invocation("text", "auto", 2048, 5, 0.02)
+        metrics.observe_invocation("text", "bogus", 10, 0, 0.01, error="validation")
+
+        assert metrics.invocations.value(mode="text") == 2
+        assert metrics.errors.value(type="validation") == 1
+        assert metrics.input_bytes.value() == 2058
+        assert metrics.chunks.value() == 5
+        assert metrics.latency.count(strategy="other", size_bucket="lt_1kb") == 1
+
+    def test_cache_families_rendered_once(self):
+        """Several caches share one HELP/TYPE header per metric family."""
+        metrics = PluginMetrics()
+        metrics.register_cache("adapters", lambda: {"hits": 3, "misses": 1})
+        metrics.register_cache(
+            "results", lambda: {"hits": 1, "disk_hits": 1, "misses": 2}
+        )
+
+        text = metrics.render()
+
+        assert text.count("# TYPE markdown_chunker_cache_hits_total counter") == 1
+        assert 'markdown_chunker_cache_hits_total{cache="adapters"} 3' in text
+        assert 'markdown_chunker_cache_hits_total{cache="results"} 2' in text
+
+    def test_textfile_written_per_invocation(self, tmp_path):
+        path = tmp_path / "metrics.prom"
+        metrics = PluginMetrics(textfile_path=path, textfile_interval=0)
+
+        metrics.observe_invocation("json", "auto", 100, 1, 0.01)
+
+        assert 'markdown_chunker_invocations_total{mode="json"} 1' in path.read_text()
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_textfile_write_is_throttled(self, tmp_path):
+        """Invocations only schedule one background write per interval."""
+        path = tmp_path / "metrics.prom"
+        metrics = PluginMetrics(textfile_path=path, textfile_interval=60)
+
+        metrics.observe_invocation("json", "auto", 100, 1, 0.01)
+        metrics.observe_invocation("json", "auto", 100, 1, 0.01)
+
+        assert not path.exists()
+        timer = metrics._flush_timer
+        assert timer is not None and timer.is_alive()
+
+        metrics.flush()
+
+        assert 'markdown_chunker_invocations_total{mode="json"} 2' in path.read_text()
+        assert metrics._flush_timer is None and timer.finished.is_set()
+
+    def test_from_env_textfile_pid(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(
+            "MARKDOWN_CHUNKER_METRICS_FILE", str(tmp_path / "chunker-{pid}.prom")
+        )
+        monkeypatch.delenv("MARKDOWN_CHUNKER_METRICS_PORT", raising=False)
+
+        metrics = PluginMetrics.from_env()
+
+        assert "{pid}" not in str(metrics.textfile_path)
+        assert metrics.server is None
+
+    def test_from_env_invalid_values(self, monkeypatch):
+        monkeypatch.delenv("MARKDOWN_CHUNKER_METRICS_FILE", raising=False)
+        monkeypatch.setenv("MARKDOWN_CHUNKER_METRICS_FILE_INTERVAL", "soon")
+        monkeypatch.setenv("MARKDOWN_CHUNKER_METRICS_PORT", "metrics")
+
+        metrics = PluginMetrics.from_env()
+
+        assert metrics.textfile_interval == DEFAULT_TEXTFILE_INTERVAL
+        assert metrics.server is None
+
+    def test_http_endpoint(self):
+        metrics = PluginMetrics()
+        metrics.observe_invocation("text", "auto", 100, 1, 0.01)
+        server = start_http_server(metrics.registry, port=0)
+        try:
+            port = server.server_address[1]
+            url = f"http://127.0.0.1:{port}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read().decode("utf-8")
+        finally:
+            server.shutdown()
+
+        assert "markdown_chunker_invocations_total" in body
+
+
+def test_write_textfile_replaces(tmp_path):
+    registry = MetricsRegistry()
+    path = tmp_path / "m.prom"
+    path.write_text("stale")
+
+    write_textfile(registry, path)
+
+    assert path.read_text() == "\n"
@@ -0,0 +1,96 @@
+"""Tests for the input size guard."""
+
+import sys
+
+import pytest
+
+from size_guard import MEMORY_FACTORS, SizeGuard
+
+
+def _limit_for(text, factor):
+    """Memory limit just fitting text at a given memory factor."""
+    return sys.getsizeof(text) * factor
+
+
+class TestSizeGuard:
+    """Tests for SizeGuard.plan()."""
+
+    text = "# Header\n\n" + "Paragraph text. " * 1000
+
+    def test_small_input_unchanged(self):
+        guard = SizeGuard(memory_limit=512 * 1024 * 1024)
+
+        plan = guard.plan(self.text, enable_hierarchy=True, debug=True)
+
+        assert (plan.enable_hierarchy, plan.debug, plan.windowed) == (
+            True,
+            True,
+            False,
+        )
+        assert plan.reasons == ()
+
+    def test_disables_debug_first(self):
+        limit = _limit_for(self.text, MEMORY_FACTORS["hierarchical"])
+        guard = SizeGuard(memory_limit=limit)
+
+        plan = guard.plan(self.text, enable_hierarchy=True, debug=True)
+
+        assert plan.enable_hierarchy and not plan.debug and not plan.windowed
+        assert plan.reasons == ("debug_disabled",)
+
+    def test_switches_to_windowed(self):
+        # Large enough that the window working set is not dominant
+        text = self.text * 50
+        windowed = SizeGuard(memory_limit=0).estimate(text, False, False, True)
+        guard = SizeGuard(memory_limit=windowed)
+
+        plan = guard.plan(text, enable_hierarchy=True, debug=False)
+
+        assert plan.windowed and not plan.enable_hierarchy
+        assert plan.reasons == ("windowed",)
+        assert plan.estimated_bytes <= guard.memory_limit
+
+    def test_rejects_when_nothing_fits(self):
+        guard = SizeGuard(memory_limit=1024)
+
+        with pytest.raises(ValueError, match="too large"):
+            guard.plan(self.text, enable_hierarchy=False, debug=False)
+
+    def test_max_input_chars(self):
+        guard = SizeGuard(memory_limit=2**40, max_input_chars=100)
+
+        with pytest.raises(ValueError, match="exceeds the limit"):
+            guard.plan(self.text, enable_hierarchy=False, debug=False)
+
+    def test_estimate_counts_string_width(self):
+        """Non-ASCII text is estimated at its in-memory width."""
+        guard = SizeGuard(memory_limit=2**30)
+        ascii_text = "a" * 10000
+        cyrillic_text = "я" * 10000
+
+        assert guard.estimate(cyrillic_text, False, False) > guard.estimate(
+            ascii_text, False, False
+        )
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("MARKDOWN_CHUNKER_MEMORY_LIMIT_BYTES", "1000000")
+        monkeypatch.setenv("MARKDOWN_CHUNKER_MAX_INPUT_CHARS", "5000")
+        guard = SizeGuard.from_env()
+        assert guard.memory_limit == 1000000
+        assert guard.max_input_chars == 5000
+
+        monkeypatch.setenv("MARKDOWN_CHUNKER_MEMORY_LIMIT_BYTES", "0")
+        assert SizeGuard.from_env() is None
+
+        monkeypatch.setenv("MARKDOWN_CHUNKER_MEMORY_LIMIT_BYTES", "lots")
+        assert SizeGuard.from_env() is None
+
+        monkeypatch.delenv("MARKDOWN_CHUNKER_MEMORY_LIMIT_BYTES")
+        assert SizeGuard.from_env() is None
+
+        monkeypatch.setenv("MARKDOWN_CHUNKER_MEMORY_LIMIT_BYTES", "auto")
+        monkeypatch.delenv("MARKDOWN_CHUNKER_MAX_INPUT_CHARS")
+        guard = SizeGuard.from_env()
+        assert guard.memory_limit > 0
+        assert guard.max_input_chars is None
+
@@ -0,0 +1,101 @@
+"""Tests for per-stage pipeline timing."""
+
+import logging
+import time
+
+from stage_timing import StageTimings, timed, timing_enabled_from_env
+
+
+def _busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestStageTimings:
+    """Tests for StageTimings accounting."""
+
+    def test_stage_context(self):
+        """A timed block is recorded with wall and CPU time."""
+        timings = StageTimings(input_chars=10)
+        with timings.stage("config_build"):
+            _busy(0.01)
+
+        stage = timings.to_dict()["stages"]["config_build"]
+        assert stage["wall_ms"] >= 10
+        assert stage["cpu_ms"] > 0
+
+    def test_nested_generators_get_exclusive_time(self):
+        """Each lazy stage is charged only for its own work."""
+        timings = StageTimings()
+
+        def produce():
+            for i in range(5):
+                _busy(0.004)
+                yield i
+
+        def consume(items):
+            for item in items:
+                yield item
+
+        inner = timings.iter_stage("produce", produce())
+        outer = timings.iter_stage("consume", consume(inner))
+        assert list(outer) == list(range(5))
+
+        stages = timings.to_dict()["stages"]
+        assert stages["produce"]["wall_ms"] >= 20
+        assert stages["consume"]["wall_ms"] < stages["produce"]["wall_ms"] / 2
+
+    def test_count_chunks_records_strategy(self):
+        """Chunk count and first strategy are taken from passing chunks."""
+        timings = StageTimings()
+        chunks = [{"metadata": {"strategy": "structural"}}, {"metadata": {}}]
+
+        assert list(timings.count_chunks(chunks)) == chunks
+        assert timings.chunk_count == 2
+        assert timings.strategy == "structural"
+
+    def test_active_stages_reported_mid_request(self):
+        """A record taken inside a stage names the stage still running."""
+        timings = StageTimings()
+        with timings.stage("chunk_markdown"):
+            record = timings.to_dict()
+
+        assert record["active_stages"] == ["chunk_markdown"]
+        assert "active_stages" not in timings.to_dict()
+
+    def test_log_emits_json_line(self, caplog):
+        """The record is logged as one line."""
+        timings = StageTimings(input_chars=3)
+        with caplog.at_level(logging.INFO):
+            timings.log(logging.getLogger("test"))
+
+        assert '"input_chars": 3' in caplog.text
+        assert "[StageTimings]" in caplog.text
+
+
+class TestTimingToggles:
+    """Tests for the disabled path and env toggle."""
+
+    def test_timed_without_record_is_noop(self):
+        with timed(None, "anything"):
+            pass
+
+    def test_disabled_record_counts_without_timing(self):
+        """enabled=False keeps count and strategy but times no stage."""
+        timings = StageTimings(enabled=False)
+        chunks = [{"metadata": {"strategy": "list_aware"}}]
+
+        with timed(timings, "chunk_markdown"):
+            passed = list(timings.iter_stage("render", timings.count_chunks(chunks)))
+
+        assert passed == chunks
+        assert timings.strategy == "list_aware"
+        assert timings.chunk_count == 1
+        assert timings.to_dict()["stages"] == {}
+
+    def test_env_toggle(self, monkeypatch):
+        monkeypatch.setenv("MARKDOWN_CHUNKER_TIMING", "1")
+        assert timing_enabled_from_env() is True
+        monkeypatch.setenv("MARKDOWN_CHUNKER_TIMING", "0")
+        assert timing_enabled_from_env() is False
@@ -0,0 +1,177 @@
+"""Tests for fence-aware windowing of large Markdown sources."""
+
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+from stream_input import (
+    PREAMBLE_PATH,
+    FenceTracker,
+    HeaderContext,
+    iter_text_lines,
+    iter_windows,
+    open_source,
+)
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+
+def _windows(text, window_chars, **kwargs):
+    return list(iter_windows(io.StringIO(text), window_chars, **kwargs))
+
+
+def _ends_outside_fence(text):
+    tracker = FenceTracker()
+    for line in text.splitlines():
+        tracker.feed(line)
+    return not tracker.inside
+
+
+class TestFenceTracker:
+    """Tests for fence state tracking."""
+
+    def test_backtick_and_tilde(self):
+        """Fences open and close with matching markers."""
+        tracker = FenceTracker()
+        for line, inside in [
+            ("```python", True),
+            ("~~~", True),
+            ("```", False),
+            ("~~~~", True),
+            ("```", True),
+            ("~~~~~", False),
+        ]:
+            tracker.feed(line)
+            assert tracker.inside is inside
+
+    def test_longer_outer_fence(self):
+        """Inner shorter fences do not close a longer outer fence."""
+        tracker = FenceTracker()
+        for line in ["````", "```", "code", "```"]:
+            tracker.feed(line)
+        assert tracker.inside
+        tracker.feed("````")
+        assert not tracker.inside
+
+    def test_info_string_does_not_close(self):
+        """A fence line with an info string cannot close a block."""
+        tracker = FenceTracker()
+        tracker.feed("```markdown")
+        tracker.feed("```python")
+        assert tracker.inside
+
+
+class TestIterWindows:
+    """Tests for window splitting."""
+
+    def test_windows_cover_source_exactly(self):
+        """Concatenated windows reproduce the source, line numbers align."""
+        text = (CORPUS_DIR / "large_concat_1mb.md").read_text(encoding="utf-8")
+        source_lines = text.splitlines(keepends=True)
+
+        windows = _windows(text, 16 * 1024)
+
+        assert "".join(w.text for w in windows) == text
+        assert [w.index for w in windows] == list(range(len(windows)))
+        for window in windows:
+            assert source_lines[window.start_line - 1] == window.text.splitlines(
+                keepends=True
+            )[0]
+            assert len(window.text) <= 4 * 16 * 1024
+
+    def test_fences_never_split(self):
+        """No window boundary falls inside a code fence.
+
+        The last window may end inside one: some fixtures leave a fence
+        unclosed on purpose.
+        """
+        files = [CORPUS_DIR / "deep_fencing.md"]
+        files += sorted((CORPUS_DIR / "nested_fencing").glob("*.md"))
+
+        for path in files:
+            text = path.read_text(encoding="utf-8")
+            windows = _windows(text, 512, max_window_chars=1024 * 1024)
+            for window in windows[:-1]:
+                assert _ends_outside_fence(window.text), path.name
+
+    def test_prefers_header_boundaries(self):
+        """Windows start at headers when sections are available."""
+        text = "".join(f"## Section {i}\n\n" + "Text line.\n" * 20 for i in range(20))
+
+        windows = _windows(text, 600)
+
+        assert len(windows) > 1
+        assert all(w.text.startswith("## Section") for w in windows)
+
+    def test_hard_cap_on_single_table(self, tmp_path, monkeypatch):
+        """A 5MB single table is split at the hard cap with bounded windows."""
+        sys.path.insert(0, str(CORPUS_DIR))
+        import generate_large_files
+
+        monkeypatch.setattr(generate_large_files, "get_corpus_dir", lambda: tmp_path)
+        generate_large_files.generate_long_table()
+        path = tmp_path / "long_table.md"
+
+        stream, owned = open_source(path)
+        try:
+            sizes = [len(w.text) for w in iter_windows(stream, 64 * 1024)]
+        finally:
+            stream.close()
+
+        assert owned
+        assert len(sizes) > 1
+        assert max(sizes) <= 4 * 64 * 1024 + 200
+        assert sum(sizes) == len(path.read_text(encoding="utf-8"))
+
+    def test_binary_stream(self):
+        """Binary streams are decoded as UTF-8."""
+        stream, owned = open_source(io.BytesIO("# Заголовок\n\nТекст\n".encode()))
+        windows = list(iter_windows(stream))
+
+        assert not owned
+        assert windows[0].text == "# Заголовок\n\nТекст\n"
+
+    def test_invalid_window(self):
+        """window_chars below 1 is rejected."""
+        with pytest.raises(ValueError):
+            _windows("text", 0)
+
+    def test_in_memory_text_lines(self):
+        """iter_text_lines windows a string like the equivalent stream."""
+        text = "# A\n\ntext\n\n# B\n\nmore"
+
+        assert list(iter_text_lines(text)) == io.StringIO(text).readlines()
+        assert list(iter_windows(iter_text_lines(text), 8)) == _windows(text, 8)
+
+
+class TestHeaderContext:
+    """Tests for header_path completion across windows."""
+
+    def test_first_window_unchanged(self):
+        """Paths of the first window are the library's own."""
+        context = HeaderContext()
+        context.enter("# Guide\n\nIntro.\n")
+
+        assert context.header_path("/Guide", 3) == "/Guide"
+        assert context.header_path(PREAMBLE_PATH, 1) == PREAMBLE_PATH
+
+    def test_section_continues_into_next_window(self):
+        """Text before a window's first header continues the open section."""
+        context = HeaderContext()
+        context.enter("# Guide\n\n## Install\n\nStep one.\n\n")
+        context.enter("Step two.\n\n### Linux\n\napt\n\n## Usage\n\nRun.\n")
+
+        assert context.header_path(PREAMBLE_PATH, 1) == "/Guide/Install"
+        assert context.header_path("/Linux", 3) == "/Guide/Install/Linux"
+        # A shallower header closes the carried section
+        assert context.header_path("/Usage", 7) == "/Guide/Usage"
+
+    def test_headers_in_fences_ignored(self):
+        """Header-like lines inside code fences are not carried."""
+        context = HeaderContext()
+        context.enter("# Guide\n\n```\n# comment\n```\n\n")
+        context.enter("More.\n")
+
+        assert context.header_path(PREAMBLE_PATH, 1) == "/Guide"
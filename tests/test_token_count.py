@@ -0,0 +1,101 @@
+"""Tests for token counting."""
+
+import pytest
+
+import token_count
+from token_count import (
+    ENV_TOKENIZER,
+    HeuristicTokenizer,
+    TiktokenTokenizer,
+    TokenCounter,
+    token_counter_from_env,
+)
+
+
+class CountingTokenizer:
+    """Tokenizer recording how often it is called."""
+
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return len(text.split())
+
+
+class TestHeuristicTokenizer:
+    """Tests for the regex token estimate."""
+
+    def test_counts_words_and_punctuation(self):
+        assert HeuristicTokenizer().count("Hello, world!") == 4
+
+    def test_long_words_and_numbers_split(self):
+        tokenizer = HeuristicTokenizer()
+
+        assert tokenizer.count("internationalization") == 4
+        assert tokenizer.count("1234567") == 3
+
+    def test_cjk_characters_count_individually(self):
+        assert HeuristicTokenizer().count("中文文本") == 4
+
+
+class TestTokenCounter:
+    """Tests for the cached counter."""
+
+    def test_repeated_text_is_tokenized_once(self):
+        tokenizer = CountingTokenizer()
+        counter = TokenCounter(tokenizer)
+
+        assert counter.count("a b c") == 3
+        assert counter.count("a b c") == 3
+
+        assert tokenizer.calls == 1
+        assert (counter.hits, counter.misses) == (1, 1)
+
+    def test_evicts_least_recently_used(self):
+        tokenizer = CountingTokenizer()
+        counter = TokenCounter(tokenizer, max_entries=2)
+
+        counter.count("one")
+        counter.count("two")
+        counter.count("one")
+        counter.count("three")
+        counter.count("one")
+        counter.count("two")
+
+        assert tokenizer.calls == 4
+
+    def test_cache_does_not_keep_texts(self):
+        """Entries are keyed by digest, not by the (possibly huge) text."""
+        counter = TokenCounter(CountingTokenizer())
+        text = "word " * 10_000
+
+        counter.count(text)
+
+        assert all(len(key) == 16 for key in counter._counts)
+
+    def test_name_comes_from_tokenizer(self):
+        assert TokenCounter().name == "heuristic"
+        assert TokenCounter(CountingTokenizer()).name == "counting"
+
+
+class TestTokenCounterFromEnv:
+    """Tests for tokenizer selection from the environment."""
+
+    def test_default_is_heuristic(self, monkeypatch):
+        monkeypatch.delenv(ENV_TOKENIZER, raising=False)
+
+        assert token_counter_from_env().name == "heuristic"
+
+    def test_unloadable_file_falls_back(self, monkeypatch, tmp_path):
+        monkeypatch.setenv(ENV_TOKENIZER, str(tmp_path / "missing.tiktoken"))
+
+        assert token_counter_from_env().name == "heuristic"
+
+    def test_tiktoken_requires_package(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(token_count, "tiktoken", None)
+
+        with pytest.raises(ImportError):
+            TiktokenTokenizer(tmp_path / "cl100k_base.tiktoken")
@@ -68,7 +68,8 @@ class TestToolYAML:
         input_text = next(p for p in parameters if p["name"] == "input_text")
 
         assert input_text["type"] == "string"
-        assert input_text["required"] is True
+        # Optional so batch calls (input_texts) need no dummy input_text
+        assert input_text["required"] is False
         assert input_text["form"] == "llm"
 
     def test_max_chunk_size_parameter(self, tool_data):
@@ -0,0 +1,184 @@
+"""
+Token counting for chunk metadata and max_tokens sizing.
+
+Embedding models bill and truncate by tokens, while the chunker sizes
+chunks in characters. Every chunk carries metadata["token_count"] from
+a pluggable tokenizer, and MigrationAdapter uses the counts to fit
+chunks to a max_tokens budget (see MigrationAdapter._fit_to_tokens).
+
+Tokenizers are local only, nothing is downloaded:
+- "heuristic" (default): regex estimator, close to BPE counts for
+  English prose and code, one token per CJK character
+- a path to a tiktoken BPE file (e.g. a bundled cl100k_base.tiktoken),
+  counted exactly with tiktoken when it is installed
+
+Counts are cached per text, so re-measuring the same chunk (for example
+across token fitting passes) does not tokenize it again. The cache is
+keyed by a 16-byte BLAKE2b digest of the text, so it never holds the
+texts themselves (hierarchical root nodes hold whole documents).
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Protocol
+
+try:
+    import tiktoken
+    from tiktoken.load import load_tiktoken_bpe
+except ImportError:  # Optional, the heuristic estimator is the fallback
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+ENV_TOKENIZER = "MARKDOWN_CHUNKER_TOKENIZER"
+
+TOKEN_COUNT_KEY = "token_count"
+
+# Starting point for converting a token budget to max_chunk_size
+CHARS_PER_TOKEN = 4
+
+DEFAULT_CACHE_ENTRIES = 8192
+
+# One token per CJK character, up to 3 digits, up to 6 letters of a word,
+# and per punctuation character
+_HEURISTIC_PATTERN = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]"
+    r"|\d{1,3}"
+    r"|[^\W\d_]{1,6}"
+    r"|[^\w\s]"
+)
+
+# Pre-tokenization pattern of cl100k_base
+CL100K_PATTERN = (
+    r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}+|\p{N}{1,3}|"""
+    r""" ?[^\s\p{L}\p{N}]++[\r\n]*|\s*[\r\n]|\s+(?!\S)|\s+"""
+)
+
+
+class Tokenizer(Protocol):
+    """Anything that can count the tokens of a text.
+
+    Tokenizers may also set spec, the MARKDOWN_CHUNKER_TOKENIZER value
+    that rebuilds them (see token_counter_from_spec), e.g. in worker
+    processes. Without it a tokenizer is used in-process only.
+    """
+
+    name: str
+
+    def count(self, text: str) -> int: ...
+
+
+class HeuristicTokenizer:
+    """Fast dependency-free token estimate."""
+
+    name = "heuristic"
+    spec = "heuristic"
+
+    def count(self, text: str) -> int:
+        return sum(1 for _ in _HEURISTIC_PATTERN.finditer(text))
+
+
+class TiktokenTokenizer:
+    """Exact BPE counts from a local tiktoken file."""
+
+    def __init__(self, path: str | Path, pat_str: str = CL100K_PATTERN) -> None:
+        """
+        Args:
+            path: Local .tiktoken BPE ranks file
+            pat_str: Pre-tokenization regex of the encoding
+
+        Raises:
+            ImportError: If tiktoken is not installed
+        """
+        if tiktoken is None:
+            raise ImportError("tiktoken is required for BPE token counting")
+        self.name = Path(path).stem
+        self.spec = str(path)
+        self._encoding = tiktoken.Encoding(
+            name=self.name,
+            pat_str=pat_str,
+            mergeable_ranks=load_tiktoken_bpe(str(path)),
+            special_tokens={},
+        )
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode_ordinary(text))
+
+
+class TokenCounter:
+    """Thread-safe LRU cache of token counts in front of a tokenizer."""
+
+    def __init__(
+        self,
+        tokenizer: Tokenizer | None = None,
+        max_entries: int = DEFAULT_CACHE_ENTRIES,
+    ) -> None:
+        self.tokenizer = tokenizer or HeuristicTokenizer()
+        self.max_entries = max_entries
+        self._counts: OrderedDict[bytes, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def name(self) -> str:
+        return self.tokenizer.name
+
+    @property
+    def spec(self) -> str | None:
+        """Value rebuilding this tokenizer, None for custom tokenizers."""
+        return getattr(self.tokenizer, "spec", None)
+
+    def count(self, text: str) -> int:
+        """Token count of text, from the cache when already measured."""
+        key = hashlib.blake2b(
+            text.encode("utf-8", "surrogatepass"), digest_size=16
+        ).digest()
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+                self.hits += 1
+                return count
+
+        count = self.tokenizer.count(text)
+        with self._lock:
+            self.misses += 1
+            self._counts[key] = count
+            if len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return count
+
+
+def token_counter_from_env() -> TokenCounter:
+    """
+    Build the counter from MARKDOWN_CHUNKER_TOKENIZER.
+
+    Unset or "heuristic" selects the estimator; any other value is a path
+    to a tiktoken BPE file. If that cannot be loaded, the estimator is
+    used and a warning logged.
+    """
+    return token_counter_from_spec(os.environ.get(ENV_TOKENIZER, ""))
+
+
+def token_counter_from_spec(spec: str) -> TokenCounter:
+    """Counter for a tokenizer spec ("heuristic", "" or a tiktoken path)."""
+    if not spec or spec == HeuristicTokenizer.spec:
+        return TokenCounter()
+    try:
+        return TokenCounter(TiktokenTokenizer(spec))
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning(
+            f"[TokenCounter] Cannot load tokenizer {spec!r} ({e}), "
+            "using the heuristic estimator"
+        )
+        return TokenCounter()
+
+
+# Shared by all adapters in the process
+default_token_counter = token_counter_from_env()
@@ -8,6 +8,9 @@ Version: 2.1.5
 Date: 2026-01-04
 """
 
+import json
+import logging
+import time
 from collections.abc import Generator
 from typing import Any
 
@@ -15,6 +18,49 @@ from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
 from adapter import MigrationAdapter
+from adapter_registry import registry
+from batch_executor import BatchExecutor
+from chunk_cache import ChunkCache
+from chunk_dedup import DedupConfig
+from deadline import Deadline, deadline_seconds_from_env
+from metadata_render import RenderOptions, parse_metadata_fields
+from plugin_metrics import PluginMetrics
+from size_guard import SizeGuard
+from stage_timing import StageTimings, timing_enabled_from_env
+
+logger = logging.getLogger(__name__)
+
+# Shared result cache; opt-in via MARKDOWN_CHUNKER_CACHE_* env vars (None: off)
+result_cache = ChunkCache.from_env()
+
+# Opt-in memory estimate check before chunking
+# (MARKDOWN_CHUNKER_MEMORY_LIMIT_BYTES; None: off)
+size_guard = SizeGuard.from_env()
+
+# Optional process pool for input_texts batches (MARKDOWN_CHUNKER_BATCH_WORKERS)
+batch_executor = BatchExecutor.from_env()
+
+# Rendered chunks per message in stream_output mode
+STREAM_GROUP_SIZE = 32
+
+OUTPUT_FORMATS = ("text", "json")
+
+# Internal hierarchy node content: full subtree text or own text plus span
+HIERARCHY_CONTENTS = ("full", "span")
+
+# Per-stage timing for every request (MARKDOWN_CHUNKER_TIMING); always on in debug
+TIMING_ENABLED = timing_enabled_from_env()
+
+# Opt-in time budget per request before degrading
+# (MARKDOWN_CHUNKER_DEADLINE_SECONDS; None: no deadline)
+DEADLINE_SECONDS = deadline_seconds_from_env()
+
+# Process metrics; exported via MARKDOWN_CHUNKER_METRICS_FILE / _PORT
+plugin_metrics = PluginMetrics.from_env()
+plugin_metrics.register_cache("adapters", lambda: registry.stats()["adapters"])
+plugin_metrics.register_cache("configs", lambda: registry.stats()["configs"])
+if result_cache is not None:
+    plugin_metrics.register_cache("results", result_cache.stats)
 
 
 class MarkdownChunkTool(Tool):
@@ -42,11 +88,14 @@ class MarkdownChunkTool(Tool):
 
         Args:
             tool_parameters: Parameters from YAML:
-                - input_text (str, required): Markdown text to chunk
+                - input_text (str): Markdown text to chunk; required
+                  unless input_texts is given
                 - max_chunk_size (int, optional): Maximum chunk size
                   (default: 4096)
                 - chunk_overlap (int, optional): Overlap between chunks
                   (default: 200)
+                - max_tokens (int, optional): Maximum tokens per chunk,
+                  replaces max_chunk_size when > 0 (default: 0)
                 - strategy (str, optional): Chunking strategy (default: "auto")
                 - include_metadata (bool, optional): Include metadata
                   (default: True)
@@ -56,37 +105,148 @@ class MarkdownChunkTool(Tool):
                   (default: False)
                 - leaf_only (bool, optional): Return only leaf chunks in
                   hierarchical mode (default: False)
+                - input_texts (list[str] | str, optional): Batch of Markdown
+                  documents (array or JSON array string). Exactly one of
+                  input_text and input_texts must be given; result then
+                  holds one {index, chunks, error} entry per document.
+                - stream_output (bool, optional): Yield rendered chunks in
+                  groups of STREAM_GROUP_SIZE as JSON messages
+                  {offset, chunks} instead of one 'result' variable
+                  (default: False). Applies to single-document mode.
+                - metadata_format (str, optional): "pretty" (indented) or
+                  "compact" JSON in the <metadata> header (default: "pretty")
+                - metadata_fields (str, optional): Comma-separated whitelist
+                  of metadata fields to return outside debug mode
+                  (default: "" - all RAG fields)
+                - output_format (str, optional): "text" returns rendered
+                  strings in 'result'; "json" yields a JSON message
+                  {chunks: [{content, metadata, start_line, end_line}]}
+                  (default: "text"). Not applied in batch mode.
+                - navigation_index (bool, optional): With enable_hierarchy
+                  and output_format "json", add a navigation index
+                  {size, ids, parents, child_offsets, children} and drop
+                  children_ids/sibling_ids from metadata (default: False)
+                - hierarchy_content (str, optional): "full" subtree text in
+                  internal hierarchy nodes, or "span": own content plus
+                  metadata["span"] into the source (default: "full")
+                - dedup (str, optional): Duplicate chunks across a batch:
+                  "off", "annotate" (metadata["duplicate_of"]) or "drop"
+                  (default: "off"). Batch mode only.
+
+        With debug or MARKDOWN_CHUNKER_TIMING enabled, per-stage wall/CPU
+        timings are logged (also on failure or timeout); in debug mode they
+        are additionally yielded as a JSON message {timing}.
+
+        If DEADLINE_SECONDS is set, single-document requests run against
+        that budget: a document projected or found to exceed it is chunked
+        with a cheaper config or returned partially, with
+        metadata["degraded"] on its chunks, instead of being killed by the
+        request timeout. Such a request also yields a "degraded" variable
+        listing the reasons, so partial output is visible without
+        inspecting chunk metadata.
 
         Yields:
             ToolInvokeMessage: Success message with chunked results or
             error message
         """
+        timings = None
+        deadline = Deadline(DEADLINE_SECONDS) if DEADLINE_SECONDS else None
+        # Metrics for this invocation, recorded in finally
+        started = time.perf_counter()
+        mode = "text"
+        strategy = "auto"
+        input_bytes = 0
+        chunk_count = 0
+        error_type = None
         try:
-            # 1. Extract and validate input_text
+            # 1. Extract and validate input_text (or input_texts batch)
             input_text = tool_parameters.get("input_text", "")
-            if not input_text or not input_text.strip():
+            input_texts = self._parse_input_texts(tool_parameters.get("input_texts"))
+            has_input_text = bool(input_text and input_text.strip())
+            if not input_texts and not has_input_text:
+                error_type = "validation"
                 yield self.create_text_message(
                     "Error: input_text is required and cannot be empty"
                 )
                 return
+            if input_texts and has_input_text:
+                error_type = "validation"
+                yield self.create_text_message(
+                    "Error: provide either input_text or input_texts, not both"
+                )
+                return
+            if input_texts:
+                input_bytes = sum(
+                    len(text.encode("utf-8"))
+                    for text in input_texts
+                    if isinstance(text, str)
+                )
+            else:
+                input_bytes = len(input_text.encode("utf-8"))
 
             # 2. Extract optional parameters with defaults
             max_chunk_size = tool_parameters.get("max_chunk_size", 4096)
             chunk_overlap = tool_parameters.get("chunk_overlap", 200)
+            max_tokens = int(tool_parameters.get("max_tokens") or 0) or None
             strategy = tool_parameters.get("strategy", "auto")
             include_metadata = tool_parameters.get("include_metadata", True)
             enable_hierarchy = tool_parameters.get("enable_hierarchy", False)
             debug = tool_parameters.get("debug", False)
             leaf_only = tool_parameters.get("leaf_only", False)
+            stream_output = tool_parameters.get("stream_output", False)
+            render_options = RenderOptions(
+                metadata_format=tool_parameters.get("metadata_format") or "pretty",
+                metadata_fields=parse_metadata_fields(
+                    tool_parameters.get("metadata_fields")
+                ),
+            )
+            output_format = tool_parameters.get("output_format") or "text"
+            navigation_index = tool_parameters.get("navigation_index", False)
+            hierarchy_content = tool_parameters.get("hierarchy_content") or "full"
+            if hierarchy_content not in HIERARCHY_CONTENTS:
+                raise ValueError(
+                    f"hierarchy_content must be one of {HIERARCHY_CONTENTS}, "
+                    f"got {hierarchy_content!r}"
+                )
+            span_hierarchy = hierarchy_content == "span"
+            if output_format not in OUTPUT_FORMATS:
+                raise ValueError(
+                    f"output_format must be one of {OUTPUT_FORMATS}, "
+                    f"got {output_format!r}"
+                )
+            dedup = DedupConfig(mode=tool_parameters.get("dedup") or "off")
+            if not input_texts:
+                # Without timing enabled this only records the strategy used
+                timings = StageTimings(
+                    input_chars=len(input_text), enabled=bool(debug or TIMING_ENABLED)
+                )
 
             # 3. Use migration adapter for chunking
-            adapter = MigrationAdapter(leaf_only=leaf_only)
+            # Adapters and configs are shared across invocations via registry
+            adapter = registry.get_adapter(
+                leaf_only,
+                lambda: MigrationAdapter(
+                    leaf_only=leaf_only,
+                    result_cache=result_cache,
+                    size_guard=size_guard,
+                    span_hierarchy=span_hierarchy,
+                ),
+                span_hierarchy=span_hierarchy,
+            )
 
             # Build config using adapter
-            config = adapter.build_chunker_config(
-                max_chunk_size=max_chunk_size,
-                chunk_overlap=chunk_overlap,
-                strategy=strategy,
+            config = registry.get_config(
+                max_chunk_size,
+                chunk_overlap,
+                strategy,
+                lambda: adapter.build_chunker_config(
+                    max_chunk_size=max_chunk_size,
+                    chunk_overlap=chunk_overlap,
+                    strategy=strategy,
+                    timings=timings,
+                    max_tokens=max_tokens,
+                ),
+                max_tokens=max_tokens,
             )
 
             # Parse tool flags (leaf_only already passed to adapter constructor)
@@ -98,19 +258,153 @@ class MarkdownChunkTool(Tool):
             )
 
             # 4. Run chunking through adapter
-            formatted_result = adapter.run_chunking(
-                input_text=input_text,
-                config=config,
-                include_metadata=include_metadata,
-                enable_hierarchy=enable_hierarchy,
-                debug=debug,
-            )
+            if input_texts:
+                # Batch mode: one entry per document, errors isolated
+                mode = "batch"
+                formatted_result = adapter.run_chunking_batch(
+                    input_texts=input_texts,
+                    config=config,
+                    include_metadata=include_metadata,
+                    enable_hierarchy=enable_hierarchy,
+                    debug=debug,
+                    executor=batch_executor,
+                    render_options=render_options,
+                    dedup=dedup,
+                    max_tokens=max_tokens,
+                )
+                chunk_count = sum(len(entry["chunks"]) for entry in formatted_result)
+            elif stream_output:
+                # Streaming mode: emit bounded groups as they are rendered
+                mode = "stream"
+                offset = 0
+                for group in adapter.run_chunking_stream(
+                    input_text=input_text,
+                    config=config,
+                    include_metadata=include_metadata,
+                    enable_hierarchy=enable_hierarchy,
+                    debug=debug,
+                    group_size=STREAM_GROUP_SIZE,
+                    render_options=render_options,
+                    structured=output_format == "json",
+                    timings=timings,
+                    deadline=deadline,
+                    max_tokens=max_tokens,
+                ):
+                    yield self.create_json_message({"offset": offset, "chunks": group})
+                    offset += len(group)
+                    chunk_count = offset
+                yield from self._trailer_messages(timings, deadline, debug)
+                return
+            elif output_format == "json" and enable_hierarchy and navigation_index:
+                # Structured hierarchy plus navigation index instead of id lists
+                mode = "json"
+                chunks, index = adapter.run_chunking_indexed(
+                    input_text=input_text,
+                    config=config,
+                    debug=debug,
+                    timings=timings,
+                    deadline=deadline,
+                    max_tokens=max_tokens,
+                    render_options=render_options,
+                )
+                chunk_count = len(chunks)
+                yield self.create_json_message(
+                    {"chunks": chunks, "navigation": index.to_dict()}
+                )
+                yield from self._trailer_messages(timings, deadline, debug)
+                return
+            elif output_format == "json":
+                # Structured mode: metadata as objects, no header re-parsing
+                mode = "json"
+                chunks = adapter.run_chunking_structured(
+                    input_text=input_text,
+                    config=config,
+                    enable_hierarchy=enable_hierarchy,
+                    debug=debug,
+                    timings=timings,
+                    deadline=deadline,
+                    max_tokens=max_tokens,
+                    render_options=render_options,
+                )
+                chunk_count = len(chunks)
+                yield self.create_json_message({"chunks": chunks})
+                yield from self._trailer_messages(timings, deadline, debug)
+                return
+            else:
+                formatted_result = adapter.run_chunking(
+                    input_text=input_text,
+                    config=config,
+                    include_metadata=include_metadata,
+                    enable_hierarchy=enable_hierarchy,
+                    debug=debug,
+                    render_options=render_options,
+                    timings=timings,
+                    deadline=deadline,
+                    max_tokens=max_tokens,
+                )
+                chunk_count = len(formatted_result)
 
             # 5. Return results as array of strings via 'result' variable
             # Each chunk is a separate string in the array
             yield self.create_variable_message("result", formatted_result)
+            yield from self._trailer_messages(timings, deadline, debug)
 
         except ValueError as e:
+            error_type = "validation"
             yield self.create_text_message(f"Validation error: {str(e)}")
         except Exception as e:
+            error_type = "generic"
             yield self.create_text_message(f"Error chunking document: {str(e)}")
+        finally:
+            # Also runs on request timeout, showing the stage still active
+            if timings is not None and timings.enabled:
+                timings.log(logger)
+            plugin_metrics.observe_invocation(
+                mode=mode,
+                strategy=self._used_strategy(timings, strategy),
+                input_bytes=input_bytes,
+                chunks=chunk_count,
+                seconds=time.perf_counter() - started,
+                error=error_type,
+                degraded=deadline.reasons if deadline is not None else (),
+            )
+
+    def _trailer_messages(
+        self, timings: StageTimings | None, deadline: Deadline | None, debug: bool
+    ) -> Generator[ToolInvokeMessage, None, None]:
+        """Report deadline degradation and attach timings to debug output."""
+        if deadline is not None and deadline.degraded:
+            logger.warning(
+                f"[MarkdownChunkTool] Output degraded by deadline: {deadline.reasons}"
+            )
+            yield self.create_variable_message("degraded", list(deadline.reasons))
+        if timings is not None and timings.enabled and debug:
+            yield self.create_json_message({"timing": timings.to_dict()})
+
+    def _used_strategy(self, timings: StageTimings | None, requested: Any) -> str:
+        """Strategy the library used, for the latency metric label.
+
+        Recorded by the adapter on timings from the raw chunks. Without it
+        (batch mode, cached rendered output) an explicit strategy is
+        assumed to be used as requested; "auto" is "unknown".
+        """
+        if timings is not None and timings.strategy:
+            return str(timings.strategy)
+        return str(requested) if requested and requested != "auto" else "unknown"
+
+    def _parse_input_texts(self, value: Any) -> list[Any]:
+        """Normalize the input_texts parameter to a list.
+
+        Accepts a list or a JSON array string (as passed from workflow
+        variables); None and empty strings mean no batch.
+        """
+        if value is None or value == "":
+            return []
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"input_texts must be a JSON array: {e}") from e
+        if not isinstance(value, list):
+            raise ValueError("input_texts must be an array of strings")
+        return value